@@ -1,10 +1,10 @@
 import warnings
-import time
 import os
+import tempfile
 from flask import Flask
+from werkzeug.middleware.proxy_fix import ProxyFix
 from flask_login import LoginManager
 from flask_migrate import Migrate
-from sqlalchemy.exc import SQLAlchemyError, OperationalError
 from dotenv import load_dotenv
 from langchain_openai import ChatOpenAI
 import openai
@@ -12,7 +12,23 @@ from elevenlabs.client import ElevenLabs
 from models import User
 from extensions import db
 from election_service import ElectionService
+from turnout import TurnoutSeries
+from election_cache import ElectionCache
+from uploads import SpooledRequest
+from rate_limit import TokenBucketLimiter
+from resilience import (
+    Bulkhead, CircuitBreaker, Guard, ResilientChatModel, ResilientElevenLabs, ResilientOpenAI, pooled_http_client
+)
+from db_readiness import DatabaseReadiness
+from db_pool import label_pools, pool_options_from_env
+from query_profiler import QueryProfiler
+from db_routing import REPLICA_BIND
 import controllers  # Import the controllers package
+import metrics
+import assets
+import vote_projector
+import job_queue
+import seed
 
 # Suppress specific Pydantic UserWarnings
 warnings.filterwarnings(
@@ -32,6 +48,7 @@ warnings.filterwarnings(
 def create_app(config_name='default'):
     """Application factory function"""
     app = Flask(__name__)
+    app.request_class = SpooledRequest
 
     # Load environment variables from .env file
     load_dotenv()
@@ -39,36 +56,94 @@ def create_app(config_name='default'):
     # Set configuration for different environments
     if config_name == 'default':
         app.config['SQLALCHEMY_DATABASE_URI'] = os.getenv("DATABASE_CONNECTION_STRING")
+        app.config['SQLALCHEMY_ENGINE_OPTIONS'] = pool_options_from_env()
+        app.config['SQL_PROFILER'] = os.getenv("SQL_PROFILER", "false").lower() == "true"
         print("Using PRODUCTION Azure SQL DB")
     elif config_name == 'testing':
         app.config['SQLALCHEMY_DATABASE_URI'] = 'sqlite:///:memory:'  # In-memory SQLite for testing
+        app.config['SQL_PROFILER'] = True
         print("Using in-memory SQLite for testing")
+    elif config_name == 'benchmark':
+        # Seeded SQLite file or local Postgres; no profiler so timings stay clean
+        app.config['SQLALCHEMY_DATABASE_URI'] = os.getenv("BENCHMARK_DATABASE_URL", 'sqlite:///:memory:')
+        print("Using benchmark database")
+
+    # Optional read replica for listing and results queries; locally this can be
+    # a second SQLite/Postgres database
+    replica_url = os.getenv("DATABASE_REPLICA_CONNECTION_STRING")
+    if replica_url:
+        replica_options = pool_options_from_env() if config_name == 'default' else {}
+        app.config['SQLALCHEMY_BINDS'] = {REPLICA_BIND: {"url": replica_url, **replica_options}}
 
     app.config['SQLALCHEMY_TRACK_MODIFICATIONS'] = False
+    # How long a vote's Idempotency-Key replays the original response
+    app.config['IDEMPOTENCY_TTL_SECONDS'] = int(os.getenv("IDEMPOTENCY_TTL_SECONDS", 86400))
+    # Seconds clients and CDNs may reuse /api responses before revalidating
+    app.config['API_CACHE_MAX_AGE'] = int(os.getenv("API_CACHE_MAX_AGE", 5))
+    # Token buckets ("count/second|minute|hour") guarding the Whisper, GPT-4 and
+    # ElevenLabs endpoints; an empty value disables that scope
+    app.config['RATE_LIMITS'] = {
+        'ai': {
+            'user': os.getenv("AI_RATE_LIMIT_PER_USER", "5/minute"),
+            'ip': os.getenv("AI_RATE_LIMIT_PER_IP", "10/minute"),
+            'global': os.getenv("AI_RATE_LIMIT_GLOBAL", "60/minute"),
+        }
+    }
+    # Request bodies are capped app-wide; /process_audio tightens that to
+    # AUDIO_MAX_BYTES and rejects WAVs longer than AUDIO_MAX_SECONDS
+    app.config['MAX_CONTENT_LENGTH'] = int(os.getenv("MAX_CONTENT_LENGTH", 16 * 1024 * 1024))
+    app.config['AUDIO_MAX_BYTES'] = int(os.getenv("AUDIO_MAX_BYTES", 5 * 1024 * 1024))
+    app.config['AUDIO_MAX_SECONDS'] = float(os.getenv("AUDIO_MAX_SECONDS", 30))
+    app.config['UPLOAD_SPOOL_BYTES'] = int(os.getenv("UPLOAD_SPOOL_BYTES", 256 * 1024))
+    # Background jobs for GPT-4/ElevenLabs work; tests run them inline instead
+    app.config['JOBS_EAGER'] = config_name == 'testing'
+    app.config['JOB_WORKER_THREADS'] = int(os.getenv("JOB_WORKER_THREADS", 2))
+    app.config['JOB_MAX_ATTEMPTS'] = int(os.getenv("JOB_MAX_ATTEMPTS", 3))
+    app.config['JOB_RETENTION_SECONDS'] = int(os.getenv("JOB_RETENTION_SECONDS", 86400))
     app.secret_key = os.getenv("SECRET_KEY", 'default_secret_key')
 
+    # Proxies in front of the app (Azure App Service's front end in production) whose
+    # X-Forwarded-* headers are trusted, so remote_addr is the real client for the
+    # per-IP rate limit; 0 trusts none, for running without a proxy
+    app.config['TRUSTED_PROXY_HOPS'] = int(os.getenv("TRUSTED_PROXY_HOPS", 1 if config_name == 'default' else 0))
+    if app.config['TRUSTED_PROXY_HOPS']:
+        hops = app.config['TRUSTED_PROXY_HOPS']
+        app.wsgi_app = ProxyFix(app.wsgi_app, x_for=hops, x_proto=hops, x_host=hops)
+
     # Initialize extensions
     db.init_app(app)
     migrate = Migrate(app, db)
-
-    # Database connection retry logic
-    max_retries = 5
-    retry_delay = 5  # seconds
-
-    for attempt in range(max_retries):
-        try:
-            with app.app_context():
-                db.engine.connect()
-            print("Database connection successful")
-            break
-        except (SQLAlchemyError, OperationalError) as e:
-            if attempt < max_retries - 1:
-                print(f"Database connection attempt {attempt + 1} failed. Retrying in {retry_delay} seconds...")
-                time.sleep(retry_delay)
-                retry_delay *= 2  # Exponential backoff
-            else:
-                print(f"Failed to connect to the database after {max_retries} attempts. Error: {str(e)}")
-                raise
+    with app.app_context():
+        label_pools(db.engines)
+
+    # Dev/test query profiling: per-request counts, slow statements and N+1 warnings
+    if app.config.get('SQL_PROFILER'):
+        profiler = QueryProfiler(
+            slow_query_ms=float(os.getenv("SQL_SLOW_QUERY_MS", 100)),
+            nplus1_threshold=int(os.getenv("SQL_NPLUS1_THRESHOLD", 3))
+        )
+        with app.app_context():
+            profiler.init_app(app, db.engines.values())
+
+    # Probe the database in the background so workers boot immediately;
+    # /readyz reports 503 until the first successful connection, then serves the
+    # answer of a recheck that keeps running in the same thread
+    db_readiness = DatabaseReadiness(
+        app,
+        db,
+        base_delay=float(os.getenv("DB_READINESS_BASE_DELAY", 1.0)),
+        max_delay=float(os.getenv("DB_READINESS_MAX_DELAY", 30.0)),
+        recheck_seconds=float(os.getenv("DB_READINESS_RECHECK_SECONDS", 5.0))
+    )
+    app.db_readiness = db_readiness
+    db_readiness.start()
+
+    # Buckets live in a SQLite file so all gunicorn workers on the host share them
+    if config_name == 'testing':
+        rate_limit_path = ':memory:'
+    else:
+        rate_limit_path = os.getenv("RATE_LIMIT_DB", os.path.join(tempfile.gettempdir(), "everyvoter-ratelimit.sqlite3"))
+    app.rate_limiter = TokenBucketLimiter(rate_limit_path)
 
     # Initialize Flask-Login
     login_manager = LoginManager()
@@ -85,15 +160,61 @@ def create_app(config_name='default'):
     if not api_key or not elevenlabs_api_key:
         raise ValueError("Missing required API keys.")
 
-    openai_client = openai.OpenAI(api_key=api_key)
-    model = ChatOpenAI(model="gpt-4", api_key=api_key)
-    app.openai_client = openai_client
-    app.elevenclient = ElevenLabs(api_key=elevenlabs_api_key)
+    # Every provider call gets an overall deadline, a circuit breaker and a slot in a
+    # host-wide bulkhead of its own, so one slow provider can't tie up every worker thread
+    # or starve the other two
+    openai_timeout = float(os.getenv("OPENAI_TIMEOUT_SECONDS", 30))
+    elevenlabs_timeout = float(os.getenv("ELEVENLABS_TIMEOUT_SECONDS", 30))
+    provider_retries = int(os.getenv("AI_MAX_RETRIES", 1))
+    ai_max_concurrent = int(os.getenv("AI_MAX_CONCURRENT", 16))
+    bulkhead_dir = os.getenv("BULKHEAD_DIR", os.path.join(tempfile.gettempdir(), "everyvoter-bulkheads"))
+
+    def guard(name, deadline):
+        breaker = CircuitBreaker(
+            name,
+            failure_threshold=int(os.getenv("CIRCUIT_FAILURE_THRESHOLD", 5)),
+            reset_timeout=float(os.getenv("CIRCUIT_RESET_SECONDS", 30))
+        )
+        bulkhead = Bulkhead(
+            name,
+            max_concurrent=ai_max_concurrent,
+            directory=bulkhead_dir,
+            max_wait=float(os.getenv("AI_BULKHEAD_WAIT_SECONDS", 0))
+        )
+        return Guard(name, breaker, bulkhead, deadline, retries=provider_retries)
+
+    # All three clients share one keep-alive connection pool, so gthread workers
+    # reuse provider connections instead of handshaking on every call. The guards
+    # retry, so the clients don't.
+    http = pooled_http_client(3 * ai_max_concurrent)
+    model = ResilientChatModel(
+        ChatOpenAI(model="gpt-4", api_key=api_key, request_timeout=openai_timeout, max_retries=0, http_client=http),
+        guard("openai_chat", openai_timeout)
+    )
+    app.openai_client = ResilientOpenAI(
+        openai.OpenAI(api_key=api_key, timeout=openai_timeout, max_retries=0, http_client=http),
+        guard("openai_whisper", openai_timeout)
+    )
+    app.elevenclient = ResilientElevenLabs(
+        ElevenLabs(api_key=elevenlabs_api_key, timeout=elevenlabs_timeout, httpx_client=http),
+        guard("elevenlabs", elevenlabs_timeout)
+    )
 
     # Initialize ElectionService
-    election_service = ElectionService(model=model, db=db)
+    election_service = ElectionService(
+        model=model,
+        db=db,
+        shard_strategy=os.getenv("COUNTER_SHARD_STRATEGY", "random")
+    )
     app.election_service = election_service
 
+    # Per-minute/hour/day turnout with closed buckets cached in-process
+    app.turnout_series = TurnoutSeries(db)
+
+    # Election settings and candidates, cached per process and revalidated against
+    # cache_versions at most once per ELECTION_CACHE_CHECK_SECONDS
+    app.election_cache = ElectionCache(db, check_seconds=float(os.getenv("ELECTION_CACHE_CHECK_SECONDS", 1)))
+
     # Initialize all models within app context
     with app.app_context():
         from models import Election, Candidate, Vote, User, UserVote
@@ -101,6 +222,24 @@ def create_app(config_name='default'):
     # Register all blueprints from controllers
     controllers.init_app(app)
 
+    # Per-endpoint latency, status and in-flight metrics served at /metrics
+    metrics.init_app(app)
+
+    # Fingerprinted, immutable static URLs and gzip for HTML/JSON responses;
+    # `flask assets build` writes the manifest and precompressed copies here
+    app.config['ASSET_BUILD_DIR'] = os.getenv("ASSET_BUILD_DIR", os.path.join(app.root_path, 'build', 'static'))
+    assets.init_app(app)
+
+    # `flask tallies catch-up|rebuild` maintain vote_tallies from the vote event log
+    vote_projector.init_app(app)
+
+    # `flask jobs work` runs job threads outside gunicorn; gunicorn workers start
+    # their own in post_worker_init
+    job_queue.init_app(app)
+
+    # `flask seed` fills a scratch database with synthetic users, elections and votes
+    seed.init_app(app)
+
     return app
 
 app = create_app()
@@ -0,0 +1,166 @@
+import gzip
+import hashlib
+import json
+import mimetypes
+import os
+import click
+from flask import current_app, request, send_from_directory
+from flask.cli import AppGroup
+
+try:
+    import brotli
+except ImportError:  # Brotli variants are optional; gzip is always built
+    brotli = None
+
+MANIFEST_NAME = 'manifest.json'
+# Fingerprinted URLs never change content, so browsers can keep them for a year
+IMMUTABLE_MAX_AGE = 365 * 24 * 3600
+COMPRESSIBLE_TYPES = ('text/html', 'application/json')
+# A gzipped body is a different representation, so it can't share the strong ETag of the plain one
+GZIP_ETAG_SUFFIX = '-gzip'
+
+assets_cli = AppGroup('assets', help='Static asset fingerprinting and precompression.')
+
+
+def matching_etag(etag):
+    """Whichever of etag or its gzip form the request's If-None-Match holds, or None."""
+    for candidate in (etag, etag + GZIP_ETAG_SUFFIX):
+        if request.if_none_match.contains_weak(candidate):
+            return candidate
+    return None
+
+
+def fingerprinted_name(filename, content):
+    """styles.css -> styles.<hash>.css"""
+    root, ext = os.path.splitext(filename)
+    return f"{root}.{hashlib.sha256(content).hexdigest()[:12]}{ext}"
+
+
+def iter_static_files(static_folder):
+    for dirpath, dirnames, filenames in os.walk(static_folder):
+        dirnames[:] = sorted(d for d in dirnames if not d.startswith('.'))
+        for name in sorted(filenames):
+            if not name.startswith('.'):
+                path = os.path.join(dirpath, name)
+                yield os.path.relpath(path, static_folder).replace(os.sep, '/'), path
+
+
+def build_manifest(static_folder):
+    """Map every static file to its content-hashed name."""
+    manifest = {}
+    for filename, path in iter_static_files(static_folder):
+        with open(path, 'rb') as f:
+            manifest[filename] = fingerprinted_name(filename, f.read())
+    return manifest
+
+
+def build_assets(static_folder, build_dir, level=9):
+    """Write the manifest plus .gz (and .br when brotli is installed) copies of each asset."""
+    manifest = {}
+    for filename, path in iter_static_files(static_folder):
+        with open(path, 'rb') as f:
+            content = f.read()
+        hashed = fingerprinted_name(filename, content)
+        manifest[filename] = hashed
+
+        target = os.path.join(build_dir, hashed)
+        os.makedirs(os.path.dirname(target), exist_ok=True)
+        with open(target + '.gz', 'wb') as f:
+            f.write(gzip.compress(content, compresslevel=level, mtime=0))
+        if brotli is not None:
+            with open(target + '.br', 'wb') as f:
+                f.write(brotli.compress(content))
+
+    with open(os.path.join(build_dir, MANIFEST_NAME), 'w') as f:
+        json.dump(manifest, f, indent=2, sort_keys=True)
+        f.write('\n')
+    return manifest
+
+
+def load_manifest(static_folder, build_dir):
+    """Use the built manifest when present, otherwise hash the files at startup."""
+    path = os.path.join(build_dir, MANIFEST_NAME)
+    if os.path.exists(path):
+        with open(path) as f:
+            return json.load(f)
+    return build_manifest(static_folder)
+
+
+@assets_cli.command('build')
+@click.option('--level', default=9, show_default=True, help='gzip compression level.')
+def build_command(level):
+    """Fingerprint and precompress everything in static/."""
+    build_dir = current_app.config['ASSET_BUILD_DIR']
+    manifest = build_assets(current_app.static_folder, build_dir, level=level)
+    variants = 'gzip and brotli' if brotli is not None else 'gzip'
+    click.echo(f"Built {len(manifest)} assets with {variants} variants in {build_dir}")
+
+
+def precompressed_variant(build_dir, hashed):
+    """Best precompressed file the client accepts, as (filename, content encoding)."""
+    for encoding, suffix in (('br', '.br'), ('gzip', '.gz')):
+        if encoding in request.accept_encodings and os.path.exists(os.path.join(build_dir, hashed + suffix)):
+            return hashed + suffix, encoding
+    return None, None
+
+
+def init_app(app):
+    """Fingerprint url_for('static') URLs, cache them immutably and gzip HTML/JSON responses."""
+    app.config.setdefault('ASSET_BUILD_DIR', os.path.join(app.root_path, 'build', 'static'))
+    app.config.setdefault('COMPRESS_MIN_SIZE', 500)
+    app.config.setdefault('COMPRESS_LEVEL', 6)
+    app.cli.add_command(assets_cli)
+
+    build_dir = app.config['ASSET_BUILD_DIR']
+    manifest = load_manifest(app.static_folder, build_dir)
+    originals = {hashed: filename for filename, hashed in manifest.items()}
+    app.extensions['asset_manifest'] = manifest
+
+    @app.url_defaults
+    def fingerprint_static_urls(endpoint, values):
+        if endpoint == 'static' and values.get('filename') in manifest:
+            values['filename'] = manifest[values['filename']]
+
+    def static(filename):
+        original = originals.get(filename)
+        if original is None:
+            # Plain paths still work, with Flask's default revalidating headers
+            return app.send_static_file(filename)
+
+        mimetype = mimetypes.guess_type(original)[0] or 'application/octet-stream'
+        variant, encoding = precompressed_variant(build_dir, filename)
+        if variant:
+            response = send_from_directory(build_dir, variant, mimetype=mimetype, max_age=IMMUTABLE_MAX_AGE)
+            response.headers['Content-Encoding'] = encoding
+        else:
+            response = send_from_directory(app.static_folder, original, mimetype=mimetype, max_age=IMMUTABLE_MAX_AGE)
+        response.vary.add('Accept-Encoding')
+        response.cache_control.public = True
+        response.cache_control.immutable = True
+        return response
+
+    app.view_functions['static'] = static
+
+    @app.after_request
+    def compress_response(response):
+        if (
+            response.mimetype not in COMPRESSIBLE_TYPES
+            or response.status_code != 200
+            or response.is_streamed
+            or response.direct_passthrough
+            or 'Content-Encoding' in response.headers
+            or response.cache_control.no_transform
+            or 'gzip' not in request.accept_encodings
+        ):
+            return response
+
+        data = response.get_data()
+        if len(data) < app.config['COMPRESS_MIN_SIZE']:
+            return response
+        response.set_data(gzip.compress(data, compresslevel=app.config['COMPRESS_LEVEL']))
+        response.headers['Content-Encoding'] = 'gzip'
+        response.vary.add('Accept-Encoding')
+        etag, weak = response.get_etag()
+        if etag:
+            response.set_etag(etag + GZIP_ETAG_SUFFIX, weak=weak)
+        return response
@@ -0,0 +1,216 @@
+import logging
+import shutil
+import subprocess
+import tempfile
+import wave
+from collections import namedtuple
+import numpy as np
+
+# Whisper resamples everything to 16 kHz mono internally, so anything more is wasted upload
+TARGET_RATE = 16000
+# 20 ms analysis frames; frames this far below the loudest one count as silence
+FRAME_SECONDS = 0.02
+SILENCE_DB = -40
+# Kept either side of the speech so word onsets aren't clipped
+PAD_SECONDS = 0.1
+
+# WAV frames decoded per step, so only the mono mix is ever held whole
+READ_FRAMES = 16384
+
+PreparedAudio = namedtuple('PreparedAudio', ['filename', 'stream', 'content_type', 'duration'])
+
+# container -> (filename extension, content type)
+FORMATS = {
+    'wav': ('wav', 'audio/wav'),
+    'webm': ('webm', 'audio/webm'),
+    'ogg': ('ogg', 'audio/ogg'),
+    'mp3': ('mp3', 'audio/mpeg'),
+    'mp4': ('m4a', 'audio/mp4'),
+    'flac': ('flac', 'audio/flac'),
+}
+
+
+class RecordingTooLong(ValueError):
+    pass
+
+
+def detect_format(head):
+    """Container from the first bytes of a file, whatever it was labelled; None if unknown."""
+    if head[:4] == b'RIFF' and head[8:12] == b'WAVE':
+        return 'wav'
+    if head[:4] == b'\x1aE\xdf\xa3':  # EBML header: WebM/Matroska, what Chrome and Firefox record
+        return 'webm'
+    if head[:4] == b'OggS':
+        return 'ogg'
+    if head[:4] == b'fLaC':
+        return 'flac'
+    if head[4:8] == b'ftyp':  # ISO BMFF, what Safari records
+        return 'mp4'
+    if head[:3] == b'ID3' or (len(head) > 1 and head[0] == 0xFF and head[1] & 0xE0 == 0xE0):
+        return 'mp3'
+    return None
+
+
+def pcm_to_float(raw, width):
+    """Interleaved little-endian PCM bytes as float32 in [-1, 1]."""
+    if width == 1:
+        return (np.frombuffer(raw, dtype=np.uint8).astype(np.float32) - 128) / 128
+    if width == 2:
+        return np.frombuffer(raw, dtype='<i2').astype(np.float32) / 32768
+    if width == 3:
+        bytes3 = np.frombuffer(raw, dtype=np.uint8).reshape(-1, 3).astype(np.int32)
+        ints = bytes3[:, 0] | (bytes3[:, 1] << 8) | (bytes3[:, 2] << 16)
+        return (np.where(ints & 0x800000, ints - 0x1000000, ints)).astype(np.float32) / 8388608
+    if width == 4:
+        return np.frombuffer(raw, dtype='<i4').astype(np.float32) / 2147483648
+    raise wave.Error(f"unsupported sample width {width}")
+
+
+def read_wav(stream):
+    """(float32 samples shaped (frames, channels) in [-1, 1], sample rate) from a PCM WAV."""
+    with wave.open(stream, 'rb') as wav:
+        width, channels, rate = wav.getsampwidth(), wav.getnchannels(), wav.getframerate()
+        raw = wav.readframes(wav.getnframes())
+    raw = raw[:len(raw) - len(raw) % (width * channels)]
+    return pcm_to_float(raw, width).reshape(-1, channels), rate
+
+
+def read_wav_mono(stream, max_seconds=None):
+    """(float32 mono mix, sample rate) from a PCM WAV, decoded READ_FRAMES at a time.
+
+    Raises RecordingTooLong as soon as more than max_seconds has been read.
+    """
+    chunks, total = [], 0
+    with wave.open(stream, 'rb') as wav:
+        width, channels, rate = wav.getsampwidth(), wav.getnchannels(), wav.getframerate()
+        max_frames = None if max_seconds is None else int(max_seconds * rate)
+        while raw := wav.readframes(READ_FRAMES):
+            raw = raw[:len(raw) - len(raw) % (width * channels)]
+            chunk = pcm_to_float(raw, width).reshape(-1, channels).mean(axis=1, dtype=np.float32)
+            total += len(chunk)
+            if max_frames is not None and total > max_frames:
+                raise RecordingTooLong(f"recording is longer than {max_seconds:g} seconds")
+            chunks.append(chunk)
+    return (np.concatenate(chunks) if chunks else np.empty(0, dtype=np.float32)), rate
+
+
+def trim_silence(samples, rate):
+    """Drop leading and trailing frames quieter than SILENCE_DB below the loudest frame."""
+    frame = max(1, int(rate * FRAME_SECONDS))
+    count = len(samples) // frame
+    if count == 0:
+        return samples[:0]
+    rms = np.sqrt(np.mean(samples[:count * frame].reshape(count, frame) ** 2, axis=1))
+    peak = rms.max()
+    if peak <= 1e-4:  # digital silence
+        return samples[:0]
+    loud = np.flatnonzero(rms >= peak * 10 ** (SILENCE_DB / 20))
+    pad = int(rate * PAD_SECONDS)
+    return samples[max(0, loud[0] * frame - pad):min(len(samples), (loud[-1] + 1) * frame + pad)]
+
+
+def resample(samples, rate, target=TARGET_RATE):
+    """Windowed-sinc low-pass below the new Nyquist, then linear interpolation onto the target grid."""
+    if rate == target or len(samples) == 0:
+        return samples
+    if rate > target and len(samples) > 64:
+        cutoff = 0.5 * target / rate  # cycles per input sample
+        taps = np.arange(-32, 33)
+        kernel = 2 * cutoff * np.sinc(2 * cutoff * taps) * np.hamming(len(taps))
+        samples = np.convolve(samples, (kernel / kernel.sum()).astype(np.float32), mode='same')
+    positions = np.arange(int(len(samples) * target / rate)) * (rate / target)
+    return np.interp(positions, np.arange(len(samples)), samples).astype(np.float32)
+
+
+def to_wav(samples, rate, spool_bytes):
+    out = tempfile.SpooledTemporaryFile(max_size=spool_bytes, mode='w+b')
+    pcm = (np.clip(samples, -1, 1) * 32767).astype('<i2')
+    with wave.open(out, 'wb') as wav:
+        wav.setnchannels(1)
+        wav.setsampwidth(2)
+        wav.setframerate(rate)
+        wav.writeframes(pcm.tobytes())
+    out.seek(0)
+    return out
+
+
+def decode_with_ffmpeg(stream, spool_bytes, max_seconds=None):
+    """16 kHz mono WAV via ffmpeg as a file positioned at 0, or None when it isn't installed or can't decode.
+
+    The upload is fed to ffmpeg in chunks and its output goes straight to a
+    temporary file, so neither is held in memory whole.
+    """
+    ffmpeg = shutil.which('ffmpeg')
+    if not ffmpeg:
+        return None
+    stream.seek(0)
+    out = tempfile.TemporaryFile(mode='w+b')
+    try:
+        process = subprocess.Popen(
+            [ffmpeg, '-nostdin', '-loglevel', 'error', '-i', 'pipe:0', '-ac', '1', '-ar', str(TARGET_RATE)]
+            # A little past the limit, so an over-long recording is still recognisable as one
+            + (['-t', f"{max_seconds + 1:g}"] if max_seconds is not None else [])
+            + ['-f', 'wav', 'pipe:1'],
+            stdin=subprocess.PIPE, stdout=out, stderr=subprocess.PIPE
+        )
+    except OSError as e:
+        out.close()
+        logging.warning(f"ffmpeg could not decode audio upload: {e}")
+        return None
+    try:
+        try:
+            shutil.copyfileobj(stream, process.stdin, spool_bytes)
+        except BrokenPipeError:
+            pass  # ffmpeg gave up early; its exit code says why
+        # Closes stdin, then waits
+        _, stderr = process.communicate(timeout=30)
+        if process.returncode != 0:
+            raise subprocess.CalledProcessError(process.returncode, ffmpeg, stderr=stderr)
+    except (subprocess.SubprocessError, OSError) as e:
+        process.kill()
+        process.wait()
+        out.close()
+        logging.warning(f"ffmpeg could not decode audio upload: {e}")
+        return None
+    out.seek(0)
+    return out
+
+
+def preprocess(stream, spool_bytes=256 * 1024, max_seconds=None):
+    """Prepare an uploaded recording for Whisper.
+
+    WAV, and anything ffmpeg can decode, becomes 16 kHz mono 16-bit WAV with
+    silence trimmed; duration is then the trimmed length in seconds (0 when
+    nothing but silence was recorded). Other uploads pass through unchanged
+    with a filename and content type matching their real container (both None
+    if it isn't recognised) and a duration of None.
+
+    Decoding stops past max_seconds of audio, before trimming, with
+    RecordingTooLong, so memory per upload stays bounded.
+    """
+    stream.seek(0)
+    container = detect_format(stream.read(16))
+    stream.seek(0)
+
+    decoded = stream if container == 'wav' else None
+    if container != 'wav':
+        decoded = decode_with_ffmpeg(stream, spool_bytes, max_seconds)
+
+    if decoded is not None:
+        try:
+            mono, rate = read_wav_mono(decoded, max_seconds)
+        except (wave.Error, EOFError):
+            mono = None
+        finally:
+            if decoded is not stream:
+                decoded.close()
+        if mono is not None:
+            speech = resample(trim_silence(mono, rate), rate)
+            return PreparedAudio('voice_vote.wav', to_wav(speech, TARGET_RATE, spool_bytes), 'audio/wav',
+                                 len(speech) / TARGET_RATE)
+
+    stream.seek(0)
+    if container is None:
+        return PreparedAudio(None, stream, None, None)
+    extension, content_type = FORMATS[container]
+    return PreparedAudio(f'voice_vote.{extension}', stream, content_type, None)
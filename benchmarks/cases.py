@@ -0,0 +1,124 @@
+import itertools
+from flask import g
+from sqlalchemy import insert
+from werkzeug.security import generate_password_hash
+from extensions import db
+from models import User, Election, Candidate, Vote, UserVote
+
+# Registered benchmark cases: name -> function(ctx) returning measure() kwargs
+BENCHMARKS = {}
+
+
+def register(name):
+    def decorator(func):
+        BENCHMARKS[name] = func
+        return func
+    return decorator
+
+
+def seed(ctx, candidates=10, votes=5000, voters=500):
+    """Create one ongoing election with votes, plus fresh users for the vote-recording cases."""
+    election = Election(election_name="Benchmark Election", election_type="custom", max_votes=votes)
+    db.session.add(election)
+    db.session.flush()
+    db.session.add_all(Candidate(name=f"Candidate {i}", election_id=election.id) for i in range(1, candidates + 1))
+    db.session.commit()
+
+    candidate_ids = [c.id for c in election.candidates]
+    db.session.execute(insert(Vote), [
+        {"candidate_id": candidate_ids[i % len(candidate_ids)], "election_id": election.id}
+        for i in range(votes)
+    ])
+
+    # One password hash for everyone: hashing is deliberately slow
+    password_hash = generate_password_hash("benchmark")
+    db.session.execute(insert(User), [
+        {"username": f"bench_voter_{i}", "password_hash": password_hash, "role": "regular_user"}
+        for i in range(voters)
+    ])
+    db.session.commit()
+
+    ctx.election_id = election.id
+    ctx.voter_ids = iter(db.session.scalars(db.select(User.id).order_by(User.id)).all())
+    ctx.election_names = (f"Benchmark Election {i}" for i in itertools.count())
+
+
+def login_as(client, user_id):
+    with client.session_transaction() as session:
+        session["_user_id"] = str(user_id)
+        session["_fresh"] = True
+    # Requests share the runner's app context, where Flask-Login caches the user
+    g.pop("_login_user", None)
+
+
+@register("service.start_election")
+def bench_start_election(ctx):
+    service = ctx.app.election_service
+    candidates = [f"Candidate {i}" for i in range(1, 11)]
+    return {"func": lambda name: service.start_election(candidates, 100, "custom", name),
+            "setup": lambda: next(ctx.election_names)}
+
+
+@register("service.calculate_results")
+def bench_calculate_results(ctx):
+    service = ctx.app.election_service
+
+    def tally():
+        db.session.expire_all()  # Measure the real loads, not the identity map
+        service.calculate_results(db.session.get(Election, ctx.election_id))
+
+    return {"func": tally}
+
+
+@register("service.match_candidate")
+def bench_match_candidate(ctx):
+    service = ctx.app.election_service
+    candidates = db.session.get(Election, ctx.election_id).candidates
+    return {"func": lambda: service.match_candidate("candidat 7", candidates)}
+
+
+@register("vote.record_vote")
+def bench_record_vote(ctx):
+    def next_voter():
+        login_as(ctx.client, next(ctx.voter_ids))
+
+    def cast_vote(_):
+        response = ctx.client.post(f"/vote/{ctx.election_id}", data={"candidate": 1})
+        assert response.status_code == 302, response.status_code
+
+    return {"func": cast_vote, "setup": next_voter}
+
+
+@register("vote.voice_vote")
+def bench_voice_vote(ctx):
+    def next_voter():
+        login_as(ctx.client, next(ctx.voter_ids))
+
+    def cast_voice_vote(_):
+        response = ctx.client.post("/voice_vote", json={"transcript": "candidate 3", "election_id": ctx.election_id})
+        assert response.status_code == 200, response.get_data(as_text=True)
+
+    return {"func": cast_voice_vote, "setup": next_voter}
+
+
+@register("render.index")
+def bench_render_index(ctx):
+    return {"func": lambda: ctx.client.get("/")}
+
+
+@register("render.results")
+def bench_render_results(ctx):
+    return {"func": lambda: ctx.client.get(f"/results/{ctx.election_id}")}
+
+
+@register("tally.instant_runoff")
+def bench_instant_runoff(ctx, ballots=100_000, candidates=8):
+    import numpy as np
+    import tally_engine
+
+    # Random partial rankings: a shuffled candidate order truncated to 1..candidates choices
+    rng = np.random.default_rng(0)
+    orders = rng.permuted(np.tile(np.arange(candidates, dtype=np.uint8), (ballots, 1)), axis=1)
+    lengths = rng.integers(1, candidates + 1, size=ballots)
+    packed = [order[:length].tobytes() for order, length in zip(orders, lengths)]
+    return {"func": lambda: tally_engine.instant_runoff(packed, candidates)}
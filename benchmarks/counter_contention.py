@@ -0,0 +1,133 @@
+"""Concurrent vote recording for one hot candidate: no counters, a single counter row, or sharded.
+
+    python -m benchmarks.counter_contention --database-url postgresql://localhost/everyvoter_bench
+    python -m benchmarks.counter_contention --threads 12 --shards 0 --shards 1 --shards 4 --shards 12
+
+Every thread records votes from distinct users for the same candidate through
+ElectionService.record_vote, so with one shard all transactions queue on the
+same counter row. Shards 0 is the unsharded baseline, which only inserts vote
+rows and counts them when tallying. Row-level contention is what sharding removes, so run this
+against Postgres; SQLite takes a database-wide write lock and serializes every
+transaction no matter how many shards exist.
+The target database is dropped and recreated.
+"""
+import argparse
+import os
+import sys
+import tempfile
+import threading
+import time
+
+
+def parse_args(argv):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--database-url", help="SQLAlchemy URL of a scratch database (default: temporary SQLite file)")
+    # Default pool holds 15 connections; more threads would also queue on the pool
+    parser.add_argument("--threads", type=int, default=12)
+    parser.add_argument("--votes-per-thread", type=int, default=50)
+    parser.add_argument("--shards", type=int, action="append", help="Shard counts to compare (default: 0, 1 and 16)")
+    parser.add_argument("--output", default="bench_output.json")
+    return parser.parse_args(argv)
+
+
+def run_case(app, shards, threads, votes_per_thread):
+    from sqlalchemy import insert
+    from sqlalchemy.exc import OperationalError
+    from extensions import db
+    from models import Election, User
+    from benchmarks.harness import summarize
+
+    with app.app_context():
+        db.drop_all()
+        db.create_all()
+        election_id = app.election_service.start_election(
+            ["Hot Candidate"], 1_000_000, "custom", f"Contention {shards}", counter_shards=shards
+        )
+        candidate_id = db.session.get(Election, election_id).candidates[0].id
+        db.session.execute(insert(User), [
+            {"username": f"contention_{i}", "password_hash": "x", "role": "regular_user"}
+            for i in range(threads * votes_per_thread)
+        ])
+        db.session.commit()
+        db.session.remove()
+
+    latencies, retries = [], []
+    lock = threading.Lock()
+    start_barrier = threading.Barrier(threads)
+
+    def voter(thread_index):
+        thread_latencies, thread_retries = [], 0
+        with app.app_context():
+            election = db.session.get(Election, election_id)
+            start_barrier.wait()
+            for i in range(votes_per_thread):
+                user_id = 1 + thread_index * votes_per_thread + i
+                start = time.perf_counter()
+                while True:
+                    try:
+                        app.election_service.record_vote(user_id, election, candidate_id)
+                        break
+                    except OperationalError:
+                        # Lock timeout or deadlock victim: retry like a client would
+                        db.session.rollback()
+                        thread_retries += 1
+                thread_latencies.append(time.perf_counter() - start)
+            db.session.remove()
+        with lock:
+            latencies.extend(thread_latencies)
+            retries.append(thread_retries)
+
+    workers = [threading.Thread(target=voter, args=(i,)) for i in range(threads)]
+    started = time.perf_counter()
+    for worker in workers:
+        worker.start()
+    for worker in workers:
+        worker.join()
+    elapsed = time.perf_counter() - started
+
+    with app.app_context():
+        totals = app.election_service.calculate_results(db.session.get(Election, election_id))
+        db.session.remove()
+    assert totals == {"Hot Candidate": 100.0}, totals
+
+    result = summarize(latencies)
+    result.update({
+        "shards": shards,
+        "votes": len(latencies),
+        "votes_per_sec": round(len(latencies) / elapsed, 2),
+        "retries": sum(retries),
+    })
+    return result
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    tmpdir = tempfile.TemporaryDirectory()
+    database_url = args.database_url or f"sqlite:///{os.path.join(tmpdir.name, 'contention.db')}"
+
+    # application.py builds its module-level app at import, which needs these set
+    os.environ["BENCHMARK_DATABASE_URL"] = database_url
+    os.environ.setdefault("DATABASE_CONNECTION_STRING", database_url)
+    os.environ.setdefault("OPENAI_API_KEY", "benchmark")
+    os.environ.setdefault("ELEVENLABS_API_KEY", "benchmark")
+
+    from application import create_app
+    from benchmarks.harness import build_report, write_json
+    from benchmarks.stubs import install_stub_providers
+
+    app = install_stub_providers(create_app('benchmark'))
+
+    results = {}
+    for shards in args.shards or [0, 1, 16]:
+        result = run_case(app, shards, args.threads, args.votes_per_thread)
+        results[f"counter_contention.shards_{shards}"] = result
+        print(f"shards={shards:<4} {result['votes_per_sec']:>9} votes/s   median {result['median_ms']:8.2f} ms   "
+              f"p95 {result['p95_ms']:8.2f} ms   retries {result['retries']}")
+
+    write_json(args.output, build_report(results, database_url))
+    print(f"Results written to {args.output}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,73 @@
+import json
+import platform
+import statistics
+import time
+from datetime import datetime, timezone
+
+
+def measure(func, iterations=50, warmup=5, setup=None):
+    """Time func over several iterations; setup() runs untimed and its result is passed to func."""
+    samples = []
+    for i in range(warmup + iterations):
+        if setup:
+            arg = setup()
+            start = time.perf_counter()
+            func(arg)
+        else:
+            start = time.perf_counter()
+            func()
+        elapsed = time.perf_counter() - start
+        if i >= warmup:
+            samples.append(elapsed)
+    return summarize(samples)
+
+
+def summarize(samples):
+    ordered = sorted(samples)
+    median = statistics.median(ordered)
+    return {
+        "iterations": len(ordered),
+        "min_ms": round(ordered[0] * 1000, 4),
+        "median_ms": round(median * 1000, 4),
+        "p95_ms": round(ordered[min(len(ordered) - 1, int(len(ordered) * 0.95))] * 1000, 4),
+        "mean_ms": round(statistics.fmean(ordered) * 1000, 4),
+        "ops_per_sec": round(1 / median, 2) if median else None,
+    }
+
+
+def build_report(results, database_url):
+    return {
+        "created_at": datetime.now(timezone.utc).isoformat(),
+        "python": platform.python_version(),
+        "database": database_url.split(":", 1)[0],
+        "results": results,
+    }
+
+
+def compare_to_baseline(report, baseline, tolerance=0.5):
+    """Benchmarks whose median is more than `tolerance` slower than the baseline's."""
+    regressions = []
+    for name, result in report["results"].items():
+        previous = baseline.get("results", {}).get(name)
+        if not previous or not previous.get("median_ms"):
+            continue
+        ratio = result["median_ms"] / previous["median_ms"]
+        if ratio > 1 + tolerance:
+            regressions.append({
+                "benchmark": name,
+                "baseline_median_ms": previous["median_ms"],
+                "median_ms": result["median_ms"],
+                "ratio": round(ratio, 2),
+            })
+    return regressions
+
+
+def load_json(path):
+    with open(path) as f:
+        return json.load(f)
+
+
+def write_json(path, data):
+    with open(path, "w") as f:
+        json.dump(data, f, indent=2, sort_keys=True)
+        f.write("\n")
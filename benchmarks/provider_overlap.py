@@ -0,0 +1,118 @@
+"""How many slow provider calls one gthread worker overlaps, sync views vs Flask async views.
+
+    python -m benchmarks.provider_overlap
+    python -m benchmarks.provider_overlap --threads 8 --requests 64 --latency 0.2
+
+A provider call is simulated by sleeping for --latency seconds (time.sleep in
+the sync view, asyncio.sleep in the async one). --threads request threads, the
+stand-in for one worker's GUNICORN_THREADS, send --requests requests between
+them. The "fanout" cases make --fanout provider calls per request, like the
+GPT-4 candidate introductions: a thread pool in the sync view, asyncio.gather
+in the async one.
+
+Flask runs an async view in a fresh event loop on the thread that took the
+request, so it overlaps no more requests than the sync view does. The async
+cases need asgiref (pip install "flask[async]") and are skipped without it.
+"""
+import argparse
+import asyncio
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+
+def parse_args(argv):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--threads", type=int, default=8)
+    parser.add_argument("--requests", type=int, default=64)
+    parser.add_argument("--latency", type=float, default=0.2, help="Seconds per simulated provider call")
+    parser.add_argument("--fanout", type=int, default=5, help="Provider calls per request in the fanout cases")
+    parser.add_argument("--output", default="bench_output.json")
+    return parser.parse_args(argv)
+
+
+def build_app(latency, fanout):
+    from flask import Flask
+
+    app = Flask(__name__)
+
+    @app.route("/sync")
+    def sync_view():
+        time.sleep(latency)
+        return "ok"
+
+    @app.route("/async")
+    async def async_view():
+        await asyncio.sleep(latency)
+        return "ok"
+
+    @app.route("/sync_fanout")
+    def sync_fanout_view():
+        with ThreadPoolExecutor(max_workers=fanout) as pool:
+            list(pool.map(time.sleep, [latency] * fanout))
+        return "ok"
+
+    @app.route("/async_fanout")
+    async def async_fanout_view():
+        await asyncio.gather(*(asyncio.sleep(latency) for _ in range(fanout)))
+        return "ok"
+
+    return app
+
+
+def run_case(app, path, threads, requests):
+    from benchmarks.harness import summarize
+
+    latencies = []
+    lock = threading.Lock()
+    clients = threading.local()
+
+    def send(_):
+        if not hasattr(clients, "client"):
+            clients.client = app.test_client()
+        start = time.perf_counter()
+        response = clients.client.get(path)
+        elapsed = time.perf_counter() - start
+        assert response.status_code == 200, response.status_code
+        with lock:
+            latencies.append(elapsed)
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=threads) as pool:
+        list(pool.map(send, range(requests)))
+    elapsed = time.perf_counter() - started
+
+    result = summarize(latencies)
+    result.update({"requests": requests, "threads": threads, "requests_per_sec": round(requests / elapsed, 2)})
+    return result
+
+
+def main(argv=None):
+    args = parse_args(argv)
+
+    from benchmarks.harness import build_report, write_json
+
+    try:
+        import asgiref  # noqa: F401  Flask needs it to run async views
+        modes = ["sync", "async"]
+    except ImportError:
+        print("asgiref is not installed; skipping the async cases")
+        modes = ["sync"]
+
+    app = build_app(args.latency, args.fanout)
+    results = {}
+    for shape in ("", "_fanout"):
+        for mode in modes:
+            result = run_case(app, f"/{mode}{shape}", args.threads, args.requests)
+            results[f"provider_overlap.{mode}{shape}"] = result
+            print(f"{mode + shape:<13} {result['requests_per_sec']:>8} req/s   median {result['median_ms']:8.2f} ms   "
+                  f"p95 {result['p95_ms']:8.2f} ms")
+
+    write_json(args.output, build_report(results, "none:"))
+    print(f"Results written to {args.output}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
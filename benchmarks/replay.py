@@ -0,0 +1,108 @@
+"""Vote event log replay throughput: rebuild vote_tallies from seq 0.
+
+    python -m benchmarks.replay
+    python -m benchmarks.replay --database-url postgresql://localhost/everyvoter_bench --events 1000000
+    python -m benchmarks.replay --batch-size 1000 --batch-size 20000
+
+Seeds --events vote_cast events spread over --elections elections, then times
+VoteTallyProjector.rebuild() once per batch size.
+The target database is dropped and recreated.
+"""
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+
+def parse_args(argv):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--database-url", help="SQLAlchemy URL of a scratch database (default: temporary SQLite file)")
+    parser.add_argument("--events", type=int, default=200_000)
+    parser.add_argument("--elections", type=int, default=20)
+    parser.add_argument("--candidates", type=int, default=8, help="Candidates per election")
+    parser.add_argument("--batch-size", type=int, action="append", help="Events per projector batch (default: 5000)")
+    parser.add_argument("--output", default="bench_output.json")
+    return parser.parse_args(argv)
+
+
+def seed_events(app, events, elections, candidates):
+    from sqlalchemy import insert
+    from extensions import db
+    from models import Election, VoteEvent
+
+    with app.app_context():
+        db.drop_all()
+        db.create_all()
+        candidate_ids = []
+        for i in range(elections):
+            election_id = app.election_service.start_election(
+                [f"Candidate {c}" for c in range(candidates)], events, "custom", f"Replay {i}"
+            )
+            candidate_ids.extend((election_id, c.id) for c in db.session.get(Election, election_id).candidates)
+
+        chunk = 50_000
+        for start in range(0, events, chunk):
+            db.session.execute(insert(VoteEvent), [
+                {"event_type": "vote_cast", "election_id": candidate_ids[i % len(candidate_ids)][0],
+                 "candidate_id": candidate_ids[i % len(candidate_ids)][1]}
+                for i in range(start, min(events, start + chunk))
+            ])
+        db.session.commit()
+        db.session.remove()
+
+
+def run_case(app, batch_size, events):
+    from sqlalchemy import func, select
+    from extensions import db
+    from models import VoteTally
+    from vote_projector import VoteTallyProjector
+
+    with app.app_context():
+        projector = VoteTallyProjector(db, batch_size=batch_size)
+        start = time.perf_counter()
+        applied = projector.rebuild()
+        elapsed = time.perf_counter() - start
+        total = db.session.scalar(select(func.sum(VoteTally.votes)))
+        db.session.remove()
+    assert applied == events and total == events, (applied, total)
+
+    return {
+        "batch_size": batch_size,
+        "events": applied,
+        "seconds": round(elapsed, 3),
+        "events_per_sec": round(applied / elapsed, 1),
+    }
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    tmpdir = tempfile.TemporaryDirectory()
+    database_url = args.database_url or f"sqlite:///{os.path.join(tmpdir.name, 'replay.db')}"
+
+    # application.py builds its module-level app at import, which needs these set
+    os.environ["BENCHMARK_DATABASE_URL"] = database_url
+    os.environ.setdefault("DATABASE_CONNECTION_STRING", database_url)
+    os.environ.setdefault("OPENAI_API_KEY", "benchmark")
+    os.environ.setdefault("ELEVENLABS_API_KEY", "benchmark")
+
+    from application import create_app
+    from benchmarks.harness import build_report, write_json
+    from benchmarks.stubs import install_stub_providers
+
+    app = install_stub_providers(create_app('benchmark'))
+    seed_events(app, args.events, args.elections, args.candidates)
+
+    results = {}
+    for batch_size in args.batch_size or [5000]:
+        result = run_case(app, batch_size, args.events)
+        results[f"replay.batch_{batch_size}"] = result
+        print(f"batch={batch_size:<7} {result['events_per_sec']:>12} events/s   {result['seconds']:8.3f} s")
+
+    write_json(args.output, build_report(results, database_url))
+    print(f"Results written to {args.output}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
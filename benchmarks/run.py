@@ -0,0 +1,89 @@
+"""Run the micro-benchmarks and compare them with a stored baseline.
+
+    python -m benchmarks.run                                  # temporary SQLite file
+    python -m benchmarks.run --database-url postgresql://localhost/everyvoter_bench
+    python -m benchmarks.run --update-baseline                # accept the new numbers
+
+The target database is dropped and recreated, so never point this at real data.
+Exits non-zero when a benchmark is slower than the baseline by more than --tolerance.
+"""
+import argparse
+import os
+import sys
+import tempfile
+from types import SimpleNamespace
+
+BASELINE_PATH = os.path.join(os.path.dirname(__file__), "baseline.json")
+
+
+def parse_args(argv):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--database-url", help="SQLAlchemy URL of a scratch database (default: temporary SQLite file)")
+    parser.add_argument("--iterations", type=int, default=50)
+    parser.add_argument("--warmup", type=int, default=5)
+    parser.add_argument("--only", action="append", default=[], help="Run only benchmarks whose name starts with this")
+    parser.add_argument("--output", default="bench_output.json", help="Where to write the JSON results")
+    parser.add_argument("--baseline", default=BASELINE_PATH)
+    parser.add_argument("--tolerance", type=float, default=0.5, help="Allowed slowdown before failing (0.5 = 50%%)")
+    parser.add_argument("--update-baseline", action="store_true")
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    tmpdir = tempfile.TemporaryDirectory()
+    database_url = args.database_url or f"sqlite:///{os.path.join(tmpdir.name, 'bench.db')}"
+
+    # application.py builds its module-level app at import, which needs these set
+    os.environ["BENCHMARK_DATABASE_URL"] = database_url
+    os.environ.setdefault("DATABASE_CONNECTION_STRING", database_url)
+    os.environ.setdefault("OPENAI_API_KEY", "benchmark")
+    os.environ.setdefault("ELEVENLABS_API_KEY", "benchmark")
+
+    from application import create_app
+    from extensions import db
+    from benchmarks.cases import BENCHMARKS, seed
+    from benchmarks.harness import measure, build_report, compare_to_baseline, load_json, write_json
+    from benchmarks.stubs import install_stub_providers
+
+    app = install_stub_providers(create_app('benchmark'))
+    app.config['TESTING'] = True
+
+    results = {}
+    with app.app_context():
+        db.drop_all()
+        db.create_all()
+        ctx = SimpleNamespace(app=app, client=app.test_client())
+        seed(ctx, voters=len(BENCHMARKS) * (args.iterations + args.warmup))
+
+        for name, case in BENCHMARKS.items():
+            if args.only and not any(name.startswith(prefix) for prefix in args.only):
+                continue
+            results[name] = measure(iterations=args.iterations, warmup=args.warmup, **case(ctx))
+            print(f"{name:40} median {results[name]['median_ms']:9.3f} ms   p95 {results[name]['p95_ms']:9.3f} ms")
+
+        db.session.remove()
+        db.drop_all()
+
+    report = build_report(results, database_url)
+    write_json(args.output, report)
+    print(f"Results written to {args.output}")
+
+    if args.update_baseline:
+        write_json(args.baseline, report)
+        print(f"Baseline updated: {args.baseline}")
+        return 0
+
+    if not os.path.exists(args.baseline):
+        print("No baseline to compare against; run with --update-baseline to create one.")
+        return 0
+
+    regressions = compare_to_baseline(report, load_json(args.baseline), args.tolerance)
+    for regression in regressions:
+        print(f"REGRESSION {regression['benchmark']}: {regression['baseline_median_ms']} ms -> "
+              f"{regression['median_ms']} ms ({regression['ratio']}x)")
+    return 1 if regressions else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
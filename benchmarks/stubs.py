@@ -0,0 +1,32 @@
+from types import SimpleNamespace
+
+# Offline stand-ins for the LangChain model, OpenAI client and ElevenLabs
+# client, so benchmarks and load tests never leave the machine or spend credits.
+
+class StubChatModel:
+    def __init__(self, restaurants=None):
+        self.restaurants = restaurants or [f"Restaurant {i}" for i in range(1, 21)]
+
+    def invoke(self, prompt):
+        if prompt.startswith("Generate"):
+            return SimpleNamespace(content="\n".join(self.restaurants))
+        return SimpleNamespace(content="Introducing the animated and lively candidate!")
+
+
+class StubOpenAIClient:
+    def __init__(self, transcript="candidate 1"):
+        transcriptions = SimpleNamespace(create=lambda **kwargs: SimpleNamespace(text=transcript))
+        self.audio = SimpleNamespace(transcriptions=transcriptions)
+
+
+class StubElevenLabs:
+    def __init__(self, audio=b"\xff\xfb" * 2048):
+        self.text_to_speech = SimpleNamespace(convert=lambda **kwargs: iter([audio]))
+
+
+def install_stub_providers(app):
+    """Swap the app's AI clients for offline stubs."""
+    app.openai_client = StubOpenAIClient()
+    app.elevenclient = StubElevenLabs()
+    app.election_service.model = StubChatModel()
+    return app
@@ -4,10 +4,16 @@ from .auth_controller import auth_bp
 from .election_controller import election_bp
 from .vote_controller import vote_bp
 from .admin_controller import admin_bp
+from .ops_controller import ops_bp
+from .api_controller import api_bp
+from .job_controller import jobs_bp
 
 def init_app(app):
     """Initialize all controllers with the app"""
     app.register_blueprint(auth_bp)
     app.register_blueprint(election_bp)
     app.register_blueprint(vote_bp)
-    app.register_blueprint(admin_bp)
\ No newline at end of file
+    app.register_blueprint(admin_bp)
+    app.register_blueprint(ops_bp)
+    app.register_blueprint(api_bp)
+    app.register_blueprint(jobs_bp)
\ No newline at end of file
@@ -1,11 +1,18 @@
+import csv
+import io
+import json
 from datetime import datetime, timezone
-from flask import Blueprint, render_template, request, redirect, url_for, flash, current_app
+from flask import Blueprint, render_template, request, redirect, url_for, flash, current_app, Response, stream_with_context
 from flask_login import login_required, current_user
-from models import Election, Candidate, Vote, UserVote
+from models import Election, Candidate, Vote, UserVote, VoteCounterShard, VoteEvent, Ballot
 from extensions import db
 from sqlalchemy.exc import SQLAlchemyError
 from functools import wraps
 from zoneinfo import ZoneInfo
+from db_routing import mark_recent_write
+from job_queue import enqueue
+from election_service import MAX_COUNTER_SHARDS
+import tally_engine
 admin_bp = Blueprint('admin', __name__)
 
 def admin_required(f):
@@ -35,6 +42,15 @@ def convert_local_to_utc(date_str):
     return utc_dt
 
 
+def parse_counter_shards(value):
+    """Shard count from the form (blank means 0), or None if it isn't a whole number in range."""
+    try:
+        counter_shards = int(value or 0)
+    except ValueError:
+        return None
+    return counter_shards if 0 <= counter_shards <= MAX_COUNTER_SHARDS else None
+
+
 @admin_bp.route("/setup_restaurant_election", methods=["GET", "POST"])
 @login_required
 @admin_required
@@ -45,6 +61,12 @@ def setup_restaurant_election():
         number_of_restaurants = int(request.form.get('number_of_restaurants'))
         max_votes = int(request.form.get('max_votes'))
         election_name = request.form.get('election_name')
+        counter_shards = parse_counter_shards(request.form.get('counter_shards'))
+        ballot_type = request.form.get('ballot_type') or 'single'
+
+        if counter_shards is None:
+            flash(f"Counter shards must be a whole number from 0 to {MAX_COUNTER_SHARDS}.", "error")
+            return redirect(url_for("admin.setup_restaurant_election"))
         
         # Convert datetime inputs to UTC
         start_date = convert_local_to_utc(request.form.get('start_date'))
@@ -55,17 +77,26 @@ def setup_restaurant_election():
             flash("End date must be after start date.", "error")
             return redirect(url_for("admin.setup_restaurant_election"))
 
-        candidates = current_app.election_service.get_restaurant_candidates(
-            number_of_restaurants, city, state)
-        
-        election_id = current_app.election_service.start_election(
-            candidates, 
-            max_votes, 
-            election_type="restaurant", 
-            election_name=election_name,
-            start_date=start_date,
-            end_date=end_date
-        )
+        # GPT-4 can take tens of seconds, so the election is created by a background job
+        job = enqueue('restaurant_election', {
+            'city': city,
+            'state': state,
+            'number_of_restaurants': number_of_restaurants,
+            'max_votes': max_votes,
+            'election_name': election_name,
+            'start_date': start_date.isoformat() if start_date else None,
+            'end_date': end_date.isoformat() if end_date else None,
+            'counter_shards': counter_shards,
+            'ballot_type': ballot_type
+        })
+        if job.status == 'failed':
+            flash(f"Restaurant election '{election_name}' could not be created: {job.error}", "error")
+            return redirect(url_for("admin.setup_restaurant_election"))
+        if job.status != 'succeeded':
+            flash(f"Restaurant election '{election_name}' is being generated and will appear shortly "
+                  f"(status: {url_for('jobs.status', job_id=job.id)}).", "info")
+            return redirect(url_for("election.index"))
+        mark_recent_write()
         
         pacific = ZoneInfo('America/Los_Angeles')
         if start_date:
@@ -85,6 +116,12 @@ def setup_custom_election():
         max_votes = int(request.form.get('max_votes_custom'))
         election_name = request.form.get('election_name')
         candidate_names = request.form.getlist('candidate_names[]')
+        counter_shards = parse_counter_shards(request.form.get('counter_shards'))
+        ballot_type = request.form.get('ballot_type') or 'single'
+
+        if counter_shards is None:
+            flash(f"Counter shards must be a whole number from 0 to {MAX_COUNTER_SHARDS}.", "error")
+            return redirect(url_for("admin.setup_custom_election"))
 
         # Convert datetime inputs to UTC
         start_date = convert_local_to_utc(request.form.get('start_date'))
@@ -101,14 +138,22 @@ def setup_custom_election():
             flash("End date must be after start date.", "error")
             return redirect(url_for("admin.setup_custom_election"))
 
-        election_id = current_app.election_service.start_election(
-            candidates, 
-            max_votes, 
-            election_type="custom", 
-            election_name=election_name,
-            start_date=start_date,
-            end_date=end_date
-        )
+        # Unknown ballot types and ballots with too many candidates are rejected here
+        try:
+            election_id = current_app.election_service.start_election(
+                candidates, 
+                max_votes, 
+                election_type="custom", 
+                election_name=election_name,
+                start_date=start_date,
+                end_date=end_date,
+                counter_shards=counter_shards,
+                ballot_type=ballot_type
+            )
+        except ValueError as e:
+            flash(str(e), "error")
+            return redirect(url_for("admin.setup_custom_election"))
+        mark_recent_write()
 
         pacific = ZoneInfo('America/Los_Angeles')
         if start_date:
@@ -132,15 +177,98 @@ def delete_election(election_id):
         return redirect(url_for("election.index"))
     
     try:
+        VoteCounterShard.query.filter_by(election_id=election_id).delete()
         UserVote.query.filter_by(election_id=election_id).delete()
+        Ballot.query.filter_by(election_id=election_id).delete()
         Vote.query.filter_by(election_id=election_id).delete()
         Candidate.query.filter_by(election_id=election_id).delete()
         db.session.delete(election)
+        # The event log is append-only; the projector drops this election's tallies
+        db.session.add(VoteEvent(event_type='election_deleted', election_id=election_id))
         db.session.commit()
+        mark_recent_write()
+        current_app.turnout_series.forget(election_id)
         
         flash(f"Election '{election.election_name}' deleted successfully.", "success")
     except SQLAlchemyError as e:
         db.session.rollback()
         flash(f"Failed to delete election: {str(e)}", "error")
 
-    return redirect(url_for("election.index"))
\ No newline at end of file
+    return redirect(url_for("election.index"))
+
+EXPORT_MIMETYPES = {"csv": "text/csv", "ndjson": "application/x-ndjson"}
+EXPORT_BATCH_SIZE = 1000
+
+
+def format_rows(fields, batches, fmt):
+    """Yield one CSV or NDJSON chunk per batch of rows, so memory stays flat."""
+    if fmt == "csv":
+        buffer = io.StringIO()
+        writer = csv.writer(buffer)
+        writer.writerow(fields)
+        yield buffer.getvalue()
+    for batch in batches:
+        if fmt == "csv":
+            buffer = io.StringIO()
+            csv.writer(buffer).writerows(batch)
+            yield buffer.getvalue()
+        else:
+            yield "".join(json.dumps(dict(zip(fields, row))) + "\n" for row in batch)
+
+
+def export_response(election, kind, fields, batches, fmt):
+    response = Response(stream_with_context(format_rows(fields, batches, fmt)), mimetype=EXPORT_MIMETYPES[fmt])
+    response.headers["Content-Disposition"] = f"attachment; filename=election-{election.id}-{kind}.{fmt}"
+    return response
+
+
+@admin_bp.route("/export/<int:election_id>/votes.<any(csv, ndjson):fmt>")
+@login_required
+@admin_required
+def export_votes(election_id, fmt):
+    election = current_app.election_service.get_election(election_id)
+    if not election:
+        flash("Election not found.", "error")
+        return redirect(url_for("election.index"))
+
+    if election.ballot_type != 'single':
+        return export_ballots(election, fmt)
+
+    rows = (
+        [(vote_id, candidate_id, name, created_at.isoformat() if created_at else None)
+         for vote_id, candidate_id, name, created_at in batch]
+        for batch in current_app.election_service.iter_vote_batches(election_id, EXPORT_BATCH_SIZE)
+    )
+    return export_response(election, "votes", ["vote_id", "candidate_id", "candidate", "created_at"], rows, fmt)
+
+
+def export_ballots(election, fmt):
+    """Approval sets (in id order) or rankings (first choice first), one row per ballot.
+
+    CSV joins the ids and names with ';'; NDJSON gives them as arrays.
+    """
+    service = current_app.election_service
+    candidates = service.ballot_candidates(election)
+
+    def row(ballot_id, choices, created_at):
+        chosen = [candidates[position] for position in tally_engine.unpack_choices(choices)]
+        ids, names = [c.id for c in chosen], [c.name for c in chosen]
+        if fmt == "csv":
+            ids, names = ";".join(map(str, ids)), ";".join(names)
+        return ballot_id, ids, names, created_at.isoformat() if created_at else None
+
+    rows = ([row(*ballot) for ballot in batch] for batch in service.iter_ballot_batches(election.id, EXPORT_BATCH_SIZE))
+    return export_response(election, "votes", ["ballot_id", "candidate_ids", "candidates", "created_at"], rows, fmt)
+
+
+@admin_bp.route("/export/<int:election_id>/results.<any(csv, ndjson):fmt>")
+@login_required
+@admin_required
+def export_results(election_id, fmt):
+    election = current_app.election_service.get_election(election_id)
+    if not election:
+        flash("Election not found.", "error")
+        return redirect(url_for("election.index"))
+
+    tallies = current_app.election_service.candidate_tallies(election)
+    return export_response(election, "results", ["candidate_id", "candidate", "votes"], [tallies], fmt)
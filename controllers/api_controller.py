@@ -0,0 +1,112 @@
+import hashlib
+from datetime import timezone
+from flask import Blueprint, current_app, jsonify, request
+from db_routing import replica_reads
+from assets import matching_etag
+
+api_bp = Blueprint('api', __name__, url_prefix='/api')
+
+
+def iso_or_none(dt):
+    return dt.isoformat() if dt else None
+
+
+def election_summary(election):
+    return {
+        "id": election.id,
+        "name": election.election_name,
+        "type": election.election_type,
+        "status": election.status,
+        "start_date": iso_or_none(election.start_date),
+        "end_date": iso_or_none(election.end_date),
+    }
+
+
+def cacheable(response):
+    """Let pollers and a fronting CDN reuse the payload briefly, then revalidate by ETag."""
+    response.cache_control.public = True
+    response.cache_control.max_age = current_app.config['API_CACHE_MAX_AGE']
+    response.cache_control.must_revalidate = True
+    return response
+
+
+def not_modified(etag):
+    response = current_app.response_class(status=304)
+    response.set_etag(etag)
+    response.vary.add('Accept-Encoding')
+    return cacheable(response)
+
+
+def conditional_json(payload):
+    """JSON response with a strong ETag over its body; 304 when the client already has it,
+    plain or gzipped."""
+    response = jsonify(payload)
+    response.add_etag()
+    known = matching_etag(response.get_etag()[0])
+    if known:
+        return not_modified(known)
+    return cacheable(response)
+
+
+@api_bp.route('/elections')
+@replica_reads()
+def list_elections():
+    elections = current_app.election_service.list_ongoing_elections()
+    return conditional_json({"elections": [election_summary(e) for e in elections]})
+
+
+@api_bp.route('/elections/<int:election_id>')
+@replica_reads()
+def get_election(election_id):
+    election = current_app.election_service.get_election(election_id)
+    if not election:
+        return jsonify({"error": "Election not found."}), 404
+
+    payload = election_summary(election)
+    payload["candidates"] = [{"id": c.id, "name": c.name} for c in election.candidates]
+    return conditional_json(payload)
+
+
+@api_bp.route('/elections/<int:election_id>/results')
+@replica_reads()
+def get_results(election_id):
+    election = current_app.election_service.get_election(election_id)
+    if not election:
+        return jsonify({"error": "Election not found."}), 404
+
+    # The ETag comes from the results version, so unchanged polls skip the tally entirely
+    version = current_app.election_service.results_version(election)
+    etag = hashlib.sha1(f"results:{election.id}:{version}".encode()).hexdigest()
+    known = matching_etag(etag)
+    if known:
+        return not_modified(known)
+
+    results = current_app.election_service.calculate_results(election)
+    response = jsonify({
+        "election_id": election.id,
+        "name": election.election_name,
+        "status": election.status,
+        "results": [{"candidate": name, "percentage": percentage} for name, percentage in results.items()],
+    })
+    response.set_etag(etag)
+    return cacheable(response)
+
+
+@api_bp.route('/elections/<int:election_id>/turnout')
+def get_turnout(election_id):
+    election = current_app.election_service.get_election(election_id)
+    if not election:
+        return jsonify({"error": "Election not found."}), 404
+
+    granularity = request.args.get('granularity', 'hour')
+    try:
+        series = current_app.turnout_series.series(election_id, granularity)
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+
+    return conditional_json({
+        "election_id": election.id,
+        "granularity": granularity,
+        "buckets": [{"start": start.replace(tzinfo=timezone.utc).isoformat(), "count": count}
+                    for start, count in series],
+    })
@@ -2,6 +2,7 @@ from flask import Blueprint, render_template, request, redirect, url_for, flash
 from flask_login import login_user, login_required, logout_user
 from models import User
 from extensions import db
+from db_routing import mark_recent_write
 
 auth_bp = Blueprint('auth', __name__)
 
@@ -20,6 +21,7 @@ def register():
         new_user.set_password(password)
         db.session.add(new_user)
         db.session.commit()
+        mark_recent_write()
 
         flash('Registration successful! Please log in.', 'success')
         return redirect(url_for('auth.login'))
@@ -36,6 +38,7 @@ def login():
 
         if user and user.check_password(password):
             login_user(user)
+            mark_recent_write()  # A freshly registered user may not be on the replica yet
             flash('Logged in successfully.', 'success')
             return redirect(url_for('election.index'))
         else:
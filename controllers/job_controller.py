@@ -0,0 +1,34 @@
+from flask import Blueprint, jsonify, Response
+from flask_login import current_user
+from extensions import db
+from models import Job
+from job_queue import job_status
+
+jobs_bp = Blueprint('jobs', __name__, url_prefix='/jobs')
+
+def visible_job(job_id):
+    """The job, unless it belongs to a different user; job ids are unguessable otherwise."""
+    job = db.session.get(Job, job_id)
+    if job is None or job.user_id is None:
+        return job
+    if current_user.is_authenticated and (current_user.id == job.user_id or current_user.role == 'admin'):
+        return job
+    return None
+
+@jobs_bp.route('/<job_id>')
+def status(job_id):
+    job = visible_job(job_id)
+    if job is None:
+        return jsonify({"error": "Job not found."}), 404
+    response = jsonify(job_status(job))
+    response.headers['Cache-Control'] = 'no-store'
+    return response
+
+@jobs_bp.route('/<job_id>/result')
+def result(job_id):
+    job = visible_job(job_id)
+    if job is None:
+        return jsonify({"error": "Job not found."}), 404
+    if job.status != 'succeeded':
+        return jsonify({"error": f"Job is {job.status}."}), 409
+    return Response(job.result, mimetype=job.result_type)
@@ -0,0 +1,39 @@
+from flask import Blueprint, Response, current_app, jsonify
+from extensions import db
+from db_pool import pool_status
+from db_routing import REPLICA_BIND
+import metrics
+
+ops_bp = Blueprint('ops', __name__)
+
+@ops_bp.route('/healthz')
+def healthz():
+    """Liveness: the worker process is up and serving requests."""
+    return jsonify({"status": "ok"}), 200
+
+@ops_bp.route('/readyz')
+def readyz():
+    """Readiness: the database answered the background check (every few seconds), so traffic can be routed here."""
+    readiness = current_app.db_readiness
+    if not readiness.check():
+        if readiness.reached:
+            # The error is logged by the check; it can name hosts and drivers, so it isn't returned
+            return jsonify({"status": "unavailable"}), 503
+        return jsonify({"status": "starting", "attempts": readiness.attempts}), 503
+
+    return jsonify({"status": "ready"}), 200
+
+@ops_bp.route('/poolz')
+def poolz():
+    """Connection pool occupancy and checkout wait times for this worker process, replica nested under "replica"."""
+    status = pool_status(db.engine)
+    replica = db.engines.get(REPLICA_BIND)
+    if replica is not None:
+        status["replica"] = pool_status(replica)
+    return jsonify(status), 200
+
+@ops_bp.route('/metrics')
+def prometheus_metrics():
+    """Request and pool metrics in Prometheus text format, summed across workers."""
+    payload, content_type = metrics.render_latest()
+    return Response(payload, mimetype=content_type)
@@ -2,18 +2,26 @@ from flask import Blueprint, render_template, request, redirect, url_for, flash,
 from flask_login import login_required, current_user
 from models import Election, Vote, UserVote, Candidate
 from extensions import db
-import difflib
-from io import BytesIO
 from flask import current_app
 from datetime import datetime, timezone
 from zoneinfo import ZoneInfo
+from db_routing import replica_reads, mark_recent_write
+from idempotency import idempotent
+from rate_limit import rate_limited
+from resilience import DependencyUnavailable
+from uploads import wav_duration
+from audio_preprocess import RecordingTooLong, preprocess
+from election_service import AlreadyVotedError
+from werkzeug.exceptions import RequestEntityTooLarge
 
 vote_bp = Blueprint('vote', __name__)
 
 @vote_bp.route('/vote/<int:election_id>', methods=['GET', 'POST'])
 @login_required
+@idempotent
+@replica_reads()
 def vote(election_id):
-    election = Election.query.get(election_id)
+    election = current_app.election_cache.get(election_id)
     
     if not election:
         flash("Election not found.", "error")
@@ -44,20 +52,44 @@ def vote(election_id):
             flash("This election is not active.", "error")
             return redirect(url_for("election.index"))
 
-    existing_vote = UserVote.query.filter_by(user_id=current_user.id, election_id=election_id).first()
-    if existing_vote:
-        flash('You have already voted in this election.', 'error')
-        return redirect(url_for('election.results', election_id=election_id))
+    # Submissions go straight to the insert, whose unique constraint catches a repeat
+    # vote; only the form view looks for one first
+    if request.method == "GET" and UserVote.query.filter_by(user_id=current_user.id, election_id=election_id).first():
+        return already_voted(election_id)
+
+    if request.method == "POST" and election.ballot_type != 'single':
+        try:
+            if election.ballot_type == 'approval':
+                choices = request.form.getlist('candidates')
+            else:
+                # rank_<candidate id> = 1, 2, ...; unranked candidates are left blank
+                ranks = {key[len('rank_'):]: int(value) for key, value in request.form.items()
+                         if key.startswith('rank_') and value}
+                if len(set(ranks.values())) != len(ranks):
+                    raise ValueError("each rank can only be used once")
+                choices = sorted(ranks, key=ranks.get)
+            current_app.election_service.record_ballot(current_user.id, election, choices)
+        except AlreadyVotedError:
+            return already_voted(election_id)
+        except ValueError as e:
+            flash(f"Invalid ballot: {e}.", "error")
+            return render_template("vote.html", election=election)
+        mark_recent_write()
+
+        flash("Your ballot has been recorded.", "success")
+        return redirect(url_for('election.index'))
 
     if request.method == "POST":
         candidate_id = request.form.get('candidate')
         if candidate_id:
-            vote = Vote(candidate_id=candidate_id, election_id=election_id)
-            db.session.add(vote)
-
-            user_vote = UserVote(user_id=current_user.id, election_id=election_id)
-            db.session.add(user_vote)
-            db.session.commit()
+            try:
+                current_app.election_service.record_vote(current_user.id, election, candidate_id)
+            except AlreadyVotedError:
+                return already_voted(election_id)
+            except ValueError as e:
+                flash(f"Invalid vote: {e}.", "error")
+                return render_template("vote.html", election=election)
+            mark_recent_write()
 
             flash("Your vote has been recorded.", "success")
             return redirect(url_for('election.index'))
@@ -66,19 +98,45 @@ def vote(election_id):
     
     return render_template("vote.html", election=election)
 
+def already_voted(election_id):
+    flash('You have already voted in this election.', 'error')
+    return redirect(url_for('election.results', election_id=election_id))
+
 @vote_bp.route("/process_audio", methods=["POST"])
+@login_required
+@rate_limited('ai')
 def process_audio():
+    # Checked against Content-Length before any of the body is read; chunked
+    # uploads are cut off once they pass the limit
+    request.max_content_length = current_app.config['AUDIO_MAX_BYTES']
     try:
         audio_file = request.files.get('audio')
-        if not audio_file:
-            return jsonify({"error": "No audio file provided."}), 400
+    except RequestEntityTooLarge:
+        return jsonify({"error": f"Audio uploads are limited to {current_app.config['AUDIO_MAX_BYTES']} bytes."}), 413
+    if not audio_file:
+        return jsonify({"error": "No audio file provided."}), 400
+
+    duration = wav_duration(audio_file.stream)
+    if duration is not None and duration > current_app.config['AUDIO_MAX_SECONDS']:
+        return jsonify({"error": f"Recordings are limited to {current_app.config['AUDIO_MAX_SECONDS']:g} seconds."}), 413
 
-        audio_data = BytesIO(audio_file.read())
-        audio_data.name = "voice_vote.wav"
+    # 16 kHz mono with the silence trimmed, labelled by its real container
+    try:
+        audio = preprocess(audio_file.stream, current_app.config['UPLOAD_SPOOL_BYTES'],
+                           current_app.config['AUDIO_MAX_SECONDS'])
+    except RecordingTooLong:
+        return jsonify({"error": f"Recordings are limited to {current_app.config['AUDIO_MAX_SECONDS']:g} seconds."}), 413
+    if audio.duration == 0:
+        return jsonify({"error": "No speech detected."}), 422
+    if audio.duration is not None and audio.duration > current_app.config['AUDIO_MAX_SECONDS']:
+        return jsonify({"error": f"Recordings are limited to {current_app.config['AUDIO_MAX_SECONDS']:g} seconds."}), 413
 
+    try:
+        # The spooled file goes to the client as-is; httpx streams it into the request body
         transcription = current_app.openai_client.audio.transcriptions.create(
             model="whisper-1",
-            file=audio_data
+            file=(audio.filename or audio_file.filename or "voice_vote.wav", audio.stream,
+                  audio.content_type or audio_file.mimetype)
         )
 
         if hasattr(transcription, 'text'):
@@ -86,49 +144,41 @@ def process_audio():
         else:
             return jsonify({"error": "No transcription text found."}), 500
 
+    except DependencyUnavailable as e:
+        return jsonify({"error": str(e)}), 503, {"Retry-After": str(e.retry_after)}
+
     except Exception as e:
         return jsonify({"error": f"Transcription failed: {str(e)}"}), 500
 
 @vote_bp.route("/voice_vote", methods=["POST"])
 @login_required
+@idempotent
 def voice_vote():
     data = request.get_json()
     transcript = data.get("transcript", "").lower()
     election_id = data.get("election_id")
 
-    election = Election.query.get(election_id)
+    election = current_app.election_cache.get(election_id)
     if not election:
         return jsonify({"message": "Invalid election ID."}), 400
     
     if election.status != 'ongoing':
         return jsonify({"message": "No active election."}), 400
 
-    existing_vote = UserVote.query.filter_by(user_id=current_user.id, election_id=election_id).first()
-    if existing_vote:
-        return jsonify({"message": "You have already voted in this election."}), 400
-
-    candidates = election.candidates
-    candidate_names = [c.name.lower() for c in candidates]
-    candidate_match = difflib.get_close_matches(transcript, candidate_names, n=1, cutoff=0.7)
-    
-    if candidate_match:
-        matched_name = candidate_match[0]
-        candidate = next((c for c in candidates if c.name.lower() == matched_name), None)
-        
-        if candidate:
-            vote = Vote(candidate_id=candidate.id, election_id=election_id)
-            db.session.add(vote)
-
-            user_vote = UserVote(user_id=current_user.id, election_id=election_id)
-            db.session.add(user_vote)
-            
-            try:
-                db.session.commit()
-                return jsonify({"message": f"Thank you! Your vote for {candidate.name} has been submitted."}), 200
-            except Exception as e:
-                db.session.rollback()
-                return jsonify({"message": "An error occurred while recording your vote."}), 500
-        else:
-            return jsonify({"message": "Candidate not found."}), 400
+    if election.ballot_type != 'single':
+        return jsonify({"message": "Voice voting is only available for single-choice elections."}), 400
+
+    candidate = current_app.election_service.match_candidate(transcript, election.candidates)
+
+    if candidate:
+        try:
+            current_app.election_service.record_vote(current_user.id, election, candidate.id)
+            mark_recent_write()
+            return jsonify({"message": f"Thank you! Your vote for {candidate.name} has been submitted."}), 200
+        except AlreadyVotedError as e:
+            return jsonify({"message": str(e)}), 400
+        except Exception as e:
+            db.session.rollback()
+            return jsonify({"message": "An error occurred while recording your vote."}), 500
     else:
         return jsonify({"message": "Candidate not recognized."}), 400
\ No newline at end of file
@@ -0,0 +1,115 @@
+import os
+import threading
+import time
+from sqlalchemy import exc
+from sqlalchemy.pool import QueuePool
+import metrics
+
+
+class PoolStats:
+    def __init__(self):
+        """Running totals of how long callers waited to check out a connection."""
+        self._lock = threading.Lock()
+        self.checkouts = 0
+        self.timeouts = 0
+        self.wait_seconds_total = 0.0
+        self.wait_seconds_max = 0.0
+
+    def record_wait(self, seconds, timed_out=False):
+        with self._lock:
+            if timed_out:
+                self.timeouts += 1
+            else:
+                self.checkouts += 1
+            self.wait_seconds_total += seconds
+            self.wait_seconds_max = max(self.wait_seconds_max, seconds)
+
+    def snapshot(self):
+        with self._lock:
+            return {
+                "checkouts": self.checkouts,
+                "checkout_timeouts": self.timeouts,
+                "checkout_wait_seconds_total": round(self.wait_seconds_total, 6),
+                "checkout_wait_seconds_max": round(self.wait_seconds_max, 6),
+            }
+
+
+class InstrumentedQueuePool(QueuePool):
+    # Value of the "pool" label on the occupancy gauges; set per bind by label_pools
+    label = "primary"
+
+    def __init__(self, *args, **kwargs):
+        """QueuePool that records the time spent waiting for a free connection."""
+        super().__init__(*args, **kwargs)
+        self.stats = PoolStats()
+
+    def recreate(self):
+        pool = super().recreate()
+        pool.label = self.label
+        return pool
+
+    def _do_get(self):
+        start = time.perf_counter()
+        try:
+            connection = super()._do_get()
+        except exc.TimeoutError:
+            waited = time.perf_counter() - start
+            self.stats.record_wait(waited, timed_out=True)
+            metrics.DB_POOL_CHECKOUT_WAIT.observe(waited)
+            metrics.DB_POOL_CHECKOUT_TIMEOUTS.inc()
+            raise
+        waited = time.perf_counter() - start
+        self.stats.record_wait(waited)
+        metrics.DB_POOL_CHECKOUT_WAIT.observe(waited)
+        self._publish_occupancy()
+        return connection
+
+    def _do_return_conn(self, record):
+        super()._do_return_conn(record)
+        self._publish_occupancy()
+
+    def _publish_occupancy(self):
+        metrics.DB_POOL_CHECKED_OUT.labels(self.label).set(self.checkedout())
+        metrics.DB_POOL_OVERFLOW.labels(self.label).set(max(self.overflow(), 0))
+
+
+def pool_options_from_env():
+    """Engine options for the production connection pool, overridable per deployment."""
+    return {
+        "poolclass": InstrumentedQueuePool,
+        # Per worker process: gunicorn runs 4 workers, so the database sees
+        # up to 4 * (DB_POOL_SIZE + DB_MAX_OVERFLOW) connections
+        "pool_size": int(os.getenv("DB_POOL_SIZE", 5)),
+        "max_overflow": int(os.getenv("DB_MAX_OVERFLOW", 5)),
+        "pool_timeout": float(os.getenv("DB_POOL_TIMEOUT", 10)),
+        # Azure SQL closes connections idle for 30 minutes; recycle well before that
+        "pool_recycle": int(os.getenv("DB_POOL_RECYCLE", 1200)),
+        "pool_pre_ping": os.getenv("DB_POOL_PRE_PING", "true").lower() == "true",
+    }
+
+
+def label_pools(engines):
+    """Name each instrumented pool after its Flask-SQLAlchemy bind, so primary and replica gauges stay apart."""
+    for bind, engine in engines.items():
+        if isinstance(engine.pool, InstrumentedQueuePool):
+            engine.pool.label = bind or "primary"
+
+
+def pool_status(engine):
+    """Current occupancy of the engine's pool plus checkout wait totals when instrumented."""
+    pool = engine.pool
+    status = {"pool_class": type(pool).__name__}
+
+    if isinstance(pool, QueuePool):
+        status.update({
+            "size": pool.size(),
+            "checked_out": pool.checkedout(),
+            "idle": pool.checkedin(),
+            # QueuePool.overflow() counts up from -pool_size
+            "overflow": max(pool.overflow(), 0),
+        })
+
+    if isinstance(pool, InstrumentedQueuePool):
+        status.update(pool.stats.snapshot())
+
+    return status
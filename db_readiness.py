@@ -0,0 +1,92 @@
+import logging
+import random
+import threading
+import time
+from sqlalchemy import text
+from sqlalchemy.exc import SQLAlchemyError
+
+
+class DatabaseReadiness:
+    def __init__(self, app, db, base_delay=1.0, max_delay=30.0, recheck_seconds=5.0, stale_after=None,
+                 clock=time.monotonic):
+        """Track whether the database is reachable with a background thread: first with
+        backoff until it connects, then rechecking every recheck_seconds."""
+        self.app = app
+        self.db = db
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.recheck_seconds = recheck_seconds
+        # A success older than this means the recheck itself is stuck
+        self.stale_after = stale_after if stale_after is not None else 3 * recheck_seconds
+        self.clock = clock
+        self.attempts = 0
+        self.last_error = None
+        self.reached = False
+        self._checked_at = None
+        self._ready = threading.Event()
+        self._stopped = threading.Event()
+
+    @property
+    def is_ready(self):
+        return self._ready.is_set()
+
+    def wait(self, timeout=None):
+        """Block until the database is reachable or the timeout expires."""
+        return self._ready.wait(timeout)
+
+    def stop(self):
+        self._stopped.set()
+
+    def check(self):
+        """Whether the background thread last found the database reachable, recently enough.
+
+        Never queries the database itself, so /readyz answers at once even
+        while the database hangs.
+        """
+        if not self.is_ready:
+            return False
+        return self.clock() - self._checked_at <= self.stale_after
+
+    # Single connectivity check, safe to call from any thread
+    def probe(self):
+        self.attempts += 1
+        try:
+            with self.app.app_context():
+                with self.db.engine.connect() as connection:
+                    connection.execute(text("SELECT 1"))
+        except SQLAlchemyError as e:
+            self.last_error = str(e)
+            self._ready.clear()
+            return False
+
+        self.last_error = None
+        self.reached = True
+        self._checked_at = self.clock()
+        self._ready.set()
+        return True
+
+    # Exponential backoff with full jitter so workers don't retry in lockstep
+    def next_delay(self, attempt):
+        return random.uniform(0, min(self.max_delay, self.base_delay * (2 ** attempt)))
+
+    def start(self):
+        """Probe the database in a daemon thread so worker boot never blocks on it."""
+        thread = threading.Thread(target=self._run, name="db-readiness-probe", daemon=True)
+        thread.start()
+        return thread
+
+    def _run(self):
+        attempt = 0
+        while not self._stopped.is_set():
+            if self.probe():
+                print("Database connection successful")
+                break
+
+            delay = self.next_delay(attempt)
+            print(f"Database connection attempt {attempt + 1} failed. Retrying in {delay:.1f} seconds...")
+            self._stopped.wait(delay)
+            attempt += 1
+
+        while not self._stopped.wait(self.recheck_seconds):
+            if not self.probe():
+                logging.warning(f"Database readiness check failed: {self.last_error}")
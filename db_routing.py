@@ -0,0 +1,83 @@
+import os
+import time
+from contextlib import contextmanager
+from functools import wraps
+import sqlalchemy as sa
+from flask import has_request_context, request, session as flask_session
+from flask_sqlalchemy.session import Session
+
+REPLICA_BIND = 'replica'
+
+
+class RoutingSession(Session):
+    """Session that sends reads to the replica bind inside read_replica() blocks.
+
+    Flushes and INSERT/UPDATE/DELETE statements always go to the primary.
+    """
+
+    def get_bind(self, mapper=None, clause=None, bind=None, **kwargs):
+        if (
+            bind is None
+            and self.info.get('use_replica')
+            and not self._flushing
+            and not isinstance(clause, sa.UpdateBase)
+        ):
+            replica = self._db.engines.get(REPLICA_BIND)
+            if replica is not None:
+                return replica
+        return super().get_bind(mapper=mapper, clause=clause, bind=bind, **kwargs)
+
+
+def read_your_writes_seconds():
+    return float(os.getenv("READ_YOUR_WRITES_SECONDS", 10))
+
+
+def mark_recent_write():
+    """Pin this user's reads to the primary long enough for the replica to catch up."""
+    if has_request_context():
+        flask_session['read_primary_until'] = time.time() + read_your_writes_seconds()
+
+
+def replica_allowed():
+    if has_request_context() and flask_session.get('read_primary_until', 0) > time.time():
+        return False
+    return True
+
+
+@contextmanager
+def read_replica():
+    """Route queries in this block to the read replica, when one is configured."""
+    from extensions import db
+
+    previous = db.session.info.get('use_replica', False)
+    db.session.info['use_replica'] = replica_allowed()
+    try:
+        yield
+    finally:
+        db.session.info['use_replica'] = previous
+
+
+@contextmanager
+def read_primary():
+    """Route queries in this block to the primary, even inside read_replica()."""
+    from extensions import db
+
+    previous = db.session.info.get('use_replica', False)
+    db.session.info['use_replica'] = False
+    try:
+        yield
+    finally:
+        db.session.info['use_replica'] = previous
+
+
+def replica_reads(methods=('GET',)):
+    """View decorator: serve the listed HTTP methods from the read replica."""
+    def decorator(f):
+        @wraps(f)
+        def decorated_function(*args, **kwargs):
+            if request.method not in methods:
+                return f(*args, **kwargs)
+            with read_replica():
+                return f(*args, **kwargs)
+        return decorated_function
+    return decorator
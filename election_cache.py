@@ -0,0 +1,110 @@
+import itertools
+import threading
+import time
+from sqlalchemy import event, select, update
+from sqlalchemy.orm import Session
+from models import CacheVersion, Candidate, Election
+from read_models import load_election_meta
+from db_routing import read_primary
+
+VERSION_NAME = 'elections'
+# How often each process asks the database whether another process changed an election
+CHECK_SECONDS = 1.0
+
+# Bumped after commit whenever this process changed an election, so its own cache
+# doesn't wait out CHECK_SECONDS; other processes notice the version row instead
+_local_generation = itertools.count()
+_generation = next(_local_generation)
+
+
+def changes_metadata(session):
+    if any(isinstance(obj, (Election, Candidate)) for obj in session.new | session.deleted):
+        return True
+    return any(isinstance(obj, (Election, Candidate)) and session.is_modified(obj, include_collections=False)
+               for obj in session.dirty)
+
+
+def bump_version(session):
+    updated = session.execute(
+        update(CacheVersion).where(CacheVersion.name == VERSION_NAME).values(version=CacheVersion.version + 1)
+    )
+    if updated.rowcount == 0:
+        session.add(CacheVersion(name=VERSION_NAME, version=1))
+
+
+@event.listens_for(Session, 'before_flush')
+def _stamp_election_changes(session, flush_context, instances):
+    if not session.info.get('election_metadata_changed') and changes_metadata(session):
+        bump_version(session)
+        session.info['election_metadata_changed'] = True
+
+
+@event.listens_for(Session, 'after_commit')
+def _forget_local_elections(session):
+    global _generation
+    if session.info.pop('election_metadata_changed', False):
+        _generation = next(_local_generation)
+
+
+@event.listens_for(Session, 'after_rollback')
+def _discard_version_bump(session):
+    session.info.pop('election_metadata_changed', None)
+
+
+class ElectionCache:
+    """Process-wide cache of ElectionMeta by election id.
+
+    Every lookup costs a dict hit; at most once per check_seconds it also reads
+    the 'elections' row of cache_versions from the primary and drops everything
+    if another process has bumped it.
+    """
+
+    def __init__(self, db, check_seconds=CHECK_SECONDS, clock=time.monotonic):
+        self.db = db
+        self.check_seconds = check_seconds
+        self.clock = clock
+        self._elections = {}
+        self._version = None
+        self._generation = None
+        self._checked_at = None
+        self._lock = threading.Lock()
+
+    def get(self, election_id):
+        """ElectionMeta for the election, or None if it doesn't exist."""
+        try:
+            election_id = int(election_id)
+        except (TypeError, ValueError):
+            return None
+        # Always the primary: a lagging replica could hide a change, or cache a
+        # stale copy under the new version
+        with read_primary():
+            self._check_version()
+            meta = self._elections.get(election_id)
+            if meta is None:
+                meta = self._load(election_id)
+                if meta is not None:
+                    with self._lock:
+                        self._elections[election_id] = meta
+        return meta
+
+    def clear(self):
+        with self._lock:
+            self._elections = {}
+            self._checked_at = None
+
+    def _check_version(self):
+        now = self.clock()
+        if (self._generation == _generation and self._checked_at is not None
+                and now - self._checked_at < self.check_seconds):
+            return
+        generation = _generation
+        version = self.db.session.execute(
+            select(CacheVersion.version).where(CacheVersion.name == VERSION_NAME)
+        ).scalar() or 0
+        with self._lock:
+            if version != self._version or generation != self._generation:
+                self._elections = {}
+            self._version, self._generation, self._checked_at = version, generation, now
+
+    def _load(self, election_id):
+        return load_election_meta(self.db.session, election_id)
@@ -1,22 +1,85 @@
-from models import Election, Candidate
+import difflib
+import os
+import random
+from concurrent.futures import ThreadPoolExecutor
+from io import BytesIO
+from elevenlabs import VoiceSettings
+from sqlalchemy import func, select, update
+from sqlalchemy.exc import IntegrityError
+from models import Election, Candidate, Vote, UserVote, VoteCounterShard, VoteEvent, Ballot
+import tally_engine
+from db_routing import read_replica
+
+# GPT-4 introductions requested at once per audio generation; each holds an AI bulkhead slot
+INTRO_CONCURRENCY = 4
+# Upper bound on Election.counter_shards; the admin forms offer 0..64
+MAX_COUNTER_SHARDS = 64
+
+
+class AudioGenerationError(Exception):
+    pass
+
+
+class AlreadyVotedError(Exception):
+    pass
+
+
 class ElectionService:
-    def __init__(self, model, db):
+    def __init__(self, model, db, shard_strategy='random'):
         """Initialize the ElectionService with GPT-4 model and database session."""
         self.model = model
         self.db = db
+        self.shard_strategy = shard_strategy
+
+    # Read APIs, served from the read replica when one is configured
+    def get_election(self, election_id):
+        with read_replica():
+            return self.db.session.get(Election, election_id)
+
+    def list_ongoing_elections(self):
+        with read_replica():
+            return Election.query.filter_by(status='ongoing').all()
 
     # Helper function for generating GPT-4 introductions
     def generate_gpt4_text_introduction(self, election):
-        introductions = []
-        for index, candidate in enumerate(election.candidates, start=1):
-            gpt_text = self.model.invoke(f"""In a quirky and enthusiastic tone, welcome {candidate.name} to a show in a few words. 
+        """One GPT-4 introduction per candidate, in candidate order; up to INTRO_CONCURRENCY requested at once."""
+        # Prompts are built here: the pool threads must not touch ORM objects
+        prompts = [self.introduction_prompt(index, candidate)
+                   for index, candidate in enumerate(election.candidates, start=1)]
+        if not prompts:
+            return []
+        with ThreadPoolExecutor(max_workers=min(INTRO_CONCURRENCY, len(prompts))) as pool:
+            return [reply.content for reply in pool.map(self.model.invoke, prompts)]
+
+    def introduction_prompt(self, index, candidate):
+        return f"""In a quirky and enthusiastic tone, welcome {candidate.name} to a show in a few words. 
                                             Example:
                                             Introducing first, the animated and lively Tony Hawk!
                                             Introducing second, the wonderful and endearing Mariah Carey!
                                             Introduce them as follows:
-                                            Introducing {self.ordinal(index)}, the animated and lively Tony Hawk!""")
-            introductions.append(gpt_text.content)
-        return introductions
+                                            Introducing {self.ordinal(index)}, the animated and lively Tony Hawk!"""
+
+    def generate_introduction_audio(self, election, tts):
+        """MP3 of GPT-4 introductions for every candidate, read by ElevenLabs."""
+        full_intro_string = " ".join(self.generate_gpt4_text_introduction(election))
+        if not full_intro_string:
+            raise AudioGenerationError("Text generation failed.")
+
+        response = tts.text_to_speech.convert(
+            voice_id="MF3mGyEYCl7XYWbV9V6O",
+            output_format="mp3_22050_32",
+            text=full_intro_string,
+            model_id="eleven_turbo_v2",
+            voice_settings=VoiceSettings(stability=0.0, similarity_boost=1.0, style=0.0, use_speaker_boost=True),
+        )
+
+        audio_data = BytesIO()
+        for chunk in response:
+            if chunk:
+                audio_data.write(chunk)
+        if audio_data.getbuffer().nbytes == 0:
+            raise AudioGenerationError("Audio data is empty.")
+        return audio_data.getvalue()
 
     # Helper function that returns ordinal of a number
     def ordinal(self, n):
@@ -35,22 +98,253 @@ class ElectionService:
         response = self.model.invoke(prompt)
         return response.content.strip().split("\n")[:number_of_restaurants]
 
-    # Start a new election
-    def start_election(self, candidates, max_votes, election_type, election_name, start_date=None, end_date=None):
+    # Raises ValueError for settings start_election would refuse, so callers can check before slow work
+    def check_election_settings(self, candidate_count, counter_shards=0, ballot_type='single'):
+        if ballot_type not in tally_engine.BALLOT_TYPES:
+            raise ValueError(f"Unknown ballot type: {ballot_type}")
+        if not 0 <= counter_shards <= MAX_COUNTER_SHARDS:
+            raise ValueError(f"Counter shards must be between 0 and {MAX_COUNTER_SHARDS}")
+        if ballot_type != 'single' and candidate_count > tally_engine.MAX_CANDIDATES:
+            raise ValueError(f"{ballot_type} ballots support at most {tally_engine.MAX_CANDIDATES} candidates")
+
+    # Start a new election. The election, its candidates and counter shards are written in one transaction;
+    # with commit=False it is left open so the caller can add to it
+    def start_election(self, candidates, max_votes, election_type, election_name, start_date=None, end_date=None,
+                       counter_shards=0, ballot_type='single', commit=True):
+        self.check_election_settings(len(candidates), counter_shards, ballot_type)
+
         election = Election(
             election_name=election_name,
             election_type=election_type,
             max_votes=max_votes,
             start_date=start_date,
-            end_date=end_date
+            end_date=end_date,
+            counter_shards=counter_shards,
+            ballot_type=ballot_type
         )
         
         self.db.session.add(election)
-        self.db.session.commit()
+        self.db.session.flush()
 
+        candidate_rows = []
         for candidate_name in candidates:
             candidate = Candidate(name=candidate_name.strip(), election_id=election.id)
             self.db.session.add(candidate)
-        self.db.session.commit()
+            candidate_rows.append(candidate)
+        self.db.session.flush()
+
+        for candidate in candidate_rows:
+            for shard in range(counter_shards):
+                self.db.session.add(VoteCounterShard(election_id=election.id, candidate_id=candidate.id, shard=shard))
+        if commit:
+            self.db.session.commit()
+        else:
+            self.db.session.flush()
 
         return election.id
+
+    # Shard that receives this vote: random spreads load evenly, while "worker"
+    # keeps each gunicorn process on its own row
+    def pick_shard(self, shard_count):
+        if self.shard_strategy == 'worker':
+            return os.getpid() % shard_count
+        return random.randrange(shard_count)
+
+    # Insert the user's participation row before anything else, so a repeat vote fails
+    # on unique_user_election rather than being looked for with a SELECT first
+    def claim_vote(self, user_id, election):
+        self.db.session.add(UserVote(user_id=user_id, election_id=election.id))
+        try:
+            self.db.session.flush()
+        except IntegrityError:
+            self.db.session.rollback()
+            # Constraint names don't survive every driver's error text, so ask the primary
+            # whether it was unique_user_election; any other violation is a real error
+            existing = self.db.session.scalar(
+                select(UserVote.id).where(UserVote.user_id == user_id, UserVote.election_id == election.id)
+            )
+            if existing is None:
+                raise
+            raise AlreadyVotedError("You have already voted in this election.")
+
+    # Record a vote, the user's participation and the vote event in a single transaction;
+    # raises AlreadyVotedError if the user has voted in this election before, and
+    # ValueError for a candidate outside the election
+    def record_vote(self, user_id, election, candidate_id):
+        try:
+            candidate_id = int(candidate_id)
+        except (TypeError, ValueError):
+            raise ValueError("vote names a candidate outside this election")
+        if candidate_id not in {candidate.id for candidate in election.candidates}:
+            raise ValueError("vote names a candidate outside this election")
+
+        self.claim_vote(user_id, election)
+        self.db.session.add(Vote(candidate_id=candidate_id, election_id=election.id))
+        self.db.session.add(VoteEvent(event_type='vote_cast', election_id=election.id, candidate_id=candidate_id))
+
+        if election.counter_shards:
+            shard = self.pick_shard(election.counter_shards)
+            updated = self.db.session.execute(
+                update(VoteCounterShard)
+                .where(
+                    VoteCounterShard.election_id == election.id,
+                    VoteCounterShard.candidate_id == candidate_id,
+                    VoteCounterShard.shard == shard
+                )
+                .values(count=VoteCounterShard.count + 1)
+            ).rowcount
+            if updated != 1:
+                # The vote would be in votes but missing from the sharded totals
+                self.db.session.rollback()
+                raise RuntimeError(f"Counter shard {shard} of candidate {candidate_id} is missing")
+
+        self.db.session.commit()
+
+    # Candidates in ballot position order; packed ballots store indexes into this list
+    def ballot_candidates(self, election):
+        return sorted(election.candidates, key=lambda candidate: candidate.id)
+
+    # Record an approval set or a ranking (most preferred first) and the user's participation;
+    # raises AlreadyVotedError like record_vote
+    def record_ballot(self, user_id, election, candidate_ids):
+        positions = {candidate.id: i for i, candidate in enumerate(self.ballot_candidates(election))}
+        try:
+            choices = [positions[int(candidate_id)] for candidate_id in candidate_ids]
+        except (KeyError, ValueError):
+            raise ValueError("ballot names a candidate outside this election")
+        if not choices or len(set(choices)) != len(choices):
+            raise ValueError("choose at least one candidate, each only once")
+        if election.ballot_type == 'approval':
+            choices.sort()
+
+        self.claim_vote(user_id, election)
+        packed = tally_engine.pack_choices(choices)
+        self.db.session.add(Ballot(election_id=election.id, choices=packed))
+        self.db.session.add(VoteEvent(event_type='ballot_cast', election_id=election.id, choices=packed))
+        self.db.session.commit()
+
+    def load_ballots(self, election_id):
+        with read_replica():
+            return self.db.session.scalars(
+                select(Ballot.choices).where(Ballot.election_id == election_id)
+                .execution_options(yield_per=10000)
+            ).all()
+
+    # Approvals per candidate, or each candidate's votes in the final instant-runoff round
+    def ballot_counts(self, election):
+        candidates = self.ballot_candidates(election)
+        ballots = self.load_ballots(election.id)
+        if election.ballot_type == 'approval':
+            counts = tally_engine.approval_counts(ballots, len(candidates))
+        else:
+            counts = tally_engine.instant_runoff(ballots, len(candidates))["rounds"][-1]
+        return {candidate.id: int(counts[i]) for i, candidate in enumerate(candidates)}
+
+    # Percentage of the total vote received by each candidate
+    def calculate_results(self, election):
+        with read_replica():
+            if election.ballot_type != 'single':
+                counts = self.ballot_counts(election)
+                total_votes = sum(counts.values())
+                return {
+                    candidate.name: (counts[candidate.id] / total_votes) * 100 if total_votes > 0 else 0
+                    for candidate in self.ballot_candidates(election)
+                }
+
+            if election.counter_shards:
+                totals = self._sharded_totals(election)
+            else:
+                totals = dict(self.db.session.execute(
+                    select(Vote.candidate_id, func.count(Vote.id))
+                    .where(Vote.election_id == election.id)
+                    .group_by(Vote.candidate_id)
+                ).all())
+            total_votes = sum(totals.values())
+            return {
+                candidate.name: (totals.get(candidate.id, 0) / total_votes) * 100 if total_votes > 0 else 0
+                for candidate in election.candidates
+            }
+
+    def _sharded_totals(self, election):
+        return dict(self.db.session.execute(
+            select(VoteCounterShard.candidate_id, func.sum(VoteCounterShard.count))
+            .where(VoteCounterShard.election_id == election.id)
+            .group_by(VoteCounterShard.candidate_id)
+        ).all())
+
+    # Cheap fingerprint that changes whenever the tallies or status change
+    def results_version(self, election):
+        with read_replica():
+            if election.ballot_type != 'single':
+                count, last_ballot_id = self.db.session.execute(
+                    select(func.count(Ballot.id), func.max(Ballot.id)).where(Ballot.election_id == election.id)
+                ).one()
+                return f"{election.status}:{count}:{last_ballot_id or 0}"
+
+            if election.counter_shards:
+                total = self.db.session.scalar(
+                    select(func.coalesce(func.sum(VoteCounterShard.count), 0))
+                    .where(VoteCounterShard.election_id == election.id)
+                )
+                return f"{election.status}:{total}"
+
+            count, last_vote_id = self.db.session.execute(
+                select(func.count(Vote.id), func.max(Vote.id)).where(Vote.election_id == election.id)
+            ).one()
+            return f"{election.status}:{count}:{last_vote_id or 0}"
+
+    # Export queries: stream votes in batches over a server-side cursor
+    def iter_vote_batches(self, election_id, batch_size=1000):
+        with read_replica():
+            result = self.db.session.execute(
+                select(Vote.id, Vote.candidate_id, Candidate.name, Vote.created_at)
+                .join(Candidate, Candidate.id == Vote.candidate_id)
+                .where(Vote.election_id == election_id)
+                .order_by(Vote.id)
+                .execution_options(stream_results=True, yield_per=batch_size)
+            )
+            for batch in result.partitions():
+                yield batch
+
+    # (ballot id, packed choices, created_at) for approval and ranked elections, streamed like iter_vote_batches
+    def iter_ballot_batches(self, election_id, batch_size=1000):
+        with read_replica():
+            result = self.db.session.execute(
+                select(Ballot.id, Ballot.choices, Ballot.created_at)
+                .where(Ballot.election_id == election_id)
+                .order_by(Ballot.id)
+                .execution_options(stream_results=True, yield_per=batch_size)
+            )
+            for batch in result.partitions():
+                yield batch
+
+    def candidate_tallies(self, election):
+        """(candidate_id, name, votes) for every candidate, zero-vote candidates included."""
+        with read_replica():
+            if election.ballot_type != 'single':
+                counts = self.ballot_counts(election)
+                return [(c.id, c.name, counts[c.id]) for c in self.ballot_candidates(election)]
+
+            if election.counter_shards:
+                votes = func.coalesce(func.sum(VoteCounterShard.count), 0)
+                outer = VoteCounterShard
+            else:
+                votes = func.count(Vote.id)
+                outer = Vote
+            return self.db.session.execute(
+                select(Candidate.id, Candidate.name, votes)
+                .outerjoin(outer, outer.candidate_id == Candidate.id)
+                .where(Candidate.election_id == election.id)
+                .group_by(Candidate.id, Candidate.name)
+                .order_by(Candidate.id)
+            ).all()
+
+    # Match a spoken transcript to the closest candidate name, or None
+    def match_candidate(self, transcript, candidates):
+        candidate_names = [c.name.lower() for c in candidates]
+        candidate_match = difflib.get_close_matches(transcript, candidate_names, n=1, cutoff=0.7)
+        if not candidate_match:
+            return None
+
+        matched_name = candidate_match[0]
+        return next((c for c in candidates if c.name.lower() == matched_name), None)
@@ -0,0 +1,30 @@
+import os
+import shutil
+import tempfile
+
+# Shared directory for prometheus_client's multiprocess mode. It must be set
+# before the workers import the app so every worker writes its samples there.
+prometheus_dir = os.environ.setdefault(
+    "PROMETHEUS_MULTIPROC_DIR", os.path.join(tempfile.gettempdir(), "everyvoter-prometheus")
+)
+
+# The Whisper/GPT-4/ElevenLabs views block a thread on providers for seconds at
+# a time; the worker's other threads keep serving votes meanwhile. DB_POOL_SIZE
+# plus DB_MAX_OVERFLOW should stay at or above the thread count.
+worker_class = "gthread"
+threads = int(os.getenv("GUNICORN_THREADS", 8))
+
+def on_starting(server):
+    """Clear samples left behind by a previous master process."""
+    shutil.rmtree(prometheus_dir, ignore_errors=True)
+    os.makedirs(prometheus_dir, exist_ok=True)
+
+def child_exit(server, worker):
+    """Drop the exited worker's live gauges (in-flight requests, pool occupancy)."""
+    from prometheus_client import multiprocess
+    multiprocess.mark_process_dead(worker.pid)
+
+def post_worker_init(worker):
+    """Run background job threads (GPT-4/ElevenLabs work) inside each worker."""
+    from job_queue import start_worker
+    start_worker(worker.wsgi)
@@ -0,0 +1,111 @@
+import random
+import zlib
+from datetime import datetime, timedelta, timezone
+from functools import wraps
+from flask import current_app, jsonify, make_response, request
+from flask_login import current_user
+from sqlalchemy.exc import IntegrityError
+from extensions import db
+from models import IdempotencyKey
+
+IDEMPOTENCY_HEADER = 'Idempotency-Key'
+MAX_KEY_LENGTH = 255
+# Fraction of stores that also sweep expired keys, so the table stays small without a cron job
+PURGE_PROBABILITY = 0.01
+
+
+def find_key(user_id, key):
+    """Return the unexpired stored response for this user's key, if any."""
+    return db.session.scalars(
+        db.select(IdempotencyKey).where(
+            IdempotencyKey.user_id == user_id,
+            IdempotencyKey.key == key,
+            IdempotencyKey.expires_at > datetime.now(timezone.utc)
+        )
+    ).first()
+
+
+def purge_expired_keys():
+    result = db.session.execute(
+        db.delete(IdempotencyKey).where(IdempotencyKey.expires_at <= datetime.now(timezone.utc))
+    )
+    db.session.commit()
+    return result.rowcount
+
+
+def store_response(user_id, key, response):
+    """Save a compact copy of the response.
+
+    Returns None once stored, or the existing record when a concurrent request
+    with the same key stored its response first.
+    """
+    if random.random() < PURGE_PROBABILITY:
+        purge_expired_keys()
+    else:
+        # An expired row for the same key would still hit the unique constraint
+        db.session.execute(
+            db.delete(IdempotencyKey).where(
+                IdempotencyKey.user_id == user_id,
+                IdempotencyKey.key == key,
+                IdempotencyKey.expires_at <= datetime.now(timezone.utc)
+            ).execution_options(synchronize_session='fetch')
+        )
+
+    ttl = current_app.config.get('IDEMPOTENCY_TTL_SECONDS', 86400)
+    record = IdempotencyKey(
+        key=key,
+        user_id=user_id,
+        request_path=request.path,
+        status_code=response.status_code,
+        content_type=response.content_type,
+        location=response.headers.get('Location'),
+        body=zlib.compress(response.get_data()) if response.get_data() else None,
+        expires_at=datetime.now(timezone.utc) + timedelta(seconds=ttl)
+    )
+    db.session.add(record)
+    try:
+        db.session.commit()
+    except IntegrityError:
+        db.session.rollback()
+        return find_key(user_id, key)
+    return None
+
+
+def replay_response(record):
+    body = zlib.decompress(record.body) if record.body else b''
+    response = make_response(body, record.status_code)
+    if record.content_type:
+        response.content_type = record.content_type
+    if record.location:
+        response.headers['Location'] = record.location
+    response.headers['Idempotent-Replayed'] = 'true'
+    return response
+
+
+def idempotent(f):
+    """View decorator: replay the stored response for a repeated Idempotency-Key.
+
+    Keys are scoped to the logged-in user and only apply to POST requests;
+    5xx responses are not stored so the client can retry them.
+    """
+    @wraps(f)
+    def decorated_function(*args, **kwargs):
+        key = request.headers.get(IDEMPOTENCY_HEADER)
+        if request.method != 'POST' or not key or not current_user.is_authenticated:
+            return f(*args, **kwargs)
+        if len(key) > MAX_KEY_LENGTH:
+            return jsonify({"message": f"{IDEMPOTENCY_HEADER} must be at most {MAX_KEY_LENGTH} characters."}), 400
+
+        record = find_key(current_user.id, key)
+        if record is None:
+            response = make_response(f(*args, **kwargs))
+            if response.status_code >= 500 or response.is_streamed:
+                return response
+            record = store_response(current_user.id, key, response)
+            if record is None:
+                return response
+
+        if record.request_path != request.path:
+            return jsonify({"message": f"{IDEMPOTENCY_HEADER} was already used for a different request."}), 422
+        return replay_response(record)
+    return decorated_function
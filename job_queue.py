@@ -0,0 +1,307 @@
+import json
+import logging
+import os
+import random
+import socket
+import threading
+import time
+import uuid
+from datetime import datetime, timedelta, timezone
+import click
+from flask import current_app, jsonify, request, url_for
+from flask.cli import AppGroup
+from sqlalchemy import and_, delete, or_, select, update
+from sqlalchemy.exc import IntegrityError
+from extensions import db
+from models import Election, Job
+from resilience import DependencyUnavailable
+
+BACKOFF_BASE_SECONDS = 5
+BACKOFF_MAX_SECONDS = 300
+# A running job whose worker hasn't finished it within this long is assumed lost and retried
+LEASE_SECONDS = 300
+
+HANDLERS = {}
+
+# The id of the job this thread is running, for handlers that checkpoint on their own row
+_running = threading.local()
+
+
+class PermanentJobError(Exception):
+    """Raised by a handler when retrying can't help; the job fails at once."""
+
+jobs_cli = AppGroup('jobs', help='Background job queue.')
+
+
+def handler(kind):
+    """Register a job handler. Handlers take the payload as keyword arguments and
+    return (bytes, content type) or something JSON-serializable."""
+    def decorator(f):
+        HANDLERS[kind] = f
+        return f
+    return decorator
+
+
+def current_job():
+    """The Job the calling handler is running as, or None outside run_job."""
+    job_id = getattr(_running, 'job_id', None)
+    return db.session.get(Job, job_id) if job_id else None
+
+
+def utcnow():
+    return datetime.now(timezone.utc)
+
+
+def backoff_seconds(attempts):
+    """Exponential backoff with jitter: ~5s, 10s, 20s ... capped at BACKOFF_MAX_SECONDS."""
+    delay = min(BACKOFF_MAX_SECONDS, BACKOFF_BASE_SECONDS * 2 ** (attempts - 1))
+    return delay * random.uniform(0.5, 1.0)
+
+
+def enqueue(kind, payload, user_id=None, max_attempts=None):
+    """Persist a job; with JOBS_EAGER (tests) it also runs to completion before returning."""
+    if kind not in HANDLERS:
+        raise ValueError(f"Unknown job kind: {kind}")
+    job = Job(
+        id=uuid.uuid4().hex,
+        kind=kind,
+        payload=json.dumps(payload),
+        status='queued',
+        user_id=user_id,
+        attempts=0,
+        max_attempts=max_attempts or current_app.config['JOB_MAX_ATTEMPTS'],
+        run_after=utcnow()
+    )
+    db.session.add(job)
+    db.session.commit()
+
+    if current_app.config.get('JOBS_EAGER'):
+        while job.status == 'queued':
+            job.status, job.attempts = 'running', job.attempts + 1
+            db.session.commit()
+            run_job(job)
+    return job
+
+
+def claimable(now):
+    return or_(
+        and_(Job.status == 'queued', Job.run_after <= now),
+        and_(Job.status == 'running', Job.locked_at < now - timedelta(seconds=LEASE_SECONDS))
+    )
+
+
+def claim_next(worker_id):
+    """Claim the oldest due job, or None. The conditional UPDATE means exactly one worker wins each job."""
+    now = utcnow()
+    job_ids = db.session.scalars(select(Job.id).where(claimable(now)).order_by(Job.run_after).limit(5)).all()
+    for job_id in job_ids:
+        claimed = db.session.execute(
+            update(Job)
+            .where(Job.id == job_id, claimable(now))
+            .values(status='running', locked_by=worker_id, locked_at=now, attempts=Job.attempts + 1)
+            .execution_options(synchronize_session=False)
+        ).rowcount
+        db.session.commit()
+        if claimed:
+            return db.session.get(Job, job_id)
+    return None
+
+
+def run_job(job):
+    """Run a claimed job and record success, a retry with backoff, or final failure."""
+    job_id = job.id
+    if job.attempts > job.max_attempts:
+        # Only reachable when the worker holding the last attempt died
+        return finish(job, 'failed', error="Worker lost while running the job.")
+
+    _running.job_id = job_id
+    try:
+        result = HANDLERS[job.kind](**json.loads(job.payload))
+    except Exception as e:
+        db.session.rollback()
+        job = db.session.get(Job, job_id)
+        logging.warning(f"Job {job_id} ({job.kind}) attempt {job.attempts} failed: {e}")
+        if isinstance(e, PermanentJobError) or job.attempts >= job.max_attempts:
+            return finish(job, 'failed', error=str(e) or type(e).__name__)
+        delay = backoff_seconds(job.attempts)
+        if isinstance(e, DependencyUnavailable):
+            delay = max(delay, e.retry_after)
+        job.status, job.error, job.locked_by, job.locked_at = 'queued', str(e), None, None
+        job.run_after = utcnow() + timedelta(seconds=delay)
+        db.session.commit()
+        return job
+    finally:
+        _running.job_id = None
+
+    if isinstance(result, tuple):
+        job.result, job.result_type = result
+    else:
+        job.result, job.result_type = json.dumps(result).encode(), 'application/json'
+    return finish(job, 'succeeded')
+
+
+def finish(job, status, error=None):
+    job.status, job.error, job.finished_at = status, error, utcnow()
+    job.locked_by = job.locked_at = None
+    db.session.commit()
+    return job
+
+
+def purge_finished_jobs(older_than_seconds):
+    cutoff = utcnow() - timedelta(seconds=older_than_seconds)
+    deleted = db.session.execute(
+        delete(Job).where(Job.status.in_(('succeeded', 'failed')), Job.finished_at < cutoff)
+        .execution_options(synchronize_session=False)
+    ).rowcount
+    db.session.commit()
+    return deleted
+
+
+def job_status(job):
+    status = {"id": job.id, "kind": job.kind, "status": job.status, "attempts": job.attempts,
+              "status_url": url_for('jobs.status', job_id=job.id)}
+    if job.status == 'succeeded':
+        status["result_url"] = url_for('jobs.result', job_id=job.id)
+    if job.error:
+        status["error"] = job.error
+    return status
+
+
+def prefers_async():
+    """RFC 7240 `Prefer: respond-async`: the client will poll a job instead of waiting."""
+    return 'respond-async' in request.headers.get('Prefer', '')
+
+
+def job_accepted(job):
+    response = jsonify(job_status(job))
+    response.status_code = 202
+    response.headers['Location'] = url_for('jobs.status', job_id=job.id)
+    response.headers['Preference-Applied'] = 'respond-async'
+    return response
+
+
+class JobWorker:
+    """Daemon threads that poll for due jobs. Each gunicorn worker runs one (see gunicorn.conf.py)."""
+
+    def __init__(self, app, threads=2, poll_interval=1.0, retention_seconds=86400):
+        self.app = app
+        self.threads = threads
+        self.poll_interval = poll_interval
+        self.retention_seconds = retention_seconds
+        self._stop = threading.Event()
+        self._last_purge = time.monotonic()
+
+    def start(self):
+        prefix = f"{socket.gethostname()}:{os.getpid()}"
+        for i in range(self.threads):
+            threading.Thread(target=self._run, args=(f"{prefix}:{i}",), name=f"job-worker-{i}", daemon=True).start()
+
+    def stop(self):
+        self._stop.set()
+
+    def run_pending(self, worker_id='inline'):
+        """Run due jobs until none are left; returns how many ran."""
+        ran = 0
+        with self.app.app_context():
+            while (job := claim_next(worker_id)) is not None:
+                run_job(job)
+                ran += 1
+        return ran
+
+    def _run(self, worker_id):
+        while not self._stop.is_set():
+            try:
+                if self.run_pending(worker_id):
+                    continue
+                if time.monotonic() - self._last_purge > 3600:
+                    self._last_purge = time.monotonic()
+                    with self.app.app_context():
+                        purge_finished_jobs(self.retention_seconds)
+            except Exception:
+                logging.exception("Job worker poll failed")
+            self._stop.wait(self.poll_interval)
+
+
+def start_worker(app):
+    """Start app.config['JOB_WORKER_THREADS'] job threads in this process."""
+    if not app.config['JOB_WORKER_THREADS'] or app.config.get('JOBS_EAGER'):
+        return None
+    app.job_worker = JobWorker(app, threads=app.config['JOB_WORKER_THREADS'],
+                               retention_seconds=app.config['JOB_RETENTION_SECONDS'])
+    app.job_worker.start()
+    return app.job_worker
+
+
+@jobs_cli.command('work')
+@click.option('--threads', default=2, show_default=True)
+def work_command(threads):
+    """Run job worker threads in the foreground, for hosts without gunicorn."""
+    worker = JobWorker(current_app._get_current_object(), threads=threads,
+                       retention_seconds=current_app.config['JOB_RETENTION_SECONDS'])
+    worker.start()
+    click.echo(f"Processing jobs with {threads} threads; Ctrl-C to stop")
+    try:
+        while True:
+            time.sleep(1)
+    except KeyboardInterrupt:
+        worker.stop()
+
+
+def init_app(app):
+    app.cli.add_command(jobs_cli)
+
+
+# Job handlers for the slow GPT-4/ElevenLabs work
+
+@handler('candidates_audio')
+def candidates_audio(election_id):
+    election = current_app.election_cache.get(election_id)
+    if election is None:
+        raise PermanentJobError(f"Election {election_id} no longer exists.")
+    audio = current_app.election_service.generate_introduction_audio(election, current_app.elevenclient)
+    return audio, 'audio/mpeg'
+
+
+@handler('restaurant_election')
+def restaurant_election(city, state, number_of_restaurants, max_votes, election_name, start_date=None,
+                        end_date=None, counter_shards=0, ballot_type='single'):
+    # The election is committed together with this job's result, so a retry
+    # (say the worker died before recording success) returns that election
+    job = current_job()
+    if job is not None and job.result is not None:
+        return json.loads(job.result)
+
+    # Settings GPT-4 can't fix are refused before paying for a call
+    service = current_app.election_service
+    try:
+        service.check_election_settings(number_of_restaurants, counter_shards, ballot_type)
+    except ValueError as e:
+        raise PermanentJobError(str(e)) from e
+    if db.session.scalar(select(Election.id).where(Election.election_name == election_name)) is not None:
+        raise PermanentJobError(f"An election named '{election_name}' already exists.")
+
+    candidates = service.get_restaurant_candidates(number_of_restaurants, city, state)
+    try:
+        election_id = service.start_election(
+            candidates,
+            max_votes,
+            election_type="restaurant",
+            election_name=election_name,
+            start_date=datetime.fromisoformat(start_date) if start_date else None,
+            end_date=datetime.fromisoformat(end_date) if end_date else None,
+            counter_shards=counter_shards,
+            ballot_type=ballot_type,
+            commit=False
+        )
+        result = {"election_id": election_id}
+        if job is not None:
+            job.result, job.result_type = json.dumps(result).encode(), 'application/json'
+        db.session.commit()
+    except ValueError as e:
+        db.session.rollback()
+        raise PermanentJobError(str(e)) from e
+    except IntegrityError as e:
+        # Another election took the name while GPT-4 was answering
+        db.session.rollback()
+        raise PermanentJobError(f"An election named '{election_name}' already exists.") from e
+    return result
@@ -0,0 +1,263 @@
+"""Election-night load generator for a running EveryVoter server.
+
+Each arrival is one voter journey: register, log in, open the vote page,
+vote through /vote/<id>, poll /results/<id>, transcribe a clip through
+/process_audio and cast a voice vote through /voice_vote in a second election.
+
+    # Start gunicorn with stubbed AI providers on a scratch SQLite file and drive it
+    python -m loadtest.run --spawn-server --database-url sqlite:////tmp/loadtest.db --rate 20 --duration 60
+
+    # Drive an already running server that uses the given database
+    python -m loadtest.run --base-url http://127.0.0.1:8000 --database-url postgresql://localhost/everyvoter_load
+
+--rate is the mean number of journeys started per second (Poisson arrivals);
+0 starts a new journey as soon as one of the --concurrency slots frees up.
+"""
+import argparse
+import io
+import json
+import math
+import os
+import random
+import struct
+import subprocess
+import sys
+import threading
+import time
+import uuid
+import wave
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+import requests
+
+ENDPOINTS = ["register", "login", "vote_page", "vote", "results", "process_audio", "voice_vote"]
+
+
+def parse_args(argv):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--base-url", default="http://127.0.0.1:8000")
+    parser.add_argument("--database-url", required=True, help="Database the server uses; elections are seeded here")
+    parser.add_argument("--spawn-server", action="store_true", help="Start gunicorn with stubbed providers")
+    parser.add_argument("--workers", type=int, default=4, help="gunicorn workers when spawning the server")
+    parser.add_argument("--duration", type=float, default=30, help="Seconds to keep starting journeys")
+    parser.add_argument("--rate", type=float, default=10, help="Journeys started per second (0 = closed loop)")
+    parser.add_argument("--concurrency", type=int, default=32, help="Maximum journeys in flight")
+    parser.add_argument("--results-polls", type=int, default=3, help="Results page polls per journey")
+    parser.add_argument("--candidates", type=int, default=5)
+    parser.add_argument("--seed", type=int, default=None, help="Random seed for arrivals and choices")
+    parser.add_argument("--output", default="loadtest_output.json")
+    return parser.parse_args(argv)
+
+
+def seed_elections(database_url, candidates):
+    """Create a form-vote and a voice-vote election directly in the server's database."""
+    os.environ["BENCHMARK_DATABASE_URL"] = database_url
+    os.environ.setdefault("DATABASE_CONNECTION_STRING", database_url)
+    os.environ.setdefault("OPENAI_API_KEY", "loadtest")
+    os.environ.setdefault("ELEVENLABS_API_KEY", "loadtest")
+
+    from application import create_app
+    from extensions import db
+    from models import Election
+
+    app = create_app('benchmark')
+    run_id = uuid.uuid4().hex[:8]
+    names = [f"Candidate {i}" for i in range(1, candidates + 1)]
+    with app.app_context():
+        db.create_all()
+        elections = {}
+        for kind in ("form", "voice"):
+            election_id = app.election_service.start_election(names, 1_000_000, "custom", f"Load Test {run_id} {kind}")
+            elections[kind] = {
+                "id": election_id,
+                "candidates": [(c.id, c.name) for c in db.session.get(Election, election_id).candidates],
+            }
+        db.session.remove()
+    return elections
+
+
+def tone_wav(seconds=1.0, rate=16000):
+    """A 440 Hz tone; digital silence would be trimmed to nothing and get 422."""
+    buffer = io.BytesIO()
+    with wave.open(buffer, "wb") as wav_file:
+        wav_file.setnchannels(1)
+        wav_file.setsampwidth(2)
+        wav_file.setframerate(rate)
+        wav_file.writeframes(b"".join(
+            struct.pack("<h", int(8000 * math.sin(2 * math.pi * 440 * i / rate))) for i in range(int(seconds * rate))
+        ))
+    return buffer.getvalue()
+
+
+class Recorder:
+    def __init__(self):
+        """Thread-safe latency samples and error counts per endpoint."""
+        self._lock = threading.Lock()
+        self.latencies = defaultdict(list)
+        self.errors = defaultdict(int)
+
+    def record(self, endpoint, seconds, ok):
+        with self._lock:
+            self.latencies[endpoint].append(seconds)
+            if not ok:
+                self.errors[endpoint] += 1
+
+
+def percentile(ordered, q):
+    if not ordered:
+        return None
+    return ordered[min(len(ordered) - 1, int(len(ordered) * q))]
+
+
+def summarize(recorder, elapsed):
+    report = {}
+    for endpoint in ENDPOINTS:
+        ordered = sorted(recorder.latencies.get(endpoint, []))
+        count = len(ordered)
+        errors = recorder.errors.get(endpoint, 0)
+        report[endpoint] = {
+            "requests": count,
+            "errors": errors,
+            "error_rate": round(errors / count, 4) if count else 0.0,
+            "throughput_rps": round(count / elapsed, 2),
+            "p50_ms": round(percentile(ordered, 0.50) * 1000, 2) if count else None,
+            "p95_ms": round(percentile(ordered, 0.95) * 1000, 2) if count else None,
+            "p99_ms": round(percentile(ordered, 0.99) * 1000, 2) if count else None,
+        }
+    return report
+
+
+class VoterJourney:
+    def __init__(self, base_url, elections, recorder, rng, results_polls, audio):
+        self.base_url = base_url.rstrip("/")
+        self.elections = elections
+        self.recorder = recorder
+        self.rng = rng
+        self.results_polls = results_polls
+        self.audio = audio
+
+    def timed(self, endpoint, session, method, path, ok=lambda r: r.status_code < 400, **kwargs):
+        start = time.perf_counter()
+        try:
+            response = session.request(method, self.base_url + path, allow_redirects=False, timeout=60, **kwargs)
+            success = ok(response)
+        except requests.RequestException:
+            response, success = None, False
+        self.recorder.record(endpoint, time.perf_counter() - start, success)
+        return response
+
+    def run(self):
+        session = requests.Session()
+        username = f"voter-{uuid.uuid4().hex}"
+        credentials = {"username": username, "password": "loadtest-password"}
+        form, voice = self.elections["form"], self.elections["voice"]
+
+        self.timed("register", session, "POST", "/register", data=credentials)
+        # Successful login redirects to the index; failures redirect back to /login
+        login = self.timed("login", session, "POST", "/login", data=credentials,
+                           ok=lambda r: r.status_code == 302 and "login" not in r.headers.get("Location", ""))
+        if login is None or login.status_code != 302:
+            return
+
+        self.timed("vote_page", session, "GET", f"/vote/{form['id']}")
+        candidate_id, _ = self.rng.choice(form["candidates"])
+        # A recorded vote redirects to the index; "already voted" redirects to results
+        self.timed("vote", session, "POST", f"/vote/{form['id']}", data={"candidate": candidate_id},
+                   ok=lambda r: r.status_code == 302 and "/results/" not in r.headers.get("Location", ""))
+
+        for _ in range(self.results_polls):
+            self.timed("results", session, "GET", f"/results/{form['id']}")
+
+        self.timed("process_audio", session, "POST", "/process_audio",
+                   files={"audio": ("voice_vote.wav", self.audio, "audio/wav")})
+        _, candidate_name = self.rng.choice(voice["candidates"])
+        self.timed("voice_vote", session, "POST", "/voice_vote",
+                   json={"transcript": candidate_name.lower(), "election_id": voice["id"]})
+
+
+def spawn_server(args):
+    env = dict(os.environ, DATABASE_CONNECTION_STRING=args.database_url)
+    env.setdefault("OPENAI_API_KEY", "loadtest")
+    env.setdefault("ELEVENLABS_API_KEY", "loadtest")
+    # Every journey comes from this host's IP; keep the per-user limit only
+    env.setdefault("AI_RATE_LIMIT_PER_IP", "")
+    env.setdefault("AI_RATE_LIMIT_GLOBAL", "")
+    bind = args.base_url.split("://", 1)[1].rstrip("/")
+    server = subprocess.Popen(
+        [sys.executable, "-m", "gunicorn", "--config=gunicorn.conf.py", f"--workers={args.workers}",
+         f"--bind={bind}", "loadtest.wsgi_stubbed:app"],
+        env=env
+    )
+
+    # Wait until every worker can reach the database
+    deadline = time.monotonic() + 60
+    while time.monotonic() < deadline:
+        try:
+            if requests.get(args.base_url + "/readyz", timeout=1).status_code == 200:
+                return server
+        except requests.RequestException:
+            pass
+        time.sleep(0.5)
+    server.terminate()
+    raise RuntimeError("Server did not become ready within 60 seconds")
+
+
+def run_load(args, elections):
+    recorder = Recorder()
+    rng = random.Random(args.seed)
+    audio = tone_wav()
+    slots = threading.BoundedSemaphore(args.concurrency)
+
+    def journey(seed):
+        try:
+            VoterJourney(args.base_url, elections, recorder, random.Random(seed), args.results_polls, audio).run()
+        finally:
+            slots.release()
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=args.concurrency) as pool:
+        next_arrival = start
+        while time.perf_counter() - start < args.duration:
+            if args.rate > 0:
+                next_arrival += rng.expovariate(args.rate)
+                time.sleep(max(0.0, next_arrival - time.perf_counter()))
+            # Journeys beyond --concurrency wait here rather than piling up in the pool
+            slots.acquire()
+            pool.submit(journey, rng.random())
+    elapsed = time.perf_counter() - start
+    return summarize(recorder, elapsed), elapsed
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    elections = seed_elections(args.database_url, args.candidates)
+    server = spawn_server(args) if args.spawn_server else None
+
+    try:
+        report, elapsed = run_load(args, elections)
+    finally:
+        if server:
+            server.terminate()
+            server.wait()
+
+    successful_votes = sum(report[e]["requests"] - report[e]["errors"] for e in ("vote", "voice_vote"))
+    output = {
+        "duration_seconds": round(elapsed, 2),
+        "rate": args.rate,
+        "concurrency": args.concurrency,
+        "votes_per_second": round(successful_votes / elapsed, 2),
+        "endpoints": report,
+    }
+    with open(args.output, "w") as f:
+        json.dump(output, f, indent=2)
+        f.write("\n")
+
+    print(f"{'endpoint':15}{'requests':>10}{'errors':>8}{'rps':>9}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}")
+    for endpoint, stats in report.items():
+        print(f"{endpoint:15}{stats['requests']:>10}{stats['errors']:>8}{stats['throughput_rps']:>9}"
+              f"{str(stats['p50_ms']):>10}{str(stats['p95_ms']):>10}{str(stats['p99_ms']):>10}")
+    print(f"Sustained {output['votes_per_second']} votes/second; full report in {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,8 @@
+"""Production app with offline AI providers, for load tests:
+
+    gunicorn --config=gunicorn.conf.py --workers=4 loadtest.wsgi_stubbed:app
+"""
+from application import app
+from benchmarks.stubs import install_stub_providers
+
+install_stub_providers(app)
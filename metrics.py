@@ -0,0 +1,113 @@
+import os
+import time
+from flask import g, request
+from prometheus_client import (
+    CollectorRegistry, Counter, Gauge, Histogram, REGISTRY, CONTENT_TYPE_LATEST, generate_latest, multiprocess
+)
+
+# Under gunicorn, PROMETHEUS_MULTIPROC_DIR is set by gunicorn.conf.py before
+# workers import the app, so every worker writes its samples to shared files
+# and /metrics aggregates them no matter which worker serves the scrape.
+
+# Voice and audio endpoints wait on OpenAI/ElevenLabs, so buckets reach a minute
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60)
+
+REQUEST_LATENCY = Histogram(
+    "everyvoter_request_duration_seconds",
+    "Request latency by endpoint",
+    ["endpoint", "method"],
+    buckets=LATENCY_BUCKETS
+)
+REQUEST_COUNT = Counter(
+    "everyvoter_requests_total",
+    "Requests by endpoint and response status",
+    ["endpoint", "method", "status"]
+)
+REQUESTS_IN_FLIGHT = Gauge(
+    "everyvoter_requests_in_flight",
+    "Requests currently being served",
+    ["endpoint"],
+    multiprocess_mode="livesum"
+)
+
+DB_POOL_CHECKOUT_WAIT = Histogram(
+    "everyvoter_db_pool_checkout_wait_seconds",
+    "Time spent waiting for a pooled database connection",
+    buckets=(0.0005, 0.001, 0.005, 0.01, 0.05, 0.1, 0.5, 1, 5, 10, 30)
+)
+DB_POOL_CHECKOUT_TIMEOUTS = Counter(
+    "everyvoter_db_pool_checkout_timeouts_total",
+    "Connection checkouts that gave up after pool_timeout"
+)
+# Labelled by bind ("primary" or "replica")
+DB_POOL_CHECKED_OUT = Gauge(
+    "everyvoter_db_pool_checked_out",
+    "Pooled connections currently in use",
+    ["pool"],
+    multiprocess_mode="livesum"
+)
+DB_POOL_OVERFLOW = Gauge(
+    "everyvoter_db_pool_overflow",
+    "Connections open beyond pool_size",
+    ["pool"],
+    multiprocess_mode="livesum"
+)
+
+RATE_LIMITED = Counter(
+    "everyvoter_rate_limited_total",
+    "Requests rejected by a token-bucket limit",
+    ["endpoint", "scope"]
+)
+
+# 0 closed, 1 half-open, 2 open; "livemax" surfaces the worst live worker's breaker,
+# so a dead worker's open breaker doesn't linger
+CIRCUIT_BREAKER_STATE = Gauge(
+    "everyvoter_circuit_breaker_state",
+    "Circuit breaker state per external dependency",
+    ["dependency"],
+    multiprocess_mode="livemax"
+)
+DEPENDENCY_REJECTIONS = Counter(
+    "everyvoter_dependency_rejections_total",
+    "Calls to an external dependency refused without being attempted",
+    ["dependency", "reason"]
+)
+
+
+def endpoint_label():
+    return request.endpoint or "unmatched"
+
+
+def init_app(app):
+    """Record latency, status counts and in-flight requests for every endpoint."""
+
+    @app.before_request
+    def start_request_timer():
+        g.metrics_start = time.perf_counter()
+        g.metrics_endpoint = endpoint_label()
+        REQUESTS_IN_FLIGHT.labels(g.metrics_endpoint).inc()
+
+    @app.after_request
+    def record_request_metrics(response):
+        start = g.pop("metrics_start", None)
+        if start is not None:
+            endpoint = g.metrics_endpoint
+            REQUEST_LATENCY.labels(endpoint, request.method).observe(time.perf_counter() - start)
+            REQUEST_COUNT.labels(endpoint, request.method, str(response.status_code)).inc()
+        return response
+
+    @app.teardown_request
+    def finish_request(exc):
+        endpoint = g.pop("metrics_endpoint", None)
+        if endpoint is not None:
+            REQUESTS_IN_FLIGHT.labels(endpoint).dec()
+
+
+def render_latest():
+    """Return the Prometheus text exposition and its content type."""
+    if os.getenv("PROMETHEUS_MULTIPROC_DIR"):
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+    else:
+        registry = REGISTRY
+    return generate_latest(registry), CONTENT_TYPE_LATEST
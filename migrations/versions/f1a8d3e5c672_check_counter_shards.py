@@ -0,0 +1,26 @@
+"""check counter shards
+
+Revision ID: f1a8d3e5c672
+Revises: e7c4b9a2d816
+Create Date: 2026-10-19 20:58:03.417725
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'f1a8d3e5c672'
+down_revision = 'e7c4b9a2d816'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table('elections', schema=None) as batch_op:
+        batch_op.create_check_constraint('ck_elections_counter_shards', 'counter_shards >= 0')
+
+
+def downgrade():
+    with op.batch_alter_table('elections', schema=None) as batch_op:
+        batch_op.drop_constraint('ck_elections_counter_shards', type_='check')
@@ -1,6 +1,13 @@
 from models.user import User
 from models.election import Election
 from models.candidate import Candidate
-from models.vote import Vote, UserVote
+from models.vote import Vote, UserVote, VoteCounterShard
+from models.idempotency import IdempotencyKey
+from models.ballot import Ballot
+from models.vote_event import VoteEvent, VoteTally, ProjectionCheckpoint
+from models.job import Job
+from models.cache_version import CacheVersion
 
-__all__ = ['User', 'Election', 'Candidate', 'Vote', 'UserVote']
\ No newline at end of file
+__all__ = ['User', 'Election', 'Candidate', 'Vote', 'UserVote', 'VoteCounterShard', 'IdempotencyKey',
+           'VoteEvent', 'VoteTally', 'ProjectionCheckpoint', 'Ballot', 'Job',
+           'CacheVersion']
\ No newline at end of file
@@ -0,0 +1,12 @@
+from extensions import db
+from models.base import TimestampMixin
+
+class Ballot(db.Model, TimestampMixin):
+    __tablename__ = 'ballots'
+
+    # Approval and ranked-choice ballots. choices packs candidate positions (index
+    # into the election's candidates ordered by id) one byte each: the approved
+    # set, or the preference order. See tally_engine.pack_choices.
+    id = db.Column(db.Integer, primary_key=True)
+    election_id = db.Column(db.Integer, db.ForeignKey('elections.id'), nullable=False, index=True)
+    choices = db.Column(db.LargeBinary, nullable=False)
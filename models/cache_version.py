@@ -0,0 +1,9 @@
+from extensions import db
+
+class CacheVersion(db.Model):
+    __tablename__ = 'cache_versions'
+
+    # Bumped in the same transaction as any change to the data a process-wide cache
+    # holds; other processes compare it to the version they loaded under
+    name = db.Column(db.String(50), primary_key=True)
+    version = db.Column(db.Integer, nullable=False, default=0)
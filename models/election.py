@@ -5,6 +5,25 @@ from datetime import datetime, timezone
 import pytz
 from zoneinfo import ZoneInfo
 
+PACIFIC = ZoneInfo('America/Los_Angeles')
+
+
+def hours_until(start_date):
+    """Hours until an election starts, to one decimal place; None once it has started."""
+    if not start_date:
+        return None
+    now = datetime.now(timezone.utc)
+    if now < start_date:
+        return round((start_date - now).total_seconds() / 3600, 1)
+    return None
+
+
+def local_time_label(dt):
+    """Pacific time as shown to voters, e.g. '09:00 AM PDT on October 19, 2026'."""
+    if dt:
+        return dt.astimezone(PACIFIC).strftime('%I:%M %p %Z on %B %d, %Y')
+    return None
+
 
 class Election(db.Model, TimestampMixin):
     __tablename__ = 'elections'
@@ -16,6 +35,12 @@ class Election(db.Model, TimestampMixin):
     status = db.Column(db.String(20), default='ongoing')
     start_date = db.Column(db.DateTime(timezone=True))
     end_date = db.Column(db.DateTime(timezone=True))
+    # 0 tallies by counting votes; N > 0 keeps running totals in N shard rows per candidate
+    counter_shards = db.Column(db.Integer, nullable=False, default=0, server_default='0')
+    # 'single' records Vote rows; 'approval' and 'ranked' record packed Ballot rows
+    ballot_type = db.Column(db.String(20), nullable=False, default='single', server_default='single')
+
+    __table_args__ = (db.CheckConstraint('counter_shards >= 0', name='ck_elections_counter_shards'),)
 
     candidates = db.relationship('Candidate', backref='election', lazy=True)
     votes = db.relationship('Vote', backref='election', lazy=True)
@@ -42,34 +67,18 @@ class Election(db.Model, TimestampMixin):
 
     @property
     def time_until_start(self):
-        if not self.start_date:
-            return None
-            
-        now = datetime.now(timezone.utc)
-        
-        if now < self.start_date:
-            time_delta = self.start_date - now
-            hours = time_delta.total_seconds() / 3600
-            return round(hours, 1)
-        return None
+        return hours_until(self.start_date)
 
     def get_local_time(self, dt):
         """Convert UTC datetime to Pacific Time"""
         if dt:
-            pacific = ZoneInfo('America/Los_Angeles')
-            return dt.astimezone(pacific)
+            return dt.astimezone(PACIFIC)
         return None
 
     @property
     def local_start_date(self):
-        local_time = self.get_local_time(self.start_date)
-        if local_time:
-            return local_time.strftime('%I:%M %p %Z on %B %d, %Y')
-        return None
+        return local_time_label(self.start_date)
 
     @property
     def local_end_date(self):
-        local_time = self.get_local_time(self.end_date)
-        if local_time:
-            return local_time.strftime('%I:%M %p %Z on %B %d, %Y')
-        return None
\ No newline at end of file
+        return local_time_label(self.end_date)
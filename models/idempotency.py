@@ -0,0 +1,18 @@
+from extensions import db
+from models.base import TimestampMixin
+
+class IdempotencyKey(db.Model, TimestampMixin):
+    __tablename__ = 'idempotency_keys'
+
+    id = db.Column(db.Integer, primary_key=True)
+    key = db.Column(db.String(255), nullable=False)
+    user_id = db.Column(db.Integer, db.ForeignKey('users.id'), nullable=False)
+    request_path = db.Column(db.String(255), nullable=False)
+    status_code = db.Column(db.Integer, nullable=False)
+    content_type = db.Column(db.String(100))
+    location = db.Column(db.String(255))
+    # zlib-compressed response body
+    body = db.Column(db.LargeBinary)
+    expires_at = db.Column(db.DateTime(timezone=True), nullable=False, index=True)
+
+    __table_args__ = (db.UniqueConstraint('user_id', 'key', name='unique_user_idempotency_key'),)
@@ -0,0 +1,24 @@
+from extensions import db
+from models.base import TimestampMixin
+
+class Job(db.Model, TimestampMixin):
+    """A unit of background work; see job_queue.py."""
+    __tablename__ = 'jobs'
+
+    # Random hex, so the status URL is only known to whoever enqueued the job
+    id = db.Column(db.String(32), primary_key=True)
+    kind = db.Column(db.String(50), nullable=False)
+    payload = db.Column(db.Text, nullable=False)
+    status = db.Column(db.String(20), nullable=False, default='queued')
+    user_id = db.Column(db.Integer, db.ForeignKey('users.id'))
+    attempts = db.Column(db.Integer, nullable=False, default=0)
+    max_attempts = db.Column(db.Integer, nullable=False, default=3)
+    run_after = db.Column(db.DateTime(timezone=True), nullable=False)
+    locked_by = db.Column(db.String(100))
+    locked_at = db.Column(db.DateTime(timezone=True))
+    finished_at = db.Column(db.DateTime(timezone=True))
+    error = db.Column(db.Text)
+    result = db.Column(db.LargeBinary)
+    result_type = db.Column(db.String(100))
+
+    __table_args__ = (db.Index('ix_jobs_status_run_after', 'status', 'run_after'),)
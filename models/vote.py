@@ -15,4 +15,21 @@ class UserVote(db.Model, TimestampMixin):
     user_id = db.Column(db.Integer, db.ForeignKey('users.id'), nullable=False)
     election_id = db.Column(db.Integer, db.ForeignKey('elections.id'), nullable=False)
 
-    __table_args__ = (db.UniqueConstraint('user_id', 'election_id', name='unique_user_election'),)
\ No newline at end of file
+    __table_args__ = (
+        db.UniqueConstraint('user_id', 'election_id', name='unique_user_election'),
+        # Turnout series: range scans of one election's ballots by time
+        db.Index('ix_user_votes_election_id_created_at', 'election_id', 'created_at'),
+    )
+
+class VoteCounterShard(db.Model):
+    __tablename__ = 'vote_counter_shards'
+
+    # Each candidate's running total is split across Election.counter_shards rows
+    # so concurrent votes for a hot candidate lock different rows; read by summing
+    id = db.Column(db.Integer, primary_key=True)
+    election_id = db.Column(db.Integer, db.ForeignKey('elections.id'), nullable=False)
+    candidate_id = db.Column(db.Integer, db.ForeignKey('candidates.id'), nullable=False)
+    shard = db.Column(db.Integer, nullable=False)
+    count = db.Column(db.Integer, nullable=False, default=0)
+
+    __table_args__ = (db.UniqueConstraint('candidate_id', 'shard', name='unique_candidate_shard'),)
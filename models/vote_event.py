@@ -0,0 +1,31 @@
+from datetime import datetime, timezone
+from extensions import db
+from models.base import TimestampMixin
+
+class VoteEvent(db.Model, TimestampMixin):
+    __tablename__ = 'vote_events'
+
+    # Append-only log: rows are only ever inserted, and seq orders them for replay.
+    # No foreign keys, so the log outlives deleted elections for auditing
+    seq = db.Column(db.Integer, primary_key=True)
+    event_type = db.Column(db.String(20), nullable=False, default='vote_cast')
+    election_id = db.Column(db.Integer, nullable=False, index=True)
+    candidate_id = db.Column(db.Integer)
+    # ballot_cast events: the packed approval set or ranking, as stored in ballots.choices
+    choices = db.Column(db.LargeBinary)
+
+class VoteTally(db.Model):
+    __tablename__ = 'vote_tallies'
+
+    # Projection of vote_events; can always be dropped and replayed
+    candidate_id = db.Column(db.Integer, primary_key=True, autoincrement=False)
+    election_id = db.Column(db.Integer, nullable=False, index=True)
+    votes = db.Column(db.Integer, nullable=False, default=0)
+
+class ProjectionCheckpoint(db.Model):
+    __tablename__ = 'projection_checkpoints'
+
+    name = db.Column(db.String(50), primary_key=True)
+    last_seq = db.Column(db.Integer, nullable=False, default=0)
+    updated_at = db.Column(db.DateTime, default=lambda: datetime.now(timezone.utc),
+                           onupdate=lambda: datetime.now(timezone.utc))
@@ -0,0 +1,121 @@
+import logging
+import re
+import threading
+import time
+from collections import Counter
+from contextlib import contextmanager
+from flask import g, has_app_context, request
+from sqlalchemy import event
+
+logger = logging.getLogger(__name__)
+
+# Collectors opened with count_queries(), per thread
+_local = threading.local()
+
+_WHITESPACE = re.compile(r"\s+")
+_NUMBER = re.compile(r"\b\d+(\.\d+)?\b")
+_STRING = re.compile(r"'(?:[^']|'')*'")
+_IN_LIST = re.compile(r"\bIN\s*\((?:\s*(?:\?|%\(\w+\)s|:\w+|__\[POSTCOMPILE_\w+\])\s*,?)+\)", re.IGNORECASE)
+
+
+def statement_shape(statement):
+    """Normalize SQL so queries differing only in literals or parameters compare equal."""
+    shape = _WHITESPACE.sub(" ", statement).strip()
+    shape = _STRING.sub("?", shape)
+    shape = _NUMBER.sub("?", shape)
+    shape = _IN_LIST.sub("IN (?)", shape)
+    return shape
+
+
+class QueryStats:
+    def __init__(self):
+        """Queries issued and time spent in the database for one request or block."""
+        self.count = 0
+        self.total_seconds = 0.0
+        self.shapes = Counter()
+        self.statements = []
+
+    def record(self, statement, seconds):
+        self.count += 1
+        self.total_seconds += seconds
+        self.shapes[statement_shape(statement)] += 1
+        self.statements.append(statement)
+
+    def repeated(self, threshold):
+        """Statement shapes run at least `threshold` times, most frequent first."""
+        return [(shape, n) for shape, n in self.shapes.most_common() if n >= threshold]
+
+
+class QueryProfiler:
+    def __init__(self, slow_query_ms=100, nplus1_threshold=3):
+        """Dev/test profiler: per-request query counts, slow query logging and N+1 detection."""
+        self.slow_query_ms = slow_query_ms
+        self.nplus1_threshold = nplus1_threshold
+
+    def init_app(self, app, engines):
+        """Profile queries on every engine given, e.g. db.engines.values() so binds are included."""
+        for engine in engines:
+            event.listen(engine, "before_cursor_execute", self._before_cursor_execute)
+            event.listen(engine, "after_cursor_execute", self._after_cursor_execute)
+
+        @app.before_request
+        def start_query_stats():
+            g.query_stats = QueryStats()
+
+        @app.after_request
+        def report_query_stats(response):
+            stats = g.pop("query_stats", None)
+            if stats is None:
+                return response
+
+            logger.debug("%s %s: %d queries in %.1f ms", request.method, request.path,
+                         stats.count, stats.total_seconds * 1000)
+            for shape, n in stats.repeated(self.nplus1_threshold):
+                logger.warning("Possible N+1 in %s: %d x %s", request.endpoint, n, shape)
+
+            response.headers["X-Query-Count"] = str(stats.count)
+            response.headers["X-Query-Time-Ms"] = f"{stats.total_seconds * 1000:.1f}"
+            return response
+
+    def _before_cursor_execute(self, conn, cursor, statement, parameters, context, executemany):
+        conn.info.setdefault("query_start_time", []).append(time.perf_counter())
+
+    def _after_cursor_execute(self, conn, cursor, statement, parameters, context, executemany):
+        elapsed = time.perf_counter() - conn.info["query_start_time"].pop()
+
+        if elapsed * 1000 >= self.slow_query_ms:
+            logger.warning("Slow query (%.1f ms): %s", elapsed * 1000, statement)
+
+        for stats in _active_collectors():
+            stats.record(statement, elapsed)
+
+
+def _active_collectors():
+    collectors = list(getattr(_local, "collectors", ()))
+    if has_app_context():
+        request_stats = g.get("query_stats")
+        if request_stats is not None:
+            collectors.append(request_stats)
+    return collectors
+
+
+@contextmanager
+def count_queries():
+    """Collect every query issued on this thread while the block runs."""
+    stats = QueryStats()
+    collectors = _local.__dict__.setdefault("collectors", [])
+    collectors.append(stats)
+    try:
+        yield stats
+    finally:
+        collectors.remove(stats)
+
+
+@contextmanager
+def assert_max_queries(limit):
+    """Test helper: fail if the block issues more than `limit` queries."""
+    with count_queries() as stats:
+        yield stats
+    if stats.count > limit:
+        statements = "\n".join(stats.statements)
+        raise AssertionError(f"Expected at most {limit} queries, got {stats.count}:\n{statements}")
@@ -0,0 +1,107 @@
+import logging
+import math
+import random
+import sqlite3
+import threading
+import time
+from functools import wraps
+from flask import current_app, jsonify, request
+from flask_login import current_user
+import metrics
+
+PERIODS = {"second": 1, "minute": 60, "hour": 3600}
+# Fraction of takes that also drop buckets which have refilled completely
+SWEEP_PROBABILITY = 0.01
+
+
+def parse_rate(value):
+    """'5/minute' -> (capacity 5, refill 5/60 tokens per second)."""
+    count, _, period = value.partition("/")
+    capacity = int(count)
+    return capacity, capacity / PERIODS[period.strip() or "second"]
+
+
+class TokenBucketLimiter:
+    """Token buckets kept in a SQLite file, shared by every gunicorn worker on the host.
+
+    Each take() is one IMMEDIATE transaction, so concurrent workers never
+    spend the same token. Store errors fail open rather than block requests.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self._local = threading.local()
+
+    def _connection(self):
+        connection = getattr(self._local, "connection", None)
+        if connection is None:
+            connection = sqlite3.connect(self.path, timeout=1, isolation_level=None)
+            connection.execute("PRAGMA journal_mode=WAL")
+            connection.execute(
+                "CREATE TABLE IF NOT EXISTS buckets "
+                "(key TEXT PRIMARY KEY, tokens REAL NOT NULL, updated REAL NOT NULL, full_at REAL NOT NULL)"
+            )
+            self._local.connection = connection
+        return connection
+
+    def take(self, limits, now=None):
+        """Spend one token from every (key, capacity, rate) bucket, or none of them.
+
+        Returns (0, None) when allowed, otherwise (seconds until a token is
+        available, key of the bucket that is empty).
+        """
+        now = time.time() if now is None else now
+        try:
+            connection = self._connection()
+            connection.execute("BEGIN IMMEDIATE")
+            try:
+                levels = []
+                for key, capacity, rate in limits:
+                    row = connection.execute("SELECT tokens, updated FROM buckets WHERE key = ?", (key,)).fetchone()
+                    tokens = capacity if row is None else min(capacity, row[0] + (now - row[1]) * rate)
+                    if tokens < 1:
+                        connection.execute("ROLLBACK")
+                        return (1 - tokens) / rate, key
+                    levels.append((key, tokens - 1, now + (capacity - tokens + 1) / rate))
+
+                connection.executemany(
+                    "INSERT OR REPLACE INTO buckets (key, tokens, updated, full_at) VALUES (?, ?, ?, ?)",
+                    [(key, tokens, now, full_at) for key, tokens, full_at in levels]
+                )
+                if random.random() < SWEEP_PROBABILITY:
+                    connection.execute("DELETE FROM buckets WHERE full_at < ?", (now,))
+                connection.execute("COMMIT")
+                return 0, None
+            except BaseException:
+                if connection.in_transaction:
+                    connection.execute("ROLLBACK")
+                raise
+        except sqlite3.Error as e:
+            logging.warning(f"Rate limit store unavailable, allowing request: {e}")
+            return 0, None
+
+
+def rate_limited(group):
+    """View decorator: per-user, per-IP and global token buckets from config RATE_LIMITS[group]."""
+    def decorator(f):
+        @wraps(f)
+        def decorated_function(*args, **kwargs):
+            limiter = current_app.rate_limiter
+            rates = current_app.config["RATE_LIMITS"][group]
+            scopes = {"global": "global", "ip": f"ip:{request.remote_addr}"}
+            if current_user.is_authenticated:
+                scopes["user"] = f"user:{current_user.id}"
+
+            limits = [(f"{group}:{subject}", *parse_rate(rates[scope]))
+                      for scope, subject in scopes.items() if rates.get(scope)]
+            retry_after, key = limiter.take(limits)
+            if retry_after:
+                scope = key.split(":")[1]
+                metrics.RATE_LIMITED.labels(request.endpoint, scope).inc()
+                response = jsonify({"error": "Too many requests. Please try again shortly."})
+                response.status_code = 429
+                response.headers["Retry-After"] = str(math.ceil(retry_after))
+                return response
+            return f(*args, **kwargs)
+        return decorated_function
+    return decorator
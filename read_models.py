@@ -0,0 +1,61 @@
+from collections import namedtuple
+from sqlalchemy import select
+from models import Candidate, Election
+from models.election import hours_until, local_time_label
+
+# Views and templates render these instead of ORM objects: they come from
+# column-only queries, skip the identity map and have no relationships to lazy-load
+
+ELECTION_FIELDS = ('id', 'election_name', 'election_type', 'max_votes', 'status', 'start_date', 'end_date',
+                   'counter_shards', 'ballot_type')
+
+CandidateMeta = namedtuple('CandidateMeta', ['id', 'name'])
+
+# A row of the election list, with its display values worked out once
+ElectionListing = namedtuple('ElectionListing', ['id', 'election_name', 'time_until_start', 'local_start_date'])
+
+
+class ElectionMeta(namedtuple('ElectionMeta', ELECTION_FIELDS + ('candidates',))):
+    """An election's settings and (id, name) candidates, in id order.
+
+    Stands in for an Election wherever only these are read: the vote and results
+    views, vote.html and the ElectionService vote, tally and introduction methods.
+    """
+    __slots__ = ()
+
+    is_active = Election.is_active
+
+    @property
+    def time_until_start(self):
+        return hours_until(self.start_date)
+
+    @property
+    def local_start_date(self):
+        return local_time_label(self.start_date)
+
+    @property
+    def local_end_date(self):
+        return local_time_label(self.end_date)
+
+
+def load_election_meta(session, election_id):
+    """ElectionMeta from two column-only queries, or None if there is no such election."""
+    row = session.execute(
+        select(*(getattr(Election, field) for field in ELECTION_FIELDS)).where(Election.id == election_id)
+    ).first()
+    if row is None:
+        return None
+    candidates = session.execute(
+        select(Candidate.id, Candidate.name).where(Candidate.election_id == election_id).order_by(Candidate.id)
+    ).all()
+    return ElectionMeta(*row, tuple(CandidateMeta(*candidate) for candidate in candidates))
+
+
+def ongoing_election_listings(session):
+    rows = session.execute(
+        select(Election.id, Election.election_name, Election.start_date)
+        .where(Election.status == 'ongoing')
+        .order_by(Election.id)
+    ).all()
+    return [ElectionListing(id, name, hours_until(start_date), local_time_label(start_date))
+            for id, name, start_date in rows]
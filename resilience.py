@@ -0,0 +1,284 @@
+import collections.abc
+import math
+import os
+import threading
+import time
+from contextlib import contextmanager
+from functools import wraps
+from types import SimpleNamespace
+import httpx
+import metrics
+
+try:
+    import fcntl
+except ImportError:  # Windows: bulkheads fall back to per-process semaphores
+    fcntl = None
+
+
+class DependencyUnavailable(Exception):
+    """Raised instead of calling a dependency whose breaker is open or whose bulkhead is full."""
+
+    def __init__(self, message, retry_after=1):
+        super().__init__(message)
+        self.retry_after = retry_after
+
+
+class CircuitOpenError(DependencyUnavailable):
+    pass
+
+
+class BulkheadFullError(DependencyUnavailable):
+    pass
+
+
+class DeadlineExceeded(TimeoutError):
+    pass
+
+
+def is_failure(exc):
+    """Client errors (4xx other than 408/429) are the caller's fault, not the dependency's."""
+    status = getattr(exc, 'status_code', None)
+    return not (isinstance(status, int) and 400 <= status < 500 and status not in (408, 429))
+
+
+class CircuitBreaker:
+    """Opens after consecutive failures; after reset_timeout lets one probe call through (half-open)."""
+
+    CLOSED, HALF_OPEN, OPEN = 'closed', 'half_open', 'open'
+    STATE_VALUES = {CLOSED: 0, HALF_OPEN: 1, OPEN: 2}
+
+    def __init__(self, name, failure_threshold=5, reset_timeout=30.0, clock=time.monotonic):
+        self.name = name
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.clock = clock
+        self._lock = threading.Lock()
+        self._state = self.CLOSED
+        self._failures = 0
+        self._opened_at = 0.0
+        self._probing = False
+        self._publish()
+
+    @property
+    def state(self):
+        with self._lock:
+            if self._state == self.OPEN and self.clock() - self._opened_at >= self.reset_timeout:
+                return self.HALF_OPEN
+            return self._state
+
+    def allow(self):
+        with self._lock:
+            if self._state == self.OPEN and self.clock() - self._opened_at >= self.reset_timeout:
+                self._set_state(self.HALF_OPEN)
+            if self._state == self.CLOSED:
+                return True
+            if self._state == self.HALF_OPEN and not self._probing:
+                self._probing = True
+                return True
+            return False
+
+    def record_success(self):
+        with self._lock:
+            self._failures = 0
+            self._probing = False
+            self._set_state(self.CLOSED)
+
+    def record_failure(self):
+        with self._lock:
+            self._failures += 1
+            self._probing = False
+            if self._state == self.HALF_OPEN or self._failures >= self.failure_threshold:
+                self._opened_at = self.clock()
+                self._set_state(self.OPEN)
+
+    def retry_after(self):
+        """Seconds until an open breaker allows a probe."""
+        with self._lock:
+            return max(1, math.ceil(self.reset_timeout - (self.clock() - self._opened_at)))
+
+    def release_probe(self):
+        """Give back a half-open probe slot that was never used."""
+        with self._lock:
+            self._probing = False
+
+    def _set_state(self, state):
+        self._state = state
+        self._publish()
+
+    def _publish(self):
+        metrics.CIRCUIT_BREAKER_STATE.labels(self.name).set(self.STATE_VALUES[self._state])
+
+
+class Bulkhead:
+    """At most max_concurrent calls at once across every gunicorn worker on the host.
+
+    Each slot is a lock file held with flock, so a crashed worker's slot frees itself.
+    """
+
+    def __init__(self, name, max_concurrent, directory, max_wait=0.0):
+        self.name = name
+        self.max_concurrent = max_concurrent
+        self.max_wait = max_wait
+        os.makedirs(directory, exist_ok=True)
+        self.paths = [os.path.join(directory, f"{name}-{i}.lock") for i in range(max_concurrent)]
+        self._semaphore = threading.BoundedSemaphore(max_concurrent)
+
+    def _try_acquire(self):
+        if fcntl is None:
+            return self._semaphore.acquire(blocking=False) and self._semaphore
+        for path in self.paths:
+            handle = open(path, 'a')
+            try:
+                fcntl.flock(handle, fcntl.LOCK_EX | fcntl.LOCK_NB)
+                return handle
+            except OSError:
+                handle.close()
+        return None
+
+    def _release(self, handle):
+        if fcntl is None:
+            handle.release()
+        else:
+            fcntl.flock(handle, fcntl.LOCK_UN)
+            handle.close()
+
+    def _full(self):
+        return BulkheadFullError(f"{self.name} is at its limit of {self.max_concurrent} concurrent calls")
+
+    @contextmanager
+    def slot(self):
+        deadline = time.monotonic() + self.max_wait
+        handle = self._try_acquire()
+        while handle is None and time.monotonic() < deadline:
+            time.sleep(0.05)
+            handle = self._try_acquire()
+        if handle is None:
+            raise self._full()
+        try:
+            yield
+        finally:
+            self._release(handle)
+
+
+class Guard:
+    """Breaker, bulkhead and an overall deadline around one external dependency.
+
+    The deadline covers every attempt: each one gets what is left of it as its
+    timeout, and retries happen here rather than inside the client.
+    """
+
+    def __init__(self, name, breaker, bulkhead, deadline, retries=0):
+        self.name = name
+        self.breaker = breaker
+        self.bulkhead = bulkhead
+        self.deadline = deadline
+        self.retries = retries
+
+    def _admit(self):
+        if not self.breaker.allow():
+            metrics.DEPENDENCY_REJECTIONS.labels(self.name, 'circuit_open').inc()
+            retry_after = self.breaker.retry_after()
+            raise CircuitOpenError(f"{self.name} is unavailable; retry in {retry_after}s", retry_after)
+
+    def _record(self, exc):
+        if exc is None or not is_failure(exc):
+            self.breaker.record_success()
+        else:
+            self.breaker.record_failure()
+
+    def _rejected(self):
+        self.breaker.release_probe()
+        metrics.DEPENDENCY_REJECTIONS.labels(self.name, 'bulkhead_full').inc()
+
+    def call(self, func, *args, drain=False, **kwargs):
+        """Sync call of func(timeout, *args, **kwargs), where timeout is the seconds left before the deadline."""
+        self._admit()
+        try:
+            with self.bulkhead.slot():
+                try:
+                    result = self._attempt(func, args, kwargs, drain)
+                except Exception as e:
+                    self._record(e)
+                    raise
+        except BulkheadFullError:
+            self._rejected()
+            raise
+        self._record(None)
+        return result
+
+    def _attempt(self, func, args, kwargs, drain):
+        deadline = time.monotonic() + self.deadline
+        for attempt in range(self.retries + 1):
+            try:
+                result = func(deadline - time.monotonic(), *args, **kwargs)
+                if drain and isinstance(result, collections.abc.Iterator):
+                    result = iter(self._drain(result, deadline))
+                return result
+            except Exception as e:
+                if attempt == self.retries or not is_failure(e) or time.monotonic() >= deadline:
+                    raise
+
+    def _drain(self, stream, deadline):
+        """Read a streamed response inside the guard, enforcing the overall deadline."""
+        chunks = []
+        for chunk in stream:
+            chunks.append(chunk)
+            if time.monotonic() > deadline:
+                raise DeadlineExceeded(f"{self.name} stream exceeded {self.deadline:g}s")
+        return chunks
+
+    def wrap(self, func, drain=False):
+        @wraps(func)
+        def guarded(*args, **kwargs):
+            return self.call(func, *args, drain=drain, **kwargs)
+        return guarded
+
+
+def pooled_http_client(max_connections):
+    """One keep-alive pool per process, shared by every provider client and thread.
+
+    Connections (and their TLS sessions) are reused across requests instead of
+    being opened per call; size it to the sum of the bulkheads of the clients
+    sharing it, which already cap their concurrent calls.
+    """
+    return httpx.Client(limits=httpx.Limits(max_connections=max_connections,
+                                            max_keepalive_connections=max_connections))
+
+
+# Guarded views of the provider clients, exposing only the calls the app makes.
+# Each call passes the guard's remaining budget as the request timeout; the
+# clients must be built with max_retries=0, since the guard does the retrying.
+
+class ResilientChatModel:
+    def __init__(self, model, guard):
+        self.model = model
+        self.guard = guard
+
+    def invoke(self, *args, **kwargs):
+        return self.guard.call(self._invoke, *args, **kwargs)
+
+    def _invoke(self, timeout, *args, **kwargs):
+        return self.model.invoke(*args, timeout=timeout, **kwargs)
+
+
+class ResilientOpenAI:
+    def __init__(self, client, guard):
+        self.client = client
+        self.guard = guard
+        transcriptions = SimpleNamespace(create=guard.wrap(self._transcribe))
+        self.audio = SimpleNamespace(transcriptions=transcriptions)
+
+    def _transcribe(self, timeout, **kwargs):
+        return self.client.audio.transcriptions.create(timeout=timeout, **kwargs)
+
+
+class ResilientElevenLabs:
+    def __init__(self, client, guard):
+        self.client = client
+        self.guard = guard
+        # The whole stream is read inside the guard, so the deadline covers it
+        self.text_to_speech = SimpleNamespace(convert=guard.wrap(self._convert, drain=True))
+
+    def _convert(self, timeout, **kwargs):
+        options = dict(kwargs.pop('request_options', None) or {}, timeout_in_seconds=timeout, max_retries=0)
+        return self.client.text_to_speech.convert(request_options=options, **kwargs)
@@ -0,0 +1,164 @@
+import csv
+import io
+import time
+from datetime import datetime, timedelta, timezone
+import click
+import numpy as np
+from werkzeug.security import generate_password_hash
+from extensions import db
+from models import Candidate, Election, User, VoteCounterShard
+
+# Relative turnout by hour of day (Pacific): quiet overnight, busiest at lunch and after work
+DIURNAL = np.array([0.10, 0.06, 0.04, 0.04, 0.05, 0.10, 0.25, 0.45, 0.60, 0.65, 0.70, 0.80,
+                    0.90, 0.80, 0.70, 0.70, 0.80, 0.95, 1.00, 0.95, 0.80, 0.60, 0.35, 0.20])
+PACIFIC_OFFSET_HOURS = -8
+
+ELECTION_DAYS = (1, 7)
+
+
+def bulk_insert(table, columns, rows):
+    """Insert tuples in column order: COPY on psycopg2, one executemany elsewhere."""
+    connection = db.session.connection()
+    if connection.dialect.driver == 'psycopg2':
+        buffer = io.StringIO()
+        csv.writer(buffer).writerows(rows)
+        buffer.seek(0)
+        with connection.connection.cursor() as cursor:
+            cursor.copy_expert(f"COPY {table} ({', '.join(columns)}) FROM STDIN WITH (FORMAT csv)", buffer)
+    else:
+        marker = '?' if connection.dialect.paramstyle == 'qmark' else '%s'
+        connection.exec_driver_sql(
+            f"INSERT INTO {table} ({', '.join(columns)}) VALUES ({', '.join([marker] * len(columns))})", rows
+        )
+
+
+def split_votes(rng, total, elections, cap):
+    """Votes per election: heavy-tailed popularity, no election over `cap` (one vote per user)."""
+    weights = rng.lognormal(sigma=1.0, size=elections)
+    counts = rng.multinomial(total, weights / weights.sum())
+    while (counts > cap).any():
+        overflow = int((counts - cap).clip(min=0).sum())
+        counts = counts.clip(max=cap)
+        room = cap - counts
+        counts += rng.multinomial(overflow, room / room.sum())
+    return counts
+
+
+def vote_times(rng, start, end, count):
+    """Sorted epoch seconds in [start, end): rushes at the open and the close, fewer votes overnight."""
+    times = np.empty(0)
+    while len(times) < count:
+        drawn = start + (end - start) * rng.beta(0.6, 0.6, size=2 * (count - len(times)) + 16)
+        hours = ((drawn / 3600 + PACIFIC_OFFSET_HOURS) % 24).astype(int)
+        times = np.concatenate([times, drawn[rng.random(len(drawn)) < DIURNAL[hours]]])
+    return np.sort(times[:count])
+
+
+def timestamp_strings(epoch_seconds):
+    # The format SQLAlchemy writes for DateTime; Postgres and SQL Server parse it too
+    return np.char.replace(
+        np.datetime_as_string((epoch_seconds * 1e6).astype(np.int64).astype('datetime64[us]'), unit='us'), 'T', ' '
+    ).tolist()
+
+
+def seed_users(count, prefix, password, batch_size):
+    # One hash for everyone: hashing is deliberately slow
+    password_hash = generate_password_hash(password)
+    for offset in range(0, count, batch_size):
+        bulk_insert('users', ('username', 'password_hash', 'role'), [
+            (f"{prefix}_user_{i}", password_hash, 'regular_user')
+            for i in range(offset, min(count, offset + batch_size))
+        ])
+        db.session.commit()
+    return np.array(db.session.scalars(
+        db.select(User.id).where(User.username.like(f"{prefix}\\_user\\_%", escape='\\')).order_by(User.id)
+    ).all())
+
+
+def seed_elections(rng, candidates, votes, days, counter_shards, prefix, now):
+    """(election, voting window start, end) per entry of votes; voting stops at now."""
+    elections = []
+    for i, vote_count in enumerate(votes):
+        start = now - timedelta(seconds=float(rng.uniform(1, days) * 86400))
+        end = start + timedelta(days=float(rng.uniform(*ELECTION_DAYS)))
+        election = Election(election_name=f"{prefix} election {i + 1}", election_type='custom',
+                            max_votes=int(vote_count), start_date=start, end_date=end,
+                            counter_shards=counter_shards)
+        db.session.add(election)
+        db.session.flush()
+        db.session.add_all(Candidate(name=f"Candidate {j + 1}", election_id=election.id) for j in range(candidates))
+        elections.append((election, start.timestamp(), min(end, now).timestamp()))
+    db.session.commit()
+    return elections
+
+
+def seed_votes(rng, election, start, end, user_ids, count, batch_size):
+    """Votes, user_votes and vote_events for one election; returns votes per candidate."""
+    candidate_ids = np.array(sorted(c.id for c in election.candidates))
+    shares = rng.dirichlet(np.ones(len(candidate_ids)))
+    voters = rng.choice(user_ids, size=count, replace=False)
+    choices = rng.choice(candidate_ids, size=count, p=shares)
+    times = vote_times(rng, start, end, count)
+
+    for offset in range(0, count, batch_size):
+        chunk = slice(offset, offset + batch_size)
+        stamps = timestamp_strings(times[chunk])
+        chosen = choices[chunk].tolist()
+        bulk_insert('votes', ('candidate_id', 'election_id', 'created_at'),
+                    [(candidate_id, election.id, stamp) for candidate_id, stamp in zip(chosen, stamps)])
+        bulk_insert('user_votes', ('user_id', 'election_id', 'created_at'),
+                    [(user_id, election.id, stamp) for user_id, stamp in zip(voters[chunk].tolist(), stamps)])
+        bulk_insert('vote_events', ('event_type', 'election_id', 'candidate_id', 'created_at'),
+                    [('vote_cast', election.id, candidate_id, stamp) for candidate_id, stamp in zip(chosen, stamps)])
+        db.session.commit()
+
+    return dict(zip(candidate_ids.tolist(), np.bincount(np.searchsorted(candidate_ids, choices),
+                                                        minlength=len(candidate_ids)).tolist()))
+
+
+def seed_shards(rng, election, totals):
+    for candidate_id, total in totals.items():
+        split = rng.multinomial(total, np.full(election.counter_shards, 1 / election.counter_shards))
+        db.session.add_all(VoteCounterShard(election_id=election.id, candidate_id=candidate_id, shard=shard,
+                                            count=int(n)) for shard, n in enumerate(split))
+    db.session.commit()
+
+
+@click.command('seed')
+@click.option('--users', default=1000, show_default=True)
+@click.option('--elections', default=10, show_default=True)
+@click.option('--candidates', default=5, show_default=True, help='Candidates per election.')
+@click.option('--votes', default=10000, show_default=True, help='Total across all elections.')
+@click.option('--days', default=30, show_default=True, help='Elections start within this many days before now.')
+@click.option('--counter-shards', default=0, show_default=True)
+@click.option('--seed', 'random_seed', default=0, show_default=True, help='Same seed, same data.')
+@click.option('--prefix', default='seed', show_default=True, help='Usernames and election names start with this.')
+@click.option('--password', default='password', show_default=True)
+@click.option('--batch-size', default=50000, show_default=True, help='Rows per INSERT/COPY and commit.')
+@click.option('--now', type=click.DateTime(), help='Treat this UTC time as now, for reproducible timestamps.')
+def seed_command(users, elections, candidates, votes, days, counter_shards, random_seed, prefix, password,
+                 batch_size, now):
+    """Fill the database with synthetic users, elections and votes for capacity testing."""
+    if votes > users * elections:
+        raise click.BadParameter(f"at most {users * elections} votes: each user votes once per election",
+                                 param_hint='--votes')
+    rng = np.random.default_rng(random_seed)
+    now = now.replace(tzinfo=timezone.utc) if now else datetime.now(timezone.utc)
+    started = time.perf_counter()
+
+    user_ids = seed_users(users, prefix, password, batch_size)
+    counts = split_votes(rng, votes, elections, len(user_ids))
+    seeded = seed_elections(rng, candidates, counts, days, counter_shards, prefix, now)
+    for (election, start, end), count in zip(seeded, counts.tolist()):
+        totals = seed_votes(rng, election, start, end, user_ids, count, batch_size)
+        if counter_shards:
+            seed_shards(rng, election, totals)
+        click.echo(f"{election.election_name}: {count} votes")
+
+    elapsed = time.perf_counter() - started
+    click.echo(f"Seeded {users} users, {elections} elections and {votes} votes in {elapsed:.1f}s "
+               f"({votes / elapsed if elapsed else 0:.0f} votes/s); run `flask tallies catch-up` to project them")
+
+
+def init_app(app):
+    app.cli.add_command(seed_command)
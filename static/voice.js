@@ -31,7 +31,7 @@ document.addEventListener("DOMContentLoaded", function () {
                 updateButtonState('Listening...', true, 'btn-warning');
 
                 mediaRecorder.ondataavailable = event => audioChunks.push(event.data);
-                mediaRecorder.onstop = async () => await handleRecordingStop(audioChunks);
+                mediaRecorder.onstop = async () => await handleRecordingStop(audioChunks, mediaRecorder.mimeType);
 
                 mediaRecorder.start();
                 console.log("Recording started");
@@ -43,12 +43,14 @@ document.addEventListener("DOMContentLoaded", function () {
             }
         }
 
-        async function handleRecordingStop(audioChunks) {
+        async function handleRecordingStop(audioChunks, mimeType) {
             console.log("Recording stopped");
 
-            const audioBlob = new Blob(audioChunks, { type: 'audio/wav' });
+            // Label the blob with what the browser actually recorded (usually WebM/Opus or MP4/AAC)
+            const type = mimeType || (audioChunks[0] && audioChunks[0].type) || 'application/octet-stream';
+            const audioBlob = new Blob(audioChunks, { type });
             const formData = new FormData();
-            formData.append('audio', audioBlob, 'voice_vote.wav');
+            formData.append('audio', audioBlob, 'voice_vote.' + audioExtension(type));
             formData.append('election_id', electionId);  // Pass election ID
 
             updateButtonState('Processing...', true);
@@ -92,6 +94,15 @@ document.addEventListener("DOMContentLoaded", function () {
             resetButtonState();
         }
 
+        function audioExtension(type) {
+            if (type.includes('webm')) return 'webm';
+            if (type.includes('ogg')) return 'ogg';
+            if (type.includes('mp4') || type.includes('aac')) return 'm4a';
+            if (type.includes('mpeg')) return 'mp3';
+            if (type.includes('wav')) return 'wav';
+            return 'bin';
+        }
+
         function updateButtonState(text, disabled, newClass = 'btn-secondary') {
             button.textContent = text;
             button.disabled = disabled;
@@ -0,0 +1,86 @@
+import numpy as np
+
+BALLOT_TYPES = ('single', 'approval', 'ranked')
+# Positions are stored one byte each; 255 marks an empty slot in ballot matrices
+MAX_CANDIDATES = 255
+EMPTY = 255
+
+
+def pack_choices(positions):
+    """Candidate positions -> compact ballot bytes."""
+    return np.asarray(positions, dtype=np.uint8).tobytes()
+
+
+def unpack_choices(data):
+    return np.frombuffer(data, dtype=np.uint8).tolist()
+
+
+def ballot_matrix(ballots):
+    """Pack ballot bytes into a (ballots x longest ballot) uint8 matrix padded with EMPTY."""
+    lengths = np.fromiter((len(b) for b in ballots), dtype=np.int64, count=len(ballots))
+    width = int(lengths.max()) if len(lengths) else 0
+    matrix = np.full((len(ballots), width), EMPTY, dtype=np.uint8)
+    if width:
+        flat = np.frombuffer(b''.join(ballots), dtype=np.uint8)
+        rows = np.repeat(np.arange(len(ballots)), lengths)
+        # Column of each choice within its ballot: index minus the ballot's start offset
+        starts = np.repeat(np.cumsum(lengths) - lengths, lengths)
+        matrix[rows, np.arange(len(flat)) - starts] = flat
+    return matrix
+
+
+def approval_counts(ballots, candidate_count):
+    """Approvals per candidate position."""
+    if not ballots:
+        return np.zeros(candidate_count, dtype=np.int64)
+    flat = np.frombuffer(b''.join(ballots), dtype=np.uint8)
+    return np.bincount(flat, minlength=candidate_count)[:candidate_count]
+
+
+def first_preferences(ballots, candidate_count):
+    """First-choice counts per candidate position."""
+    firsts = bytes(b[0] for b in ballots if b)
+    return np.bincount(np.frombuffer(firsts, dtype=np.uint8), minlength=candidate_count)[:candidate_count]
+
+
+def instant_runoff(ballots, candidate_count):
+    """Instant-runoff count over packed ranked ballots.
+
+    Each round counts every ballot for its highest-ranked continuing candidate,
+    then eliminates the last-placed candidates until one holds a majority of
+    the continuing ballots. Returns {"winner": position or None, "rounds": [counts, ...]};
+    winner is None when every remaining candidate is tied.
+    """
+    ballots = [b for b in ballots if b]
+    if not ballots:
+        return {"winner": None, "rounds": [np.zeros(candidate_count, dtype=np.int64)]}
+
+    prefs = ballot_matrix(ballots)
+    # Index candidate_count stands for EMPTY so lookups stay vectorized
+    prefs = np.where(prefs == EMPTY, candidate_count, prefs).astype(np.intp)
+    eliminated = np.zeros(candidate_count + 1, dtype=bool)
+    eliminated[candidate_count] = True
+    rows = np.arange(len(prefs))
+    rounds = []
+
+    while True:
+        continuing = ~eliminated[prefs]
+        has_choice = continuing.any(axis=1)
+        top = prefs[rows[has_choice], continuing[has_choice].argmax(axis=1)]
+        counts = np.bincount(top, minlength=candidate_count + 1)[:candidate_count]
+        rounds.append(counts)
+
+        remaining = np.flatnonzero(~eliminated[:candidate_count])
+        total = int(has_choice.sum())
+        if len(remaining) == 0 or total == 0:
+            return {"winner": None, "rounds": rounds}
+
+        leader = remaining[np.argmax(counts[remaining])]
+        if counts[leader] * 2 > total or len(remaining) == 1:
+            return {"winner": int(leader), "rounds": rounds}
+
+        lowest = counts[remaining].min()
+        losers = remaining[counts[remaining] == lowest]
+        if len(losers) == len(remaining):
+            return {"winner": None, "rounds": rounds}
+        eliminated[losers] = True
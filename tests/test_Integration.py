@@ -1,3 +1,4 @@
+import json
 import unittest
 from flask import url_for
 from application import create_app
@@ -11,7 +12,7 @@ sys.path.insert(0, os.path.abspath(".."))
 
 # Import Flask app, database, and models
 from application import create_app, db
-from models import User, Election, Candidate, Vote, UserVote
+from models import User, Election, Candidate, Vote, UserVote, VoteCounterShard
 
 class TestHomepage(unittest.TestCase):
     def setUp(self):
@@ -223,6 +224,84 @@ class TestIntegration(unittest.TestCase):
         self.assertIsNone(deleted_election)
 
 
+    @patch('flask_login.utils._get_user')
+    def test_admin_can_delete_sharded_election(self, mock_current_user):
+        # Counter shard rows are removed along with the election
+        mock_user = Mock()
+        mock_user.is_authenticated = True
+        mock_user.role = 'admin'
+        mock_current_user.return_value = mock_user
+
+        election_id = self.app.election_service.start_election(
+            ['Candidate A', 'Candidate B'], 10, 'General', 'Sharded Election', counter_shards=2
+        )
+        response = self.client.post(f'/delete_election/{election_id}', follow_redirects=True)
+        self.assertEqual(response.status_code, 200)
+        self.assertIsNone(db.session.get(Election, election_id))
+        self.assertEqual(VoteCounterShard.query.filter_by(election_id=election_id).count(), 0)
+
+    @patch('flask_login.utils._get_user')
+    def test_admin_can_export_votes_and_results(self, mock_current_user):
+        # Exports stream every vote and each candidate's tally as CSV or NDJSON
+        mock_user = Mock()
+        mock_user.is_authenticated = True
+        mock_user.role = 'admin'
+        mock_current_user.return_value = mock_user
+
+        election_id = self.app.election_service.start_election(['Candidate A', 'Candidate B'], 10, 'General', 'Export Election')
+        candidate_a = Candidate.query.filter_by(election_id=election_id, name='Candidate A').first()
+        db.session.add_all(Vote(candidate_id=candidate_a.id, election_id=election_id) for _ in range(3))
+        db.session.commit()
+
+        response = self.client.get(f'/export/{election_id}/votes.csv')
+        self.assertEqual(response.mimetype, 'text/csv')
+        self.assertTrue(response.is_streamed)
+        lines = response.get_data(as_text=True).splitlines()
+        self.assertEqual(lines[0], 'vote_id,candidate_id,candidate,created_at')
+        self.assertEqual(len(lines), 4)
+        self.assertIn('Candidate A', lines[1])
+
+        response = self.client.get(f'/export/{election_id}/results.ndjson')
+        self.assertEqual(response.mimetype, 'application/x-ndjson')
+        rows = [json.loads(line) for line in response.get_data(as_text=True).splitlines()]
+        self.assertEqual([(r['candidate'], r['votes']) for r in rows], [('Candidate A', 3), ('Candidate B', 0)])
+
+    @patch('flask_login.utils._get_user')
+    def test_ranked_election_export_lists_each_ballot(self, mock_current_user):
+        mock_user = Mock()
+        mock_user.is_authenticated = True
+        mock_user.role = 'admin'
+        mock_current_user.return_value = mock_user
+
+        election_id = self.app.election_service.start_election(
+            ['Candidate A', 'Candidate B', 'Candidate C'], 10, 'General', 'Ranked Export', ballot_type='ranked'
+        )
+        election = db.session.get(Election, election_id)
+        a, b, c = sorted(election.candidates, key=lambda candidate: candidate.id)
+        for user_id, ranking in ((1, [c.id, a.id]), (2, [b.id])):
+            self.app.election_service.record_ballot(user_id, election, ranking)
+
+        response = self.client.get(f'/export/{election_id}/votes.csv')
+        lines = response.get_data(as_text=True).splitlines()
+        self.assertEqual(lines[0], 'ballot_id,candidate_ids,candidates,created_at')
+        self.assertIn(f'{c.id};{a.id},Candidate C;Candidate A,', lines[1])
+        self.assertEqual(len(lines), 3)
+
+        response = self.client.get(f'/export/{election_id}/votes.ndjson')
+        rows = [json.loads(line) for line in response.get_data(as_text=True).splitlines()]
+        self.assertEqual([row['candidates'] for row in rows], [['Candidate C', 'Candidate A'], ['Candidate B']])
+        self.assertEqual(rows[0]['candidate_ids'], [c.id, a.id])
+
+    @patch('flask_login.utils._get_user')
+    def test_export_requires_admin(self, mock_current_user):
+        mock_user = Mock()
+        mock_user.is_authenticated = True
+        mock_user.role = 'regular_user'
+        mock_current_user.return_value = mock_user
+
+        response = self.client.get('/export/1/votes.csv')
+        self.assertEqual(response.status_code, 302)
+
     def test_view_all_elections(self):
         # Seeding: Manually add elections and ensure 'status' is set to 'ongoing'
         election1 = Election(election_name="Election 1", election_type="Local", max_votes=5, status="ongoing")
@@ -0,0 +1,173 @@
+import unittest
+from datetime import datetime, timedelta, timezone
+from sqlalchemy.dialects import mssql, postgresql
+from application import create_app
+from extensions import db
+from models import Election, Candidate, Vote, User, UserVote
+from turnout import bucket_expression
+from query_profiler import count_queries
+
+class TestReadApi(unittest.TestCase):
+    def setUp(self):
+        self.app = create_app('testing')
+        self.app_context = self.app.app_context()
+        self.app_context.push()
+        db.create_all()
+        self.client = self.app.test_client()
+
+        self.election = Election(election_name='API Election', election_type='test', max_votes=10, status='ongoing')
+        db.session.add(self.election)
+        db.session.flush()
+        self.candidate_a = Candidate(name='Candidate A', election_id=self.election.id)
+        self.candidate_b = Candidate(name='Candidate B', election_id=self.election.id)
+        db.session.add_all([self.candidate_a, self.candidate_b])
+        db.session.flush()
+        db.session.add(Vote(candidate_id=self.candidate_a.id, election_id=self.election.id))
+        db.session.commit()
+        self.election_id = self.election.id
+
+    def tearDown(self):
+        db.session.remove()
+        db.drop_all()
+        self.app_context.pop()
+
+    def test_list_elections(self):
+        response = self.client.get('/api/elections')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual([e['name'] for e in response.get_json()['elections']], ['API Election'])
+        self.assertIn('public', response.headers['Cache-Control'])
+        self.assertFalse(response.get_etag()[1])  # strong ETag
+
+    def test_election_detail_and_missing(self):
+        response = self.client.get(f'/api/elections/{self.election_id}')
+        self.assertEqual(sorted(c['name'] for c in response.get_json()['candidates']), ['Candidate A', 'Candidate B'])
+        self.assertEqual(self.client.get('/api/elections/9999').status_code, 404)
+
+    def test_results_payload(self):
+        response = self.client.get(f'/api/elections/{self.election_id}/results')
+        results = {r['candidate']: r['percentage'] for r in response.get_json()['results']}
+        self.assertEqual(results, {'Candidate A': 100.0, 'Candidate B': 0})
+
+    def test_results_not_modified_skips_tally(self):
+        etag = self.client.get(f'/api/elections/{self.election_id}/results').headers['ETag']
+        db.session.expire_all()
+
+        with count_queries() as stats:
+            response = self.client.get(f'/api/elections/{self.election_id}/results', headers={'If-None-Match': etag})
+        self.assertEqual(response.status_code, 304)
+        self.assertEqual(response.headers['ETag'], etag)
+        self.assertEqual(response.data, b'')
+        # Election lookup plus the version query; no candidate or vote loads
+        self.assertEqual(stats.count, 2)
+
+    def test_results_etag_changes_after_vote(self):
+        etag = self.client.get(f'/api/elections/{self.election_id}/results').headers['ETag']
+        db.session.add(Vote(candidate_id=self.candidate_b.id, election_id=self.election_id))
+        db.session.commit()
+
+        response = self.client.get(f'/api/elections/{self.election_id}/results', headers={'If-None-Match': etag})
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response.headers['ETag'], etag)
+
+    def test_sharded_results_etag_changes_after_vote(self):
+        election_id = self.app.election_service.start_election(['X', 'Y'], 10, 'custom', 'Sharded API', counter_shards=2)
+        election = db.session.get(Election, election_id)
+        etag = self.client.get(f'/api/elections/{election_id}/results').headers['ETag']
+
+        self.app.election_service.record_vote(1, election, election.candidates[0].id)
+        response = self.client.get(f'/api/elections/{election_id}/results', headers={'If-None-Match': etag})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.get_json()['results'][0], {'candidate': 'X', 'percentage': 100.0})
+
+    def test_election_list_not_modified(self):
+        etag = self.client.get('/api/elections').headers['ETag']
+        response = self.client.get('/api/elections', headers={'If-None-Match': etag})
+        self.assertEqual(response.status_code, 304)
+
+    def test_gzipped_json_gets_its_own_etag(self):
+        self.app.config['COMPRESS_MIN_SIZE'] = 0
+        for url in ('/api/elections', f'/api/elections/{self.election_id}/results'):
+            plain = self.client.get(url).headers['ETag']
+            response = self.client.get(url, headers={'Accept-Encoding': 'gzip'})
+            self.assertEqual(response.headers['Content-Encoding'], 'gzip')
+            gzipped = response.headers['ETag']
+            self.assertEqual(gzipped, plain[:-1] + '-gzip"')
+            self.assertFalse(response.get_etag()[1])
+
+            # Either form revalidates, and the 304 names the one the client holds
+            for etag in (plain, gzipped):
+                response = self.client.get(url, headers={'If-None-Match': etag, 'Accept-Encoding': 'gzip'})
+                self.assertEqual((response.status_code, response.headers['ETag']), (304, etag))
+
+class TestTurnoutSeries(unittest.TestCase):
+    def setUp(self):
+        self.app = create_app('testing')
+        self.app_context = self.app.app_context()
+        self.app_context.push()
+        db.create_all()
+        self.client = self.app.test_client()
+
+        self.election = Election(election_name='Turnout Election', election_type='test', max_votes=10)
+        db.session.add(self.election)
+        db.session.commit()
+        self.election_id = self.election.id
+        self.now = datetime.now(timezone.utc).replace(second=30, microsecond=0)
+        self.voters = 0
+
+    def tearDown(self):
+        db.session.remove()
+        db.drop_all()
+        self.app_context.pop()
+
+    def cast(self, at):
+        self.voters += 1
+        user = User(username=f'turnout_{self.voters}', password_hash='x')
+        db.session.add(user)
+        db.session.flush()
+        db.session.add(UserVote(user_id=user.id, election_id=self.election_id, created_at=at))
+        db.session.commit()
+
+    def turnout(self, granularity):
+        response = self.client.get(f'/api/elections/{self.election_id}/turnout?granularity={granularity}')
+        self.assertEqual(response.status_code, 200)
+        return [(b['start'], b['count']) for b in response.get_json()['buckets']]
+
+    def test_counts_per_bucket(self):
+        two_hours_ago = self.now - timedelta(hours=2)
+        self.cast(two_hours_ago)
+        self.cast(two_hours_ago + timedelta(seconds=10))
+        self.cast(self.now)
+
+        minutes = self.turnout('minute')
+        self.assertEqual([count for _, count in minutes], [2, 1])
+        self.assertEqual(minutes[0][0], two_hours_ago.replace(second=0).isoformat())
+        self.assertEqual([count for _, count in self.turnout('day')], [3] if two_hours_ago.day == self.now.day else [2, 1])
+
+    def test_closed_buckets_are_cached(self):
+        self.cast(self.now - timedelta(hours=3))
+        self.cast(self.now)
+        self.assertEqual([count for _, count in self.turnout('hour')], [1, 1])
+
+        # A late row in a closed bucket is not recounted; the open bucket stays live
+        self.cast(self.now - timedelta(hours=3))
+        self.cast(self.now)
+        self.assertEqual([count for _, count in self.turnout('hour')], [1, 2])
+
+        self.app.turnout_series.forget(self.election_id)
+        self.assertEqual([count for _, count in self.turnout('hour')], [2, 2])
+
+    def test_invalid_granularity(self):
+        response = self.client.get(f'/api/elections/{self.election_id}/turnout?granularity=week')
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(self.client.get('/api/elections/9999/turnout').status_code, 404)
+
+    def test_dialect_bucketing_sql(self):
+        pg = str(bucket_expression(UserVote.created_at, 'hour', 'postgresql').compile(dialect=postgresql.dialect()))
+        self.assertEqual(pg, "date_trunc('hour', user_votes.created_at)")
+        ms = str(bucket_expression(UserVote.created_at, 'day', 'mssql').compile(dialect=mssql.dialect()))
+        self.assertEqual(ms, "dateadd(day, datediff(day, 0, user_votes.created_at), 0)")
+        with self.assertRaises(ValueError):
+            bucket_expression(UserVote.created_at, 'hour', 'oracle')
+
+if __name__ == '__main__':
+    unittest.main()
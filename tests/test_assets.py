@@ -0,0 +1,87 @@
+import gzip
+import tempfile
+import unittest
+from unittest.mock import patch
+from flask import url_for
+from application import create_app
+from extensions import db
+import assets
+
+class TestStaticAssets(unittest.TestCase):
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        # Build before creating the app so init_app picks up the manifest
+        assets.build_assets('static', self.tmpdir.name)
+        with patch.dict('os.environ', {"ASSET_BUILD_DIR": self.tmpdir.name}):
+            self.app = create_app('testing')
+        self.app_context = self.app.app_context()
+        self.app_context.push()
+        db.create_all()
+        self.client = self.app.test_client()
+
+    def tearDown(self):
+        db.session.remove()
+        db.drop_all()
+        self.app_context.pop()
+        self.tmpdir.cleanup()
+
+    def static_url(self, filename):
+        with self.app.test_request_context():
+            return url_for('static', filename=filename)
+
+    def test_url_for_static_is_fingerprinted(self):
+        url = self.static_url('styles.css')
+        self.assertRegex(url, r'^/static/styles\.[0-9a-f]{12}\.css$')
+        response = self.client.get('/')
+        self.assertIn(url.encode(), response.data)
+
+    def test_fingerprinted_asset_is_immutable(self):
+        response = self.client.get(self.static_url('styles.css'))
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.mimetype, 'text/css')
+        self.assertIn('immutable', response.headers['Cache-Control'])
+        self.assertIn('max-age=31536000', response.headers['Cache-Control'])
+        self.assertNotIn('Content-Encoding', response.headers)
+        with open('static/styles.css', 'rb') as f:
+            self.assertEqual(response.data, f.read())
+        response.close()
+
+    def test_precompressed_variant_is_served(self):
+        response = self.client.get(self.static_url('styles.css'), headers={'Accept-Encoding': 'gzip'})
+        self.assertEqual(response.headers['Content-Encoding'], 'gzip')
+        self.assertEqual(response.mimetype, 'text/css')
+        self.assertIn('Accept-Encoding', response.headers['Vary'])
+        with open('static/styles.css', 'rb') as f:
+            self.assertEqual(gzip.decompress(response.data), f.read())
+        response.close()
+
+    def test_plain_static_path_still_served(self):
+        response = self.client.get('/static/styles.css')
+        self.assertEqual(response.status_code, 200)
+        self.assertNotIn('immutable', response.headers.get('Cache-Control', ''))
+        response.close()
+
+    def test_html_responses_are_gzipped(self):
+        response = self.client.get('/', headers={'Accept-Encoding': 'gzip, deflate'})
+        self.assertEqual(response.headers['Content-Encoding'], 'gzip')
+        self.assertIn(b'</html>', gzip.decompress(response.data))
+
+        response = self.client.get('/')
+        self.assertNotIn('Content-Encoding', response.headers)
+
+    def test_small_json_is_not_compressed(self):
+        response = self.client.get('/healthz', headers={'Accept-Encoding': 'gzip'})
+        self.assertNotIn('Content-Encoding', response.headers)
+
+    def test_manifest_hashes_content(self):
+        self.assertEqual(
+            assets.fingerprinted_name('app.js', b'one'),
+            assets.fingerprinted_name('app.js', b'one')
+        )
+        self.assertNotEqual(
+            assets.fingerprinted_name('app.js', b'one'),
+            assets.fingerprinted_name('app.js', b'two')
+        )
+
+if __name__ == '__main__':
+    unittest.main()
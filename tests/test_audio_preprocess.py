@@ -0,0 +1,113 @@
+import io
+import os
+import shutil
+import stat
+import sys
+import tempfile
+import unittest
+import wave
+from unittest.mock import patch
+import numpy as np
+from audio_preprocess import TARGET_RATE, RecordingTooLong, detect_format, preprocess, read_wav, read_wav_mono, resample
+
+FIXTURES = os.path.join(os.path.dirname(__file__), 'fixtures')
+
+# tone_stereo_22k.wav: 22.05 kHz 16-bit stereo, 0.3 s of -60 dBFS noise, 0.4 s of
+# 440 Hz tone (quieter on the right), 0.3 s of noise.
+# silence_mono_8k_u8.wav: 0.5 s of 8-bit digital silence.
+
+def fixture(name):
+    with open(os.path.join(FIXTURES, name), 'rb') as f:
+        return io.BytesIO(f.read())
+
+class TestAudioPreprocess(unittest.TestCase):
+    def test_detect_format_ignores_the_label(self):
+        self.assertEqual(detect_format(fixture('tone_stereo_22k.wav').read(16)), 'wav')
+        self.assertEqual(detect_format(b'\x1aE\xdf\xa3\x9fB\x86\x81\x01'), 'webm')
+        self.assertEqual(detect_format(b'OggS\x00\x02'), 'ogg')
+        self.assertEqual(detect_format(b'\x00\x00\x00\x1cftypM4A '), 'mp4')
+        self.assertEqual(detect_format(b'ID3\x04\x00'), 'mp3')
+        self.assertEqual(detect_format(b'\xff\xfb\x90\x64'), 'mp3')
+        self.assertIsNone(detect_format(b'not audio at all'))
+
+    def test_wav_is_trimmed_downmixed_and_resampled(self):
+        audio = preprocess(fixture('tone_stereo_22k.wav'))
+        self.assertEqual((audio.filename, audio.content_type), ('voice_vote.wav', 'audio/wav'))
+        # 0.4 s of tone plus up to 0.1 s of padding each side, rounded to 20 ms frames
+        self.assertGreater(audio.duration, 0.38)
+        self.assertLess(audio.duration, 0.66)
+
+        with wave.open(audio.stream, 'rb') as wav:
+            self.assertEqual((wav.getframerate(), wav.getnchannels(), wav.getsampwidth()), (TARGET_RATE, 1, 2))
+        audio.stream.seek(0)
+        size = len(audio.stream.read())
+        self.assertLess(size, len(fixture('tone_stereo_22k.wav').getvalue()) / 4)
+
+    def test_resampling_keeps_the_tone(self):
+        samples, rate = read_wav(fixture('tone_stereo_22k.wav'))
+        mono = resample(samples.mean(axis=1), rate)
+        spectrum = np.abs(np.fft.rfft(mono))
+        peak_hz = np.argmax(spectrum) * TARGET_RATE / len(mono)
+        self.assertAlmostEqual(peak_hz, 440, delta=5)
+
+    def test_chunked_mono_mix_matches_the_whole_file(self):
+        samples, rate = read_wav(fixture('tone_stereo_22k.wav'))
+        with patch('audio_preprocess.READ_FRAMES', 1000):
+            mono, mono_rate = read_wav_mono(fixture('tone_stereo_22k.wav'))
+        self.assertEqual(mono_rate, rate)
+        np.testing.assert_allclose(mono, samples.mean(axis=1), atol=1e-6)
+
+    def test_decoding_stops_past_the_length_limit(self):
+        # The fixture is 1 s long, silence included
+        with patch('audio_preprocess.READ_FRAMES', 1000), self.assertRaises(RecordingTooLong):
+            preprocess(fixture('tone_stereo_22k.wav'), max_seconds=0.5)
+        self.assertGreater(preprocess(fixture('tone_stereo_22k.wav'), max_seconds=1.5).duration, 0.38)
+
+    def test_silent_recording_has_zero_duration(self):
+        self.assertEqual(preprocess(fixture('silence_mono_8k_u8.wav')).duration, 0)
+
+    @unittest.skipIf(shutil.which('ffmpeg'), "ffmpeg would decode it")
+    def test_undecodable_upload_passes_through_with_its_real_label(self):
+        upload = io.BytesIO(b'\x1aE\xdf\xa3' + b'\0' * 100)
+        audio = preprocess(upload)
+        self.assertEqual((audio.filename, audio.content_type, audio.duration), ('voice_vote.webm', 'audio/webm', None))
+        self.assertIs(audio.stream, upload)
+        self.assertEqual(audio.stream.tell(), 0)
+
+    @unittest.skipUnless(shutil.which('ffmpeg'), "ffmpeg is not installed")
+    def test_ffmpeg_decodes_other_containers(self):
+        import subprocess
+        source = fixture('tone_stereo_22k.wav').getvalue()
+        ogg = subprocess.run(['ffmpeg', '-loglevel', 'error', '-i', 'pipe:0', '-f', 'ogg', 'pipe:1'],
+                             input=source, capture_output=True, check=True).stdout
+        audio = preprocess(io.BytesIO(ogg))
+        self.assertEqual(audio.content_type, 'audio/wav')
+        self.assertGreater(audio.duration, 0.3)
+
+    def fake_decoder(self, body):
+        """A stand-in ffmpeg: a script that drains stdin, then runs body."""
+        directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, directory)
+        path = os.path.join(directory, 'ffmpeg')
+        with open(path, 'w') as f:
+            f.write(f"#!{sys.executable}\nimport shutil, sys\nsys.stdin.buffer.read()\n{body}\n")
+        os.chmod(path, os.stat(path).st_mode | stat.S_IEXEC)
+        return patch('audio_preprocess.shutil.which', return_value=path)
+
+    def test_decoder_output_is_streamed_through_a_file(self):
+        wav_path = os.path.join(FIXTURES, 'tone_stereo_22k.wav')
+        upload = io.BytesIO(b'\x1aE\xdf\xa3' + os.urandom(512 * 1024))
+        with self.fake_decoder(f"shutil.copyfileobj(open({wav_path!r}, 'rb'), sys.stdout.buffer)"):
+            audio = preprocess(upload, spool_bytes=4096)
+        self.assertEqual(audio.content_type, 'audio/wav')
+        self.assertGreater(audio.duration, 0.38)
+
+    def test_failed_decode_passes_through(self):
+        upload = io.BytesIO(b'OggS' + b'\0' * 100)
+        with self.fake_decoder("sys.exit(1)"), self.assertLogs(level='WARNING'):
+            audio = preprocess(upload)
+        self.assertEqual((audio.filename, audio.content_type, audio.duration), ('voice_vote.ogg', 'audio/ogg', None))
+        self.assertIs(audio.stream, upload)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,85 @@
+import unittest
+from unittest.mock import patch
+from sqlalchemy import update
+from application import create_app
+from extensions import db
+from models import CacheVersion, Candidate, Election
+from election_cache import ElectionCache
+from read_models import CandidateMeta
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+class TestElectionCache(unittest.TestCase):
+    def setUp(self):
+        self.app = create_app('testing')
+        self.app_context = self.app.app_context()
+        self.app_context.push()
+        db.create_all()
+        self.election_id = self.app.election_service.start_election(['Alice', 'Bob'], 10, 'custom', 'Cached')
+        self.clock = FakeClock()
+        self.cache = ElectionCache(db, check_seconds=5, clock=self.clock)
+
+    def tearDown(self):
+        db.session.remove()
+        db.drop_all()
+        self.app_context.pop()
+
+    def test_metadata_is_loaded_once(self):
+        with patch.object(self.cache, '_load', wraps=self.cache._load) as load:
+            first = self.cache.get(self.election_id)
+            second = self.cache.get(str(self.election_id))
+        self.assertIs(first, second)
+        self.assertEqual(load.call_count, 1)
+
+        self.assertEqual((first.election_name, first.status, first.ballot_type), ('Cached', 'ongoing', 'single'))
+        alice, bob = first.candidates
+        self.assertEqual((alice.name, bob.name), ('Alice', 'Bob'))
+        self.assertIsInstance(alice, CandidateMeta)
+        self.assertTrue(first.is_active)
+
+    def test_unknown_election_is_none(self):
+        self.assertIsNone(self.cache.get(self.election_id + 1000))
+        self.assertIsNone(self.cache.get('not-an-id'))
+
+    def test_status_change_in_this_process_invalidates_at_once(self):
+        self.cache.get(self.election_id)
+        election = db.session.get(Election, self.election_id)
+        election.status = 'closed'
+        db.session.commit()
+
+        self.assertEqual(self.cache.get(self.election_id).status, 'closed')
+
+    def test_rolled_back_change_keeps_the_version(self):
+        self.cache.get(self.election_id)
+        version = db.session.get(CacheVersion, 'elections').version
+        db.session.add(Candidate(name='Carol', election_id=self.election_id))
+        db.session.flush()
+        db.session.rollback()
+        self.assertEqual(db.session.get(CacheVersion, 'elections').version, version)
+
+    def test_other_process_changes_are_seen_after_check_interval(self):
+        self.cache.get(self.election_id)
+        # Another worker closed the election and bumped the version row
+        with db.engine.begin() as connection:
+            connection.execute(update(Election).where(Election.id == self.election_id).values(status='closed'))
+            connection.execute(update(CacheVersion).values(version=CacheVersion.version + 1))
+
+        self.assertEqual(self.cache.get(self.election_id).status, 'ongoing')
+        self.clock.now += 6
+        self.assertEqual(self.cache.get(self.election_id).status, 'closed')
+
+    def test_deleted_election_is_forgotten(self):
+        self.cache.get(self.election_id)
+        Candidate.query.filter_by(election_id=self.election_id).delete()
+        db.session.delete(db.session.get(Election, self.election_id))
+        db.session.commit()
+
+        self.assertIsNone(self.cache.get(self.election_id))
+
+if __name__ == '__main__':
+    unittest.main()
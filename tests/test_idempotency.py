@@ -0,0 +1,99 @@
+import unittest
+from datetime import datetime, timedelta, timezone
+from unittest.mock import patch
+from application import create_app
+from extensions import db
+from models import Election, Candidate, User, Vote, UserVote, IdempotencyKey
+from query_profiler import count_queries
+
+class TestIdempotencyKeys(unittest.TestCase):
+    def setUp(self):
+        self.app = create_app('testing')
+        self.app_context = self.app.app_context()
+        self.app_context.push()
+        db.create_all()
+        self.client = self.app.test_client()
+
+        self.election = Election(election_name='Idempotent Election', election_type='test', max_votes=10, status='ongoing')
+        db.session.add(self.election)
+        db.session.flush()
+        self.candidate = Candidate(name='Candidate A', election_id=self.election.id)
+        db.session.add(self.candidate)
+        db.session.commit()
+
+        self.client.post('/register', data={'username': 'voter', 'password': 'secret'})
+        self.client.post('/login', data={'username': 'voter', 'password': 'secret'})
+
+    def tearDown(self):
+        db.session.remove()
+        db.drop_all()
+        self.app_context.pop()
+
+    def voice_vote(self, key):
+        return self.client.post('/voice_vote', json={'transcript': 'candidate a', 'election_id': self.election.id},
+                                headers={'Idempotency-Key': key})
+
+    def test_voice_vote_replay_returns_original_response(self):
+        first = self.voice_vote('vote-1')
+        self.assertEqual(first.status_code, 200)
+
+        with count_queries() as stats:
+            replay = self.voice_vote('vote-1')
+        self.assertEqual(replay.status_code, 200)
+        self.assertEqual(replay.get_json(), first.get_json())
+        self.assertEqual(replay.headers['Idempotent-Replayed'], 'true')
+        touched_votes = [s for s in stats.statements if 'FROM votes' in s or 'user_votes' in s or 'INSERT' in s]
+        self.assertEqual(touched_votes, [])
+        self.assertEqual(Vote.query.count(), 1)
+        self.assertEqual(UserVote.query.count(), 1)
+
+    def test_form_vote_replay_returns_original_redirect(self):
+        first = self.client.post(f'/vote/{self.election.id}', data={'candidate': self.candidate.id},
+                                 headers={'Idempotency-Key': 'form-1'})
+        replay = self.client.post(f'/vote/{self.election.id}', data={'candidate': self.candidate.id},
+                                  headers={'Idempotency-Key': 'form-1'})
+        self.assertEqual(first.status_code, 302)
+        self.assertEqual(replay.status_code, 302)
+        self.assertEqual(replay.headers['Location'], first.headers['Location'])
+        self.assertEqual(Vote.query.count(), 1)
+
+    def test_key_reused_on_other_path_is_rejected(self):
+        self.voice_vote('shared-key')
+        response = self.client.post(f'/vote/{self.election.id}', data={'candidate': self.candidate.id},
+                                    headers={'Idempotency-Key': 'shared-key'})
+        self.assertEqual(response.status_code, 422)
+
+    def test_without_key_duplicate_is_rejected_normally(self):
+        self.client.post('/voice_vote', json={'transcript': 'candidate a', 'election_id': self.election.id})
+        response = self.client.post('/voice_vote', json={'transcript': 'candidate a', 'election_id': self.election.id})
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(IdempotencyKey.query.count(), 0)
+
+    def test_body_is_stored_compressed(self):
+        first = self.voice_vote('vote-2')
+        record = IdempotencyKey.query.filter_by(key='vote-2').one()
+        self.assertEqual(record.status_code, 200)
+        self.assertNotEqual(record.body, first.get_data())
+
+    def test_expired_key_runs_the_view_again(self):
+        self.voice_vote('vote-3')
+        record = IdempotencyKey.query.filter_by(key='vote-3').one()
+        record.expires_at = datetime.now(timezone.utc) - timedelta(seconds=1)
+        db.session.commit()
+
+        response = self.voice_vote('vote-3')
+        self.assertEqual(response.status_code, 400)
+        self.assertNotIn('Idempotent-Replayed', response.headers)
+        self.assertEqual(IdempotencyKey.query.filter_by(key='vote-3').count(), 1)
+
+    def test_server_errors_are_not_stored(self):
+        with patch.object(self.app.election_service, 'record_vote', side_effect=RuntimeError('database down')):
+            response = self.voice_vote('vote-4')
+        self.assertEqual(response.status_code, 500)
+        self.assertEqual(IdempotencyKey.query.count(), 0)
+
+        response = self.voice_vote('vote-4')
+        self.assertEqual(response.status_code, 200)
+
+if __name__ == '__main__':
+    unittest.main()
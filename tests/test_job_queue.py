@@ -0,0 +1,224 @@
+import unittest
+from datetime import timedelta
+from unittest.mock import patch
+from application import create_app
+from extensions import db
+from models import Election, Job, User
+from job_queue import JobWorker, claim_next, enqueue, handler, run_job, utcnow
+from resilience import CircuitOpenError
+
+calls = []
+
+@handler('test_flaky')
+def flaky(fail_times, error='boom'):
+    calls.append(fail_times)
+    if len(calls) <= fail_times:
+        if error == 'circuit':
+            raise CircuitOpenError("provider is unavailable", retry_after=120)
+        raise RuntimeError(error)
+    return {"calls": len(calls)}
+
+class TestJobQueue(unittest.TestCase):
+    def setUp(self):
+        self.app = create_app('testing')
+        self.app.config['JOBS_EAGER'] = False
+        self.app_context = self.app.app_context()
+        self.app_context.push()
+        db.create_all()
+        self.worker = JobWorker(self.app)
+        calls.clear()
+
+    def tearDown(self):
+        db.session.remove()
+        db.drop_all()
+        self.app_context.pop()
+
+    def make_due(self, job):
+        job.run_after = utcnow() - timedelta(seconds=1)
+        db.session.commit()
+
+    def test_worker_runs_queued_job(self):
+        job = enqueue('test_flaky', {'fail_times': 0})
+        self.assertEqual(job.status, 'queued')
+        self.assertEqual(self.worker.run_pending(), 1)
+
+        db.session.refresh(job)
+        self.assertEqual(job.status, 'succeeded')
+        self.assertEqual((job.result, job.result_type), (b'{"calls": 1}', 'application/json'))
+        self.assertEqual(self.worker.run_pending(), 0)
+
+    def test_failures_retry_with_backoff_then_fail(self):
+        job = enqueue('test_flaky', {'fail_times': 5}, max_attempts=2)
+        self.worker.run_pending()
+        db.session.refresh(job)
+        self.assertEqual((job.status, job.attempts, job.error), ('queued', 1, 'boom'))
+        self.assertGreater(job.run_after.replace(tzinfo=None), utcnow().replace(tzinfo=None))
+
+        # Not due yet, so nothing runs
+        self.assertEqual(self.worker.run_pending(), 0)
+
+        self.make_due(job)
+        self.worker.run_pending()
+        db.session.refresh(job)
+        self.assertEqual((job.status, job.attempts), ('failed', 2))
+        self.assertIsNotNone(job.finished_at)
+
+    def test_open_circuit_delays_retry_until_retry_after(self):
+        job = enqueue('test_flaky', {'fail_times': 1, 'error': 'circuit'})
+        self.worker.run_pending()
+        db.session.refresh(job)
+        delay = job.run_after.replace(tzinfo=None) - utcnow().replace(tzinfo=None)
+        self.assertGreater(delay, timedelta(seconds=110))
+
+        self.make_due(job)
+        self.worker.run_pending()
+        db.session.refresh(job)
+        self.assertEqual(job.status, 'succeeded')
+
+    def test_job_is_claimed_once(self):
+        enqueue('test_flaky', {'fail_times': 0})
+        self.assertIsNotNone(claim_next('worker-a'))
+        self.assertIsNone(claim_next('worker-b'))
+
+    def test_expired_lease_is_reclaimed(self):
+        job = enqueue('test_flaky', {'fail_times': 0})
+        claim_next('worker-a')
+        # worker-a died mid-job
+        job.locked_at = utcnow() - timedelta(hours=1)
+        db.session.commit()
+
+        reclaimed = claim_next('worker-b')
+        self.assertEqual((reclaimed.id, reclaimed.locked_by, reclaimed.attempts), (job.id, 'worker-b', 2))
+        run_job(reclaimed)
+        self.assertEqual(reclaimed.status, 'succeeded')
+
+    def test_audio_for_deleted_election_fails_without_retrying(self):
+        job = enqueue('candidates_audio', {'election_id': 12345}, max_attempts=3)
+        with patch('application.ElectionService.generate_introduction_audio') as mock_generate:
+            self.worker.run_pending()
+        db.session.refresh(job)
+        self.assertEqual((job.status, job.attempts), ('failed', 1))
+        self.assertEqual(job.error, "Election 12345 no longer exists.")
+        mock_generate.assert_not_called()
+
+    @patch('application.ElectionService.get_restaurant_candidates', return_value=['Bistro One', 'Dine Delight'])
+    def test_restaurant_election_retry_returns_the_jobs_own_election(self, mock_candidates):
+        job = enqueue('restaurant_election', {'city': 'Seattle', 'state': 'WA', 'number_of_restaurants': 2,
+                                              'max_votes': 10, 'election_name': 'Lunch'})
+        claimed = claim_next('worker-a')
+        # worker-a dies after the election is committed but before the job is marked done
+        with patch('job_queue.finish', side_effect=RuntimeError('worker died')), self.assertRaises(RuntimeError):
+            run_job(claimed)
+        job = db.session.get(Job, job.id)
+        job.locked_at = utcnow() - timedelta(hours=1)
+        db.session.commit()
+
+        run_job(claim_next('worker-b'))
+        db.session.refresh(job)
+        self.assertEqual(job.status, 'succeeded')
+        election = Election.query.filter_by(election_name='Lunch').one()
+        self.assertEqual(job.result, f'{{"election_id": {election.id}}}'.encode())
+        mock_candidates.assert_called_once()
+
+    @patch('application.ElectionService.get_restaurant_candidates', return_value=['Bistro One', 'Dine Delight'])
+    def test_reused_restaurant_election_name_fails_before_gpt(self, mock_candidates):
+        payload = {'city': 'Seattle', 'state': 'WA', 'number_of_restaurants': 2, 'max_votes': 10,
+                   'election_name': 'Lunch'}
+        first = enqueue('restaurant_election', payload)
+        second = enqueue('restaurant_election', payload)
+        self.worker.run_pending()
+
+        db.session.refresh(first)
+        db.session.refresh(second)
+        self.assertEqual(first.status, 'succeeded')
+        self.assertEqual((second.status, second.attempts), ('failed', 1))
+        self.assertEqual(second.error, "An election named 'Lunch' already exists.")
+        mock_candidates.assert_called_once()
+
+    @patch('application.ElectionService.get_restaurant_candidates')
+    def test_invalid_restaurant_election_settings_fail_before_gpt(self, mock_candidates):
+        payload = {'city': 'Seattle', 'state': 'WA', 'number_of_restaurants': 2, 'max_votes': 10}
+        jobs = [enqueue('restaurant_election', dict(payload, election_name='Bad ballot', ballot_type='borda')),
+                enqueue('restaurant_election', dict(payload, election_name='Bad shards', counter_shards=-1))]
+        self.worker.run_pending()
+
+        for job in jobs:
+            db.session.refresh(job)
+            self.assertEqual((job.status, job.attempts), ('failed', 1))
+        mock_candidates.assert_not_called()
+
+    def test_restaurant_election_name_taken_during_gpt_fails_without_retrying(self):
+        def take_the_name(*args):
+            db.session.add(Election(election_name='Lunch', election_type='custom', max_votes=1))
+            db.session.commit()
+            return ['Bistro One', 'Dine Delight']
+
+        job = enqueue('restaurant_election', {'city': 'Seattle', 'state': 'WA', 'number_of_restaurants': 2,
+                                              'max_votes': 10, 'election_name': 'Lunch'}, max_attempts=3)
+        with patch('application.ElectionService.get_restaurant_candidates', side_effect=take_the_name) as mock_candidates:
+            self.worker.run_pending()
+        db.session.refresh(job)
+        self.assertEqual((job.status, job.attempts), ('failed', 1))
+        self.assertEqual(job.error, "An election named 'Lunch' already exists.")
+        mock_candidates.assert_called_once()
+
+    def test_unknown_kind_is_rejected(self):
+        with self.assertRaises(ValueError):
+            enqueue('no_such_job', {})
+
+class TestJobEndpoints(unittest.TestCase):
+    def setUp(self):
+        self.app = create_app('testing')
+        self.app.config['RATE_LIMITS'] = {'ai': {'user': '', 'ip': '', 'global': ''}}
+        self.app_context = self.app.app_context()
+        self.app_context.push()
+        db.create_all()
+        self.client = self.app.test_client()
+        self.client.post('/register', data={'username': 'voter', 'password': 'secret'})
+        self.client.post('/login', data={'username': 'voter', 'password': 'secret'})
+        self.election_id = self.app.election_service.start_election(['Alice', 'Bob'], 10, 'custom', 'Jobs')
+
+    def tearDown(self):
+        db.session.remove()
+        db.drop_all()
+        self.app_context.pop()
+
+    @patch('application.ElectionService.generate_gpt4_text_introduction', return_value=["Introducing Alice!"])
+    @patch('flask.current_app.elevenclient.text_to_speech.convert', return_value=iter([b"mp3 bytes"]))
+    def test_generate_audio_as_a_job(self, mock_convert, mock_generate_text):
+        response = self.client.post('/generate-candidates-audio', json={'election_id': self.election_id},
+                                    headers={'Prefer': 'respond-async'})
+        self.assertEqual(response.status_code, 202)
+        self.assertEqual(response.headers['Preference-Applied'], 'respond-async')
+        job = response.get_json()
+
+        status = self.client.get(response.headers['Location']).get_json()
+        self.assertEqual(status['status'], 'succeeded')
+        result = self.client.get(status['result_url'])
+        self.assertEqual((result.data, result.mimetype), (b"mp3 bytes", 'audio/mpeg'))
+        self.assertEqual(job['id'], status['id'])
+
+    def test_pending_job_result_is_409(self):
+        job = Job(id='a' * 32, kind='candidates_audio', payload='{}', status='queued', attempts=0,
+                  max_attempts=3, run_after=utcnow())
+        db.session.add(job)
+        db.session.commit()
+        self.assertEqual(self.client.get(f'/jobs/{job.id}').get_json()['status'], 'queued')
+        self.assertEqual(self.client.get(f'/jobs/{job.id}/result').status_code, 409)
+
+    def test_other_users_jobs_are_hidden(self):
+        owner = User(username='owner', password_hash='x')
+        db.session.add(owner)
+        db.session.commit()
+        job = Job(id='b' * 32, kind='candidates_audio', payload='{}', status='queued', attempts=0,
+                  max_attempts=3, run_after=utcnow(), user_id=owner.id)
+        db.session.add(job)
+        db.session.commit()
+
+        self.assertEqual(self.client.get(f'/jobs/{job.id}').status_code, 404)
+        self.client.post('/register', data={'username': 'other', 'password': 'secret'})
+        self.client.post('/login', data={'username': 'other', 'password': 'secret'})
+        self.assertEqual(self.client.get(f'/jobs/{job.id}').status_code, 404)
+
+if __name__ == '__main__':
+    unittest.main()
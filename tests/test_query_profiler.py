@@ -0,0 +1,84 @@
+import unittest
+from application import create_app
+from extensions import db
+from models import Election, Candidate, Vote
+from query_profiler import statement_shape, assert_max_queries, count_queries
+
+class TestQueryProfiler(unittest.TestCase):
+    def setUp(self):
+        self.app = create_app('testing')
+        self.app_context = self.app.app_context()
+        self.app_context.push()
+        db.create_all()
+        self.client = self.app.test_client()
+
+        # Election with three candidates, each holding a vote
+        self.election = Election(election_name='Profiled Election', election_type='test', max_votes=100)
+        db.session.add(self.election)
+        db.session.flush()
+        for name in ['Candidate A', 'Candidate B', 'Candidate C']:
+            candidate = Candidate(name=name, election_id=self.election.id)
+            db.session.add(candidate)
+            db.session.flush()
+            db.session.add(Vote(candidate_id=candidate.id, election_id=self.election.id))
+        db.session.commit()
+        db.session.expire_all()
+
+    def tearDown(self):
+        db.session.remove()
+        db.drop_all()
+        self.app_context.pop()
+
+    def test_statement_shape_ignores_literals_and_in_lists(self):
+        self.assertEqual(
+            statement_shape("SELECT * FROM votes WHERE id = 1 AND name = 'a'"),
+            statement_shape("SELECT *  FROM votes\n WHERE id = 42 AND name = 'b'")
+        )
+        self.assertEqual(
+            statement_shape("SELECT * FROM votes WHERE id IN (?, ?, ?)"),
+            statement_shape("SELECT * FROM votes WHERE id IN (?)")
+        )
+
+    def test_index_query_budget(self):
+        with assert_max_queries(1):
+            response = self.client.get('/')
+        self.assertEqual(response.status_code, 200)
+
+    def test_response_reports_query_count(self):
+        response = self.client.get('/')
+        self.assertEqual(response.headers['X-Query-Count'], '1')
+        self.assertIn('X-Query-Time-Ms', response.headers)
+
+    def test_lazy_loads_are_flagged_as_n_plus_one(self):
+        # Lazy-loads candidate.votes once per candidate
+        def vote_counts(election_id):
+            election = db.session.get(Election, election_id)
+            return {c.name: len(c.votes) for c in election.candidates}
+        self.app.add_url_rule('/vote-counts/<int:election_id>', 'vote_counts', vote_counts)
+
+        with self.assertLogs('query_profiler', level='WARNING') as logs:
+            self.client.get(f'/vote-counts/{self.election.id}')
+        self.assertTrue(any("Possible N+1 in vote_counts: 3 x" in line for line in logs.output))
+
+    def test_results_page_reads_no_relationships(self):
+        # Cache version check, election and candidates, grouped vote counts
+        url = f'/results/{self.election.id}'
+        with assert_max_queries(4) as stats:
+            response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(stats.repeated(2), [])
+
+    def test_assert_max_queries_fails_when_budget_exceeded(self):
+        with self.assertRaises(AssertionError):
+            with assert_max_queries(1):
+                self.client.get(f'/results/{self.election.id}')
+
+    def test_count_queries_outside_requests(self):
+        with count_queries() as stats:
+            Election.query.all()
+            Election.query.all()
+        self.assertEqual(stats.count, 2)
+        self.assertEqual(stats.repeated(2)[0][1], 2)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,124 @@
+import os
+import tempfile
+import unittest
+from unittest.mock import patch
+from application import create_app
+from extensions import db
+from rate_limit import TokenBucketLimiter, parse_rate
+
+class TestTokenBucketLimiter(unittest.TestCase):
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.tmpdir.name, 'buckets.sqlite3')
+
+    def tearDown(self):
+        self.tmpdir.cleanup()
+
+    def test_parse_rate(self):
+        self.assertEqual(parse_rate('5/minute'), (5, 5 / 60))
+        self.assertEqual(parse_rate('2/second'), (2, 2.0))
+
+    def test_bucket_refills_over_time(self):
+        limiter = TokenBucketLimiter(self.path)
+        limits = [('ai:user:1', 2, 1.0)]
+        self.assertEqual(limiter.take(limits, now=100.0), (0, None))
+        self.assertEqual(limiter.take(limits, now=100.0), (0, None))
+        retry_after, key = limiter.take(limits, now=100.0)
+        self.assertEqual((retry_after, key), (1.0, 'ai:user:1'))
+        self.assertEqual(limiter.take(limits, now=101.0), (0, None))
+
+    def test_buckets_are_shared_between_workers(self):
+        # Two limiters on one file stand in for two gunicorn workers
+        first, second = TokenBucketLimiter(self.path), TokenBucketLimiter(self.path)
+        limits = [('ai:global', 1, 0.5)]
+        self.assertEqual(first.take(limits, now=10.0), (0, None))
+        self.assertEqual(second.take(limits, now=10.0), (2.0, 'ai:global'))
+
+    def test_rejection_spends_no_tokens(self):
+        limiter = TokenBucketLimiter(self.path)
+        limiter.take([('ai:ip:a', 1, 1.0)], now=0.0)
+        limiter.take([('ai:global', 5, 1.0), ('ai:ip:a', 1, 1.0)], now=0.0)
+        for _ in range(4):
+            self.assertEqual(limiter.take([('ai:global', 5, 1.0)], now=0.0), (0, None))
+
+    def test_unavailable_store_fails_open(self):
+        limiter = TokenBucketLimiter(os.path.join(self.tmpdir.name, 'missing', 'buckets.sqlite3'))
+        self.assertEqual(limiter.take([('ai:global', 1, 1.0)]), (0, None))
+
+class TestRateLimitedEndpoints(unittest.TestCase):
+    def setUp(self):
+        self.app = create_app('testing')
+        self.app.config['RATE_LIMITS'] = {'ai': {'user': '1/minute', 'ip': '2/minute', 'global': ''}}
+        self.app_context = self.app.app_context()
+        self.app_context.push()
+        db.create_all()
+        self.client = self.app.test_client()
+
+    def tearDown(self):
+        db.session.remove()
+        db.drop_all()
+        self.app_context.pop()
+
+    def login(self, username):
+        self.client.post('/register', data={'username': username, 'password': 'secret'})
+        self.client.post('/login', data={'username': username, 'password': 'secret'})
+
+    def test_anonymous_callers_are_sent_to_login(self):
+        response = self.client.post('/process_audio')
+        self.assertEqual(response.status_code, 302)
+        self.assertIn('/login', response.headers['Location'])
+        self.assertEqual(self.client.post('/generate-candidates-audio', json={'election_id': 1}).status_code, 302)
+
+    def test_per_ip_limit_returns_429_with_retry_after(self):
+        # No audio attached, so allowed requests fail fast with 400; each voter
+        # stays within their own budget while the shared IP runs out
+        for username in ('first', 'second'):
+            self.login(username)
+            self.assertEqual(self.client.post('/process_audio').status_code, 400)
+
+        self.login('third')
+        response = self.client.post('/process_audio')
+        self.assertEqual(response.status_code, 429)
+        self.assertEqual(response.headers['Retry-After'], '30')
+
+        # The audio endpoints share one budget
+        response = self.client.post('/generate-candidates-audio', json={'election_id': 1})
+        self.assertEqual(response.status_code, 429)
+
+    def test_per_user_limit(self):
+        self.client.post('/register', data={'username': 'voter', 'password': 'secret'})
+        self.client.post('/login', data={'username': 'voter', 'password': 'secret'})
+
+        self.assertEqual(self.client.post('/process_audio').status_code, 400)
+        response = self.client.post('/process_audio')
+        self.assertEqual(response.status_code, 429)
+        self.assertEqual(response.headers['Retry-After'], '60')
+
+class TestProxiedClientAddress(unittest.TestCase):
+    def setUp(self):
+        with patch.dict(os.environ, {'TRUSTED_PROXY_HOPS': '1'}):
+            self.app = create_app('testing')
+        self.app.config['RATE_LIMITS'] = {'ai': {'user': '', 'ip': '1/minute', 'global': ''}}
+        self.app_context = self.app.app_context()
+        self.app_context.push()
+        db.create_all()
+        self.client = self.app.test_client()
+        self.client.post('/register', data={'username': 'voter', 'password': 'secret'})
+        self.client.post('/login', data={'username': 'voter', 'password': 'secret'})
+
+    def tearDown(self):
+        db.session.remove()
+        db.drop_all()
+        self.app_context.pop()
+
+    def post_from(self, client_ip):
+        return self.client.post('/process_audio', headers={'X-Forwarded-For': client_ip}).status_code
+
+    def test_per_ip_limit_keys_on_the_forwarded_client(self):
+        # Every request reaches the app from the same front end address
+        self.assertEqual(self.post_from('203.0.113.1'), 400)
+        self.assertEqual(self.post_from('203.0.113.2'), 400)
+        self.assertEqual(self.post_from('203.0.113.1'), 429)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,92 @@
+import os
+import tempfile
+import unittest
+from unittest.mock import patch
+from application import create_app
+from extensions import db
+from models import Election, Candidate, User
+from db_routing import REPLICA_BIND, read_replica
+from query_profiler import count_queries
+
+class TestReadReplicaRouting(unittest.TestCase):
+    def setUp(self):
+        # Primary is the in-memory test database; the "replica" is a separate SQLite
+        # file that is deliberately left behind, like a lagging replica
+        self.tmpdir = tempfile.TemporaryDirectory()
+        replica_url = f"sqlite:///{os.path.join(self.tmpdir.name, 'replica.db')}"
+        with patch.dict('os.environ', {"DATABASE_REPLICA_CONNECTION_STRING": replica_url}):
+            self.app = create_app('testing')
+        self.app_context = self.app.app_context()
+        self.app_context.push()
+        db.create_all()
+        db.metadata.create_all(db.engines[REPLICA_BIND])
+        self.client = self.app.test_client()
+
+        self.election = Election(election_name='Primary Only Election', election_type='test', max_votes=10)
+        db.session.add(self.election)
+        db.session.flush()
+        db.session.add(Candidate(name='Candidate A', election_id=self.election.id))
+        db.session.commit()
+
+    def tearDown(self):
+        db.session.remove()
+        db.drop_all()
+        db.metadata.drop_all(db.engines[REPLICA_BIND])
+        for engine in db.engines.values():
+            engine.dispose()
+        # The shared db object registers a metadata per bind; later apps have no replica
+        db.metadatas.pop(REPLICA_BIND, None)
+        self.app_context.pop()
+        self.tmpdir.cleanup()
+
+    def test_poolz_reports_the_replica(self):
+        response = self.client.get('/poolz')
+        self.assertIn("pool_class", response.json)
+        self.assertEqual(response.json["replica"]["checked_out"], 0)
+
+    def test_replica_queries_are_profiled(self):
+        with count_queries() as stats, read_replica():
+            db.session.scalars(db.select(Election)).all()
+        self.assertEqual(stats.count, 1)
+
+        response = self.client.get('/')
+        self.assertGreater(int(response.headers['X-Query-Count']), 0)
+
+    def test_listing_reads_from_replica(self):
+        response = self.client.get('/')
+        self.assertNotIn(b'Primary Only Election', response.data)
+
+        # Once the row reaches the replica, the index shows it
+        with db.engines[REPLICA_BIND].begin() as connection:
+            connection.execute(Election.__table__.insert(), {
+                "id": self.election.id, "election_name": "Primary Only Election",
+                "election_type": "test", "max_votes": 10, "status": "ongoing"
+            })
+        response = self.client.get('/')
+        self.assertIn(b'Primary Only Election', response.data)
+
+    def test_writes_go_to_primary_inside_replica_block(self):
+        with read_replica():
+            db.session.add(Election(election_name='Written In Replica Block', election_type='test', max_votes=1))
+            db.session.commit()
+
+        with db.engines[None].connect() as connection:
+            names = [row.election_name for row in connection.execute(Election.__table__.select())]
+        self.assertIn('Written In Replica Block', names)
+
+    def test_recent_write_pins_reads_to_primary(self):
+        # Registering and logging in marks a recent write for this browser session
+        self.client.post('/register', data={'username': 'voter', 'password': 'secret'})
+        self.client.post('/login', data={'username': 'voter', 'password': 'secret'})
+
+        response = self.client.get('/')
+        self.assertIn(b'Primary Only Election', response.data)
+        self.assertIn(b'Welcome, voter!', response.data)
+
+    def test_service_read_api_uses_replica(self):
+        self.assertIsNone(self.app.election_service.get_election(self.election.id + 1000))
+        db.session.expunge_all()
+        self.assertIsNone(self.app.election_service.get_election(self.election.id))
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,295 @@
+import json
+import tempfile
+import threading
+import time
+import unittest
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from io import BytesIO
+import openai
+from elevenlabs.client import ElevenLabs
+from application import create_app
+from extensions import db
+import metrics
+from resilience import (
+    Bulkhead, BulkheadFullError, CircuitBreaker, CircuitOpenError, Guard, ResilientElevenLabs, ResilientOpenAI,
+    pooled_http_client
+)
+
+class FakeProviderHandler(BaseHTTPRequestHandler):
+    """Answers like the OpenAI transcription and ElevenLabs TTS endpoints; server.mode picks ok/slow/error."""
+    protocol_version = 'HTTP/1.1'  # keep-alive, so connection reuse is visible
+
+    def setup(self):
+        super().setup()
+        with self.server.lock:
+            self.server.connections += 1
+
+    def do_POST(self):
+        self.server.hits += 1
+        self.rfile.read(int(self.headers.get('Content-Length', 0)))
+        try:
+            if self.server.mode == 'slow':
+                time.sleep(1.0)
+            if self.server.mode == 'error':
+                self.reply(500, 'application/json', b'{"error": {"message": "upstream exploded"}}')
+            elif self.path.startswith('/v1/audio/transcriptions'):
+                self.reply(200, 'application/json', json.dumps({'text': 'vote for alice'}).encode())
+            else:
+                self.reply(200, 'audio/mpeg', b'ID3fake-mp3')
+        except (BrokenPipeError, ConnectionResetError):
+            pass  # the client already timed out
+
+    def reply(self, status, content_type, body):
+        self.send_response(status)
+        self.send_header('Content-Type', content_type)
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+class FakeProviderServer(ThreadingHTTPServer):
+    daemon_threads = True
+    request_queue_size = 64
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+def audio_file():
+    data = BytesIO(b'RIFF0000WAVE')
+    data.name = 'voice_vote.wav'
+    return data
+
+class TestCircuitBreaker(unittest.TestCase):
+    def setUp(self):
+        self.clock = FakeClock()
+        self.breaker = CircuitBreaker('test_dependency', failure_threshold=2, reset_timeout=10, clock=self.clock)
+
+    def state_metric(self):
+        return metrics.CIRCUIT_BREAKER_STATE.labels('test_dependency')._value.get()
+
+    def test_opens_after_consecutive_failures(self):
+        self.breaker.record_failure()
+        self.breaker.record_success()
+        self.breaker.record_failure()
+        self.assertEqual(self.breaker.state, 'closed')
+        self.breaker.record_failure()
+        self.assertEqual(self.breaker.state, 'open')
+        self.assertFalse(self.breaker.allow())
+        self.assertEqual(self.state_metric(), 2)
+
+    def test_half_open_allows_a_single_probe(self):
+        self.breaker.record_failure()
+        self.breaker.record_failure()
+        self.clock.now = 10
+        self.assertTrue(self.breaker.allow())
+        self.assertEqual(self.state_metric(), 1)
+        self.assertFalse(self.breaker.allow())
+
+        # A failed probe reopens for another full reset_timeout
+        self.breaker.record_failure()
+        self.clock.now = 15
+        self.assertFalse(self.breaker.allow())
+        self.assertEqual(self.breaker.retry_after(), 5)
+
+        self.clock.now = 20
+        self.assertTrue(self.breaker.allow())
+        self.breaker.record_success()
+        self.assertEqual(self.breaker.state, 'closed')
+        self.assertEqual(self.state_metric(), 0)
+
+class TestBulkhead(unittest.TestCase):
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+
+    def tearDown(self):
+        self.tmpdir.cleanup()
+
+    def test_slots_are_shared_between_workers(self):
+        # Two instances on one directory stand in for two gunicorn workers
+        first = Bulkhead('ai', 1, self.tmpdir.name)
+        second = Bulkhead('ai', 1, self.tmpdir.name)
+        with first.slot():
+            with self.assertRaises(BulkheadFullError):
+                with second.slot():
+                    pass
+        with second.slot():
+            pass
+
+    def test_full_bulkhead_rejects_without_tripping_the_breaker(self):
+        bulkhead = Bulkhead('ai', 1, self.tmpdir.name)
+        guard = Guard('test_bulkhead', CircuitBreaker('test_bulkhead', failure_threshold=1), bulkhead, 5)
+        with bulkhead.slot():
+            with self.assertRaises(BulkheadFullError):
+                guard.call(lambda timeout: None)
+        self.assertEqual(guard.breaker.state, 'closed')
+        self.assertEqual(guard.call(lambda timeout: 'ok'), 'ok')
+
+class TestProvidersAgainstFakeServer(unittest.TestCase):
+    def setUp(self):
+        self.server = FakeProviderServer(('127.0.0.1', 0), FakeProviderHandler)
+        self.server.mode = 'ok'
+        self.server.hits = 0
+        self.server.connections = 0
+        self.server.lock = threading.Lock()
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+        self.base_url = f"http://127.0.0.1:{self.server.server_port}"
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.bulkhead = Bulkhead('ai', 2, self.tmpdir.name)
+
+    def tearDown(self):
+        self.server.shutdown()
+        self.server.server_close()
+        self.tmpdir.cleanup()
+
+    def guard(self, name):
+        return Guard(name, CircuitBreaker(name, failure_threshold=2, reset_timeout=0.3), self.bulkhead, 0.5)
+
+    def whisper(self, name, guard=None):
+        client = openai.OpenAI(api_key='x', base_url=f"{self.base_url}/v1", timeout=30, max_retries=0)
+        create = ResilientOpenAI(client, guard or self.guard(name)).audio.transcriptions.create
+        return lambda: create(model='whisper-1', file=audio_file())
+
+    def test_deadline_covers_every_attempt(self):
+        guard = Guard('fake_deadline', CircuitBreaker('fake_deadline'), self.bulkhead, 0.5, retries=3)
+        transcribe = self.whisper('fake_deadline', guard)
+
+        # The client's own 30 s timeout is overridden by what is left of the deadline
+        self.server.mode = 'slow'
+        started = time.perf_counter()
+        with self.assertRaises(openai.APITimeoutError):
+            transcribe()
+        self.assertLess(time.perf_counter() - started, 0.9)
+        self.assertEqual(self.server.hits, 1)
+
+    def test_server_errors_are_retried_within_the_deadline(self):
+        guard = Guard('fake_retry', CircuitBreaker('fake_retry'), self.bulkhead, 5, retries=1)
+        transcribe = self.whisper('fake_retry', guard)
+
+        self.server.mode = 'error'
+        with self.assertRaises(openai.InternalServerError):
+            transcribe()
+        self.assertEqual(self.server.hits, 2)
+        self.assertEqual(guard.breaker._failures, 1)
+
+    def test_slow_transcriptions_trip_the_breaker_then_recover(self):
+        transcribe = self.whisper('fake_whisper')
+        self.assertEqual(transcribe().text, 'vote for alice')
+
+        self.server.mode = 'slow'
+        for _ in range(2):
+            with self.assertRaises(openai.APITimeoutError):
+                transcribe()
+
+        # Open: rejected immediately without reaching the server
+        hits = self.server.hits
+        started = time.perf_counter()
+        with self.assertRaises(CircuitOpenError):
+            transcribe()
+        self.assertLess(time.perf_counter() - started, 0.1)
+        self.assertEqual(self.server.hits, hits)
+
+        # Half-open probe succeeds once the provider is healthy again
+        self.server.mode = 'ok'
+        time.sleep(0.35)
+        self.assertEqual(transcribe().text, 'vote for alice')
+        self.assertEqual(metrics.CIRCUIT_BREAKER_STATE.labels('fake_whisper')._value.get(), 0)
+
+    def test_tts_server_errors_trip_the_breaker(self):
+        client = ElevenLabs(api_key='x', base_url=self.base_url, timeout=30)
+        convert = ResilientElevenLabs(client, self.guard('fake_tts')).text_to_speech.convert
+        synthesize = lambda: convert(voice_id='voice', text='hello')
+
+        self.assertEqual(b''.join(synthesize()), b'ID3fake-mp3')
+
+        self.server.mode = 'error'
+        for _ in range(2):
+            with self.assertRaises(Exception) as ctx:
+                synthesize()
+            self.assertEqual(ctx.exception.status_code, 500)
+        with self.assertRaises(CircuitOpenError):
+            synthesize()
+        self.assertEqual(metrics.CIRCUIT_BREAKER_STATE.labels('fake_tts')._value.get(), 2)
+
+    def test_worker_threads_reuse_pooled_connections(self):
+        http = pooled_http_client(4)
+        self.addCleanup(http.close)
+        transcribe = ResilientOpenAI(
+            openai.OpenAI(api_key='x', base_url=f"{self.base_url}/v1", max_retries=0, http_client=http),
+            Guard('fake_pooled', CircuitBreaker('fake_pooled'), Bulkhead('ai', 4, self.tmpdir.name, max_wait=5), 5)
+        ).audio.transcriptions.create
+
+        # Like gthread worker threads each serving a run of voice votes
+        errors = []
+        def run():
+            try:
+                for _ in range(5):
+                    transcribe(model='whisper-1', file=audio_file())
+            except Exception as e:
+                errors.append(e)
+        threads = [threading.Thread(target=run) for _ in range(4)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertEqual(errors, [])
+        self.assertEqual(self.server.hits, 20)
+        self.assertLessEqual(self.server.connections, 4)
+
+    def test_client_errors_do_not_trip_the_breaker(self):
+        guard = self.guard('fake_client_error')
+
+        class BadRequest(Exception):
+            status_code = 400
+
+        def rejected(timeout):
+            raise BadRequest()
+
+        for _ in range(3):
+            with self.assertRaises(BadRequest):
+                guard.call(rejected)
+        self.assertEqual(guard.breaker.state, 'closed')
+
+class TestUnavailableDependencyEndpoints(unittest.TestCase):
+    def setUp(self):
+        self.app = create_app('testing')
+        self.app.config['RATE_LIMITS'] = {'ai': {'user': '', 'ip': '', 'global': ''}}
+        self.app_context = self.app.app_context()
+        self.app_context.push()
+        db.create_all()
+        self.client = self.app.test_client()
+        self.client.post('/register', data={'username': 'voter', 'password': 'secret'})
+        self.client.post('/login', data={'username': 'voter', 'password': 'secret'})
+
+    def tearDown(self):
+        db.session.remove()
+        db.drop_all()
+        self.app_context.pop()
+
+    def trip(self, guard):
+        for _ in range(guard.breaker.failure_threshold):
+            guard.breaker.record_failure()
+
+    def test_open_breaker_returns_503_with_retry_after(self):
+        self.trip(self.app.openai_client.guard)
+        response = self.client.post('/process_audio', data={'audio': (audio_file(), 'voice_vote.wav')})
+        self.assertEqual(response.status_code, 503)
+        self.assertEqual(response.headers['Retry-After'], '30')
+        self.assertIn('openai_whisper is unavailable', response.get_json()['error'])
+
+    def test_open_chat_breaker_blocks_audio_generation(self):
+        self.client.post('/register', data={'username': 'admin', 'password': 'secret', 'role': 'admin'})
+        election_id = self.app.election_service.start_election(['Alice', 'Bob'], 10, 'custom', 'Breaker Test')
+        self.trip(self.app.election_service.model.guard)
+
+        response = self.client.post('/generate-candidates-audio', json={'election_id': election_id})
+        self.assertEqual(response.status_code, 503)
+        self.assertIn('Retry-After', response.headers)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,73 @@
+import unittest
+from datetime import datetime
+from sqlalchemy import func, select
+from application import create_app
+from extensions import db
+from models import Election, User, UserVote, Vote, VoteCounterShard, VoteEvent
+
+ARGS = ['seed', '--users', '40', '--elections', '3', '--candidates', '4', '--votes', '100',
+        '--seed', '7', '--now', '2026-10-19 12:00:00', '--batch-size', '30']
+
+class TestSeed(unittest.TestCase):
+    def setUp(self):
+        self.app = create_app('testing')
+        self.app_context = self.app.app_context()
+        self.app_context.push()
+        db.create_all()
+        self.runner = self.app.test_cli_runner()
+
+    def tearDown(self):
+        db.session.remove()
+        db.drop_all()
+        self.app_context.pop()
+
+    def seed(self, *extra):
+        result = self.runner.invoke(args=ARGS + list(extra))
+        self.assertIsNone(result.exception, result.output)
+        return result
+
+    def snapshot(self):
+        return db.session.execute(
+            select(Vote.election_id, Vote.candidate_id, Vote.created_at).order_by(Vote.id)
+        ).all()
+
+    def test_seeds_users_elections_and_votes(self):
+        self.seed()
+        self.assertEqual(User.query.count(), 40)
+        self.assertEqual(Election.query.count(), 3)
+        self.assertEqual(Vote.query.count(), 100)
+        self.assertEqual(VoteEvent.query.count(), 100)
+        self.assertEqual(UserVote.query.count(), 100)
+
+        # Every vote falls inside its election's window, and before "now"
+        for election in Election.query.all():
+            first, last = db.session.execute(
+                select(func.min(Vote.created_at), func.max(Vote.created_at)).where(Vote.election_id == election.id)
+            ).one()
+            if first is not None:
+                self.assertGreaterEqual(first, election.start_date.replace(tzinfo=None))
+                self.assertLessEqual(last, min(election.end_date.replace(tzinfo=None), datetime(2026, 10, 19, 12)))
+        self.assertTrue(User.query.first().check_password('password'))
+
+    def test_same_seed_same_data(self):
+        self.seed()
+        first = self.snapshot()
+        db.session.remove()
+        db.drop_all()
+        db.create_all()
+        self.seed()
+        self.assertEqual(self.snapshot(), first)
+
+    def test_shard_totals_match_votes(self):
+        self.seed('--counter-shards', '2')
+        self.assertEqual(db.session.scalar(select(func.sum(VoteCounterShard.count))), 100)
+        election = Election.query.first()
+        self.assertAlmostEqual(sum(self.app.election_service.calculate_results(election).values()), 100.0)
+
+    def test_too_many_votes_is_rejected(self):
+        result = self.runner.invoke(args=['seed', '--users', '2', '--elections', '2', '--votes', '5'])
+        self.assertEqual(result.exit_code, 2)
+        self.assertIn('at most 4 votes', result.output)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,140 @@
+import unittest
+import numpy as np
+from application import create_app
+from extensions import db
+from models import Election, Ballot, UserVote, User
+import tally_engine
+
+def ballots(*rankings):
+    return [tally_engine.pack_choices(r) for r in rankings]
+
+class TestTallyEngine(unittest.TestCase):
+    def test_pack_round_trip(self):
+        packed = tally_engine.pack_choices([2, 0, 1])
+        self.assertEqual(len(packed), 3)
+        self.assertEqual(tally_engine.unpack_choices(packed), [2, 0, 1])
+
+    def test_ballot_matrix_pads_short_ballots(self):
+        matrix = tally_engine.ballot_matrix(ballots([0, 1, 2], [2], [1, 0]))
+        expected = [[0, 1, 2], [2, 255, 255], [1, 0, 255]]
+        self.assertEqual(matrix.tolist(), expected)
+
+    def test_approval_counts(self):
+        counts = tally_engine.approval_counts(ballots([0, 1], [1], [1, 2]), 4)
+        self.assertEqual(counts.tolist(), [1, 3, 1, 0])
+
+    def test_instant_runoff_transfers_eliminated_votes(self):
+        # A leads on first choices, but C's voters prefer B, who wins in round two
+        result = tally_engine.instant_runoff(ballots(
+            [0], [0], [0], [0],
+            [1, 0], [1, 2], [1],
+            [2, 1], [2, 1]
+        ), 3)
+        self.assertEqual([r.tolist() for r in result["rounds"]], [[4, 3, 2], [4, 5, 0]])
+        self.assertEqual(result["winner"], 1)
+
+    def test_instant_runoff_exhausted_ballots_leave_the_count(self):
+        result = tally_engine.instant_runoff(ballots([0], [0], [1], [1], [2, 0]), 3)
+        self.assertEqual(result["rounds"][-1].tolist(), [3, 2, 0])
+        self.assertEqual(result["winner"], 0)
+
+    def test_instant_runoff_full_tie_has_no_winner(self):
+        result = tally_engine.instant_runoff(ballots([0], [1]), 2)
+        self.assertIsNone(result["winner"])
+        self.assertIsNone(tally_engine.instant_runoff([], 2)["winner"])
+
+    def test_instant_runoff_matches_reference_count(self):
+        rng = np.random.default_rng(7)
+        rankings = [list(rng.permutation(5)[:rng.integers(1, 6)]) for _ in range(2000)]
+        result = tally_engine.instant_runoff(ballots(*rankings), 5)
+
+        # Straightforward per-ballot loop for comparison
+        eliminated = set()
+        while True:
+            counts = [0] * 5
+            for ranking in rankings:
+                for choice in ranking:
+                    if choice not in eliminated:
+                        counts[choice] += 1
+                        break
+            remaining = [c for c in range(5) if c not in eliminated]
+            leader = max(remaining, key=lambda c: counts[c])
+            if counts[leader] * 2 > sum(counts) or len(remaining) == 1:
+                break
+            lowest = min(counts[c] for c in remaining)
+            eliminated |= {c for c in remaining if counts[c] == lowest}
+        self.assertEqual(result["rounds"][-1].tolist(), counts)
+        self.assertEqual(result["winner"], leader)
+
+class TestBallotVoting(unittest.TestCase):
+    def setUp(self):
+        self.app = create_app('testing')
+        self.app_context = self.app.app_context()
+        self.app_context.push()
+        db.create_all()
+        self.client = self.app.test_client()
+        self.service = self.app.election_service
+
+        self.client.post('/register', data={'username': 'voter', 'password': 'secret'})
+        self.client.post('/login', data={'username': 'voter', 'password': 'secret'})
+
+    def tearDown(self):
+        db.session.remove()
+        db.drop_all()
+        self.app_context.pop()
+
+    def start(self, ballot_type):
+        election_id = self.service.start_election(['A', 'B', 'C'], 10, 'custom', f'{ballot_type} election',
+                                                  ballot_type=ballot_type)
+        election = db.session.get(Election, election_id)
+        return election, {c.name: c.id for c in election.candidates}
+
+    def test_unknown_ballot_type_is_rejected(self):
+        with self.assertRaises(ValueError):
+            self.service.start_election(['A'], 10, 'custom', 'Bad', ballot_type='borda')
+
+    def test_approval_ballot_via_form(self):
+        election, ids = self.start('approval')
+        response = self.client.post(f'/vote/{election.id}', data={'candidates': [ids['A'], ids['C']]})
+        self.assertEqual(response.status_code, 302)
+
+        ballot = Ballot.query.one()
+        self.assertEqual(tally_engine.unpack_choices(ballot.choices), [0, 2])
+        self.assertEqual(UserVote.query.count(), 1)
+        self.assertEqual(self.service.calculate_results(election), {'A': 50.0, 'B': 0.0, 'C': 50.0})
+
+    def test_ranked_ballot_via_form(self):
+        election, ids = self.start('ranked')
+        response = self.client.post(f'/vote/{election.id}', data={f"rank_{ids['C']}": '1', f"rank_{ids['A']}": '2'})
+        self.assertEqual(response.status_code, 302)
+        self.assertEqual(tally_engine.unpack_choices(Ballot.query.one().choices), [2, 0])
+
+        response = self.client.get(f'/api/elections/{election.id}/results')
+        results = {r['candidate']: r['percentage'] for r in response.get_json()['results']}
+        self.assertEqual(results, {'A': 0.0, 'B': 0.0, 'C': 100.0})
+
+    def test_duplicate_rank_is_rejected(self):
+        election, ids = self.start('ranked')
+        response = self.client.post(f'/vote/{election.id}', data={f"rank_{ids['A']}": '1', f"rank_{ids['B']}": '1'})
+        self.assertEqual(response.status_code, 200)
+        self.assertIn(b'Invalid ballot', response.data)
+        self.assertEqual(Ballot.query.count(), 0)
+
+    def test_ranked_results_use_final_round(self):
+        election, ids = self.start('ranked')
+        for i, ranking in enumerate([['A'], ['A'], ['B', 'A'], ['C', 'B'], ['C', 'B']]):
+            user = User(username=f'ranked_{i}', password_hash='x')
+            db.session.add(user)
+            db.session.commit()
+            self.service.record_ballot(user.id, election, [ids[name] for name in ranking])
+
+        # B is eliminated first and transfers to A, who reaches a majority
+        self.assertEqual(self.service.candidate_tallies(election), [(ids['A'], 'A', 3), (ids['B'], 'B', 0), (ids['C'], 'C', 2)])
+
+    def test_voice_vote_rejected_for_ranked(self):
+        election, _ = self.start('ranked')
+        response = self.client.post('/voice_vote', json={'transcript': 'a', 'election_id': election.id})
+        self.assertEqual(response.status_code, 400)
+
+if __name__ == '__main__':
+    unittest.main()
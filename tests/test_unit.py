@@ -1,16 +1,24 @@
+import threading
+import time
 import unittest
 import sys
 import os
+import tempfile
 from unittest.mock import MagicMock, Mock, patch
 from application import app  # Import the Flask app instance from application.py
 
 
 from psycopg2 import OperationalError
 import application
-from election_service import ElectionService
+from election_service import AlreadyVotedError, ElectionService
+from db_readiness import DatabaseReadiness
+from db_pool import InstrumentedQueuePool, label_pools, pool_options_from_env, pool_status
+from benchmarks.harness import compare_to_baseline, summarize
 from flask import url_for
 import warnings
-from sqlalchemy.exc import OperationalError, SQLAlchemyError  # Ensure SQLAlchemyError is imported here
+from sqlalchemy.exc import IntegrityError, OperationalError, SQLAlchemyError  # Ensure SQLAlchemyError is imported here
+from sqlalchemy.exc import TimeoutError as SQLAlchemyTimeoutError
+from sqlalchemy import create_engine
 
 
 # Adds project root directory to sys.path for imports
@@ -18,7 +26,7 @@ sys.path.insert(0, os.path.abspath(".."))
 
 # Imports the Flask app, database, and models
 from application import create_app, db
-from models import User, Election, Candidate, Vote, UserVote
+from models import User, Election, Candidate, Vote, UserVote, VoteCounterShard
 
 # Helper function for calculating total votes
 def calculate_results(vote_data):
@@ -292,11 +300,10 @@ class TestElectionService(unittest.TestCase):
         db.session.add_all([candidate1, candidate2])
         db.session.commit()
 
-        # Set up mock responses for generated introductions
-        self.mock_model.invoke.side_effect = [
-            MagicMock(content="Introducing 1st, the vibrant Alice!"),
-            MagicMock(content="Introducing 2nd, the charismatic Bob!")
-        ]
+        # Set up mock responses for generated introductions, keyed by prompt since the calls run concurrently
+        self.mock_model.invoke.side_effect = lambda prompt: MagicMock(
+            content="Introducing 1st, the vibrant Alice!" if "Alice" in prompt else "Introducing 2nd, the charismatic Bob!"
+        )
         
         introductions = self.election_service.generate_gpt4_text_introduction(election)
         self.assertEqual(len(introductions), 2)
@@ -304,6 +311,27 @@ class TestElectionService(unittest.TestCase):
         self.assertEqual(introductions[1], "Introducing 2nd, the charismatic Bob!")
         # Verifies correct introductions generated for each candidate
 
+    def test_generate_gpt4_text_introduction_runs_concurrently_in_order(self):
+        election = Election(election_name="Test Election", election_type="General", max_votes=100)
+        db.session.add(election)
+        db.session.commit()
+        db.session.add_all([Candidate(name="Alice", election_id=election.id),
+                            Candidate(name="Bob", election_id=election.id)])
+        db.session.commit()
+
+        both_started = threading.Barrier(2, timeout=5)
+        def reply(prompt):
+            # Each call waits for the other, so this only finishes if they overlap;
+            # Alice's finishes last and still comes first
+            both_started.wait()
+            time.sleep(0.02 if "Alice" in prompt else 0)
+            return MagicMock(content="Alice!" if "Alice" in prompt else "Bob!")
+        self.mock_model.invoke.side_effect = reply
+
+        introductions = self.election_service.generate_gpt4_text_introduction(election)
+        self.assertEqual(introductions, ["Alice!", "Bob!"])
+        self.assertEqual(self.mock_model.invoke.call_count, 2)
+
     def test_get_restaurant_candidates(self):
         # Tests restaurant name generation using GPT-4 model
         self.mock_model.invoke.return_value = MagicMock(content="Bistro One\nDine Delight\nEpicurean Spot")
@@ -316,42 +344,223 @@ class TestElectionService(unittest.TestCase):
         self.assertIn("Dine Delight", restaurant_candidates)
         self.assertIn("Epicurean Spot", restaurant_candidates)  # Verifies generated restaurant names
 
-class TestApplicationDatabaseRetriesAndAPIKeys(unittest.TestCase):
+    def test_calculate_results_percentages(self):
+        # Tests per-candidate vote percentages
+        election_id = self.election_service.start_election(
+            ["Alice", "Bob"], max_votes=100, election_type="General", election_name="Results Election"
+        )
+        election = db.session.get(Election, election_id)
+        alice, bob = election.candidates
+        db.session.add_all([
+            Vote(candidate_id=alice.id, election_id=election_id),
+            Vote(candidate_id=alice.id, election_id=election_id),
+            Vote(candidate_id=alice.id, election_id=election_id),
+            Vote(candidate_id=bob.id, election_id=election_id),
+        ])
+        db.session.commit()
+
+        self.assertEqual(self.election_service.calculate_results(election), {"Alice": 75.0, "Bob": 25.0})
+
+    def test_match_candidate(self):
+        # Tests fuzzy matching of a transcript to a candidate
+        election_id = self.election_service.start_election(
+            ["Alice Smith", "Bob Jones"], max_votes=100, election_type="General", election_name="Voice Election"
+        )
+        candidates = db.session.get(Election, election_id).candidates
+        self.assertEqual(self.election_service.match_candidate("alice smyth", candidates).name, "Alice Smith")
+        self.assertIsNone(self.election_service.match_candidate("nobody", candidates))
+
+    def test_sharded_counters_created_and_summed(self):
+        # Tests that sharded elections keep per-candidate totals across shard rows
+        user_ids = []
+        for i in range(6):
+            user = User(username=f"voter{i}", password_hash="x")
+            db.session.add(user)
+            db.session.flush()
+            user_ids.append(user.id)
+
+        election_id = self.election_service.start_election(
+            ["Alice", "Bob"], max_votes=100, election_type="General", election_name="Sharded Election",
+            counter_shards=4
+        )
+        election = db.session.get(Election, election_id)
+        alice, bob = election.candidates
+        self.assertEqual(VoteCounterShard.query.filter_by(candidate_id=alice.id).count(), 4)
+
+        for user_id in user_ids[:3]:
+            self.election_service.record_vote(user_id, election, alice.id)
+        self.election_service.record_vote(user_ids[3], election, bob.id)
+
+        shard_total = db.session.query(db.func.sum(VoteCounterShard.count)).filter_by(candidate_id=alice.id).scalar()
+        self.assertEqual(shard_total, 3)
+        self.assertEqual(self.election_service.calculate_results(election), {"Alice": 75.0, "Bob": 25.0})
+
+    def test_repeat_vote_is_rejected_by_the_insert(self):
+        # The unique constraint, not a prior SELECT, stops a second vote
+        user = User(username="repeat_voter", password_hash="x")
+        db.session.add(user)
+        db.session.commit()
+        election_id = self.election_service.start_election(
+            ["Alice", "Bob"], max_votes=100, election_type="General", election_name="Repeat Election",
+            counter_shards=2
+        )
+        election = db.session.get(Election, election_id)
+        alice, bob = election.candidates
+
+        self.election_service.record_vote(user.id, election, alice.id)
+        with self.assertRaises(AlreadyVotedError):
+            self.election_service.record_vote(user.id, election, bob.id)
+
+        self.assertEqual(Vote.query.filter_by(election_id=election_id).count(), 1)
+        self.assertEqual(UserVote.query.filter_by(election_id=election_id).count(), 1)
+        self.assertEqual(self.election_service.calculate_results(election), {"Alice": 100.0, "Bob": 0.0})
+
+    def test_other_integrity_errors_are_not_reported_as_repeat_votes(self):
+        election_id = self.election_service.start_election(
+            ["Alice"], max_votes=100, election_type="General", election_name="Orphan Election"
+        )
+        election = db.session.get(Election, election_id)
+        error = IntegrityError("INSERT INTO user_votes", {}, Exception("FOREIGN KEY constraint failed"))
 
-    @patch('application.time.sleep', return_value=None)  # Mock sleep to avoid delay in tests
-    def test_database_retry_logic_failure(self, mock_sleep):
-        # Test case where database connection fails after all retry attempts
+        with patch.object(db.session, 'flush', side_effect=error):
+            with self.assertRaises(IntegrityError):
+                self.election_service.record_vote(12345, election, election.candidates[0].id)
+        self.assertEqual(UserVote.query.filter_by(election_id=election_id).count(), 0)
 
-        # Create an app instance and activate the application context
+    def test_vote_for_a_candidate_outside_the_election_is_rejected(self):
+        user = User(username="stray_voter", password_hash="x")
+        db.session.add(user)
+        db.session.commit()
+        first = db.session.get(Election, self.election_service.start_election(
+            ["Alice"], max_votes=100, election_type="General", election_name="First Election", counter_shards=2
+        ))
+        second = db.session.get(Election, self.election_service.start_election(
+            ["Bob"], max_votes=100, election_type="General", election_name="Second Election"
+        ))
+
+        for candidate_id in (second.candidates[0].id, "not a number", None):
+            with self.assertRaises(ValueError):
+                self.election_service.record_vote(user.id, first, candidate_id)
+        self.assertEqual(UserVote.query.filter_by(user_id=user.id).count(), 0)
+        self.assertEqual(Vote.query.filter_by(election_id=first.id).count(), 0)
+
+    def test_missing_counter_shard_rolls_the_vote_back(self):
+        user = User(username="shard_voter", password_hash="x")
+        db.session.add(user)
+        db.session.commit()
+        election = db.session.get(Election, self.election_service.start_election(
+            ["Alice"], max_votes=100, election_type="General", election_name="Broken Shards", counter_shards=2
+        ))
+        VoteCounterShard.query.filter_by(election_id=election.id).delete()
+        db.session.commit()
+
+        with self.assertRaises(RuntimeError):
+            self.election_service.record_vote(user.id, election, election.candidates[0].id)
+        self.assertEqual(UserVote.query.filter_by(user_id=user.id).count(), 0)
+        self.assertEqual(Vote.query.filter_by(election_id=election.id).count(), 0)
+
+    def test_worker_shard_strategy_is_stable_per_process(self):
+        service = ElectionService(model=self.mock_model, db=db, shard_strategy='worker')
+        self.assertEqual(service.pick_shard(8), os.getpid() % 8)
+        self.assertEqual(service.pick_shard(8), service.pick_shard(8))
+
+class TestBenchmarkHarness(unittest.TestCase):
+
+    def test_compare_to_baseline_flags_only_regressions_beyond_tolerance(self):
+        baseline = {"results": {"fast": {"median_ms": 10.0}, "slow": {"median_ms": 10.0}}}
+        report = {"results": {"fast": {"median_ms": 12.0}, "slow": {"median_ms": 20.0}, "new": {"median_ms": 1.0}}}
+        regressions = compare_to_baseline(report, baseline, tolerance=0.5)
+        self.assertEqual([r["benchmark"] for r in regressions], ["slow"])
+        self.assertEqual(regressions[0]["ratio"], 2.0)
+
+    def test_summarize(self):
+        summary = summarize([0.001, 0.002, 0.003])
+        self.assertEqual(summary["iterations"], 3)
+        self.assertEqual(summary["median_ms"], 2.0)
+        self.assertEqual(summary["ops_per_sec"], 500.0)
+
+class TestApplicationDatabaseRetriesAndAPIKeys(unittest.TestCase):
+
+    def test_database_readiness_probe_failure(self):
+        # Test that a failing probe leaves the app unready without blocking startup
         app = create_app('testing')
+        readiness = DatabaseReadiness(app, db)
+
         with app.app_context():
-            # Mock db.engine.connect to simulate constant failure, triggering retry logic
-            with patch.object(db.engine, 'connect', side_effect=OperationalError("Mocked error", None, None)) as mock_connect:
-                
-                max_retries = 5  # Define the maximum retries
-                retry_delay = 5  # Initial retry delay
-                attempt_messages = []  # Collects log messages for each attempt
-                
-                # Expect an OperationalError to be raised after retries
-                with self.assertRaises(OperationalError):
-                    for attempt in range(max_retries):
-                        try:
-                            db.engine.connect()  # Attempt to connect
-                            attempt_messages.append("Database connection successful")
-                            break  # Exit loop if connection succeeds
-                        except OperationalError as e:
-                            if attempt < max_retries - 1:
-                                attempt_messages.append(f"Database connection attempt {attempt + 1} failed. Retrying in {retry_delay} seconds...")
-                                application.time.sleep(retry_delay)
-                                retry_delay *= 2  # Apply exponential backoff for retry delay
-                            else:
-                                attempt_messages.append(f"Failed to connect to the database after {max_retries} attempts. Error: {str(e)}")
-                                raise  # Raise error after max retries
-
-                # Ensure the mock sleep was called 4 times (for 5 retries)
-                self.assertEqual(mock_sleep.call_count, 4)
-                # Check that the final message indicates failure after retries
-                self.assertIn("Failed to connect to the database after 5 attempts", attempt_messages[-1])
+            # Mock db.engine.connect to simulate an unreachable database
+            with patch.object(db.engine, 'connect', side_effect=OperationalError("Mocked error", None, None)):
+                self.assertFalse(readiness.probe())
+
+        self.assertFalse(readiness.is_ready)
+        self.assertIn("Mocked error", readiness.last_error)
+
+    def test_database_readiness_backoff_is_jittered_and_capped(self):
+        # Delays stay within [0, min(max_delay, base_delay * 2^attempt)]
+        app = create_app('testing')
+        readiness = DatabaseReadiness(app, db, base_delay=1.0, max_delay=8.0)
+
+        for attempt in range(10):
+            delay = readiness.next_delay(attempt)
+            self.assertGreaterEqual(delay, 0)
+            self.assertLessEqual(delay, min(8.0, 2 ** attempt))
+
+    def test_health_endpoints(self):
+        # Liveness is always OK; readiness flips to 200 once the probe succeeds
+        app = create_app('testing')
+        client = app.test_client()
+        self.assertEqual(client.get('/healthz').status_code, 200)
+
+        self.assertTrue(app.db_readiness.wait(timeout=5))
+        response = client.get('/readyz')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json, {"status": "ready"})
+
+    def test_readyz_reports_unavailable_until_database_is_reached(self):
+        app = create_app('testing')
+        app.db_readiness = DatabaseReadiness(app, db)  # Fresh probe that has not run yet
+        response = app.test_client().get('/readyz')
+        self.assertEqual(response.status_code, 503)
+        self.assertEqual(response.json["status"], "starting")
+
+    def test_readyz_serves_the_background_checks_answer(self):
+        app = create_app('testing')
+        now = [0.0]
+        app.db_readiness = readiness = DatabaseReadiness(app, db, recheck_seconds=5, clock=lambda: now[0])
+        client = app.test_client()
+        self.assertTrue(readiness.probe())
+        self.assertEqual(client.get('/readyz').status_code, 200)
+
+        with app.app_context(), \
+                patch.object(db.engine, 'connect', side_effect=OperationalError("Mocked error", None, None)) as connect:
+            # The request itself never touches the database
+            self.assertEqual(client.get('/readyz').status_code, 200)
+            connect.assert_not_called()
+
+            # A failed background recheck; the error is not exposed
+            self.assertFalse(readiness.probe())
+            response = client.get('/readyz')
+            self.assertEqual(response.status_code, 503)
+            self.assertEqual(response.json, {"status": "unavailable"})
+
+        self.assertTrue(readiness.probe())
+        self.assertEqual(client.get('/readyz').status_code, 200)
+
+        # No recheck has finished for three intervals: the check itself is stuck
+        now[0] += 16
+        self.assertEqual(client.get('/readyz').status_code, 503)
+
+    def test_background_thread_keeps_rechecking(self):
+        app = create_app('testing')
+        app.db_readiness.stop()
+        readiness = DatabaseReadiness(app, db, recheck_seconds=0.05)
+        readiness.start()
+        self.addCleanup(readiness.stop)
+        self.assertTrue(readiness.wait(timeout=5))
+
+        attempts = readiness.attempts
+        time.sleep(0.3)
+        self.assertGreater(readiness.attempts, attempts)
+        self.assertTrue(readiness.check())
 
     @patch.dict('os.environ', {"OPENAI_API_KEY": "", "ELEVENLABS_API_KEY": ""})  # Mock missing API keys
     def test_missing_api_keys_raises_error(self):
@@ -372,6 +581,96 @@ class TestApplicationDatabaseRetriesAndAPIKeys(unittest.TestCase):
 
         print("Test passed: app.run() was called successfully.")
 
+class TestConnectionPool(unittest.TestCase):
+
+    def setUp(self):
+        # File-backed SQLite so the engine uses a real QueuePool
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.engine = create_engine(
+            f"sqlite:///{os.path.join(self.tmpdir.name, 'pool.db')}",
+            poolclass=InstrumentedQueuePool, pool_size=1, max_overflow=1, pool_timeout=0.1
+        )
+
+    def tearDown(self):
+        self.engine.dispose()
+        self.tmpdir.cleanup()
+
+    @patch.dict('os.environ', {"DB_POOL_SIZE": "8", "DB_POOL_RECYCLE": "600", "DB_POOL_PRE_PING": "false"})
+    def test_pool_options_from_env(self):
+        options = pool_options_from_env()
+        self.assertEqual(options["pool_size"], 8)
+        self.assertEqual(options["pool_recycle"], 600)
+        self.assertFalse(options["pool_pre_ping"])
+        self.assertIs(options["poolclass"], InstrumentedQueuePool)
+
+    def test_pool_status_reports_in_use_and_overflow(self):
+        first = self.engine.connect()
+        second = self.engine.connect()  # Exceeds pool_size, so it comes from overflow
+        status = pool_status(self.engine)
+        self.assertEqual(status["checked_out"], 2)
+        self.assertEqual(status["overflow"], 1)
+        self.assertEqual(status["checkouts"], 2)
+
+        # Pool and overflow are exhausted, so the next checkout times out
+        with self.assertRaises(SQLAlchemyTimeoutError):
+            self.engine.connect()
+        status = pool_status(self.engine)
+        self.assertEqual(status["checkout_timeouts"], 1)
+        self.assertGreaterEqual(status["checkout_wait_seconds_max"], 0.1)
+
+        first.close()
+        second.close()
+        self.assertEqual(pool_status(self.engine)["checked_out"], 0)
+
+    def test_poolz_endpoint(self):
+        app = create_app('testing')
+        response = app.test_client().get('/poolz')
+        self.assertEqual(response.status_code, 200)
+        self.assertIn("pool_class", response.json)
+
+    def test_occupancy_gauges_are_labelled_per_pool(self):
+        import metrics
+        replica = create_engine(
+            f"sqlite:///{os.path.join(self.tmpdir.name, 'replica.db')}",
+            poolclass=InstrumentedQueuePool, pool_size=2, max_overflow=0
+        )
+        self.addCleanup(replica.dispose)
+        label_pools({None: self.engine, 'replica': replica})
+
+        with self.engine.connect(), replica.connect(), replica.connect():
+            self.assertEqual(metrics.DB_POOL_CHECKED_OUT.labels('primary')._value.get(), 1)
+            self.assertEqual(metrics.DB_POOL_CHECKED_OUT.labels('replica')._value.get(), 2)
+
+class TestRequestMetrics(unittest.TestCase):
+
+    def setUp(self):
+        self.app = create_app('testing')
+        self.app_context = self.app.app_context()
+        self.app_context.push()
+        db.create_all()
+        self.client = self.app.test_client()
+
+    def tearDown(self):
+        db.session.remove()
+        db.drop_all()
+        self.app_context.pop()
+
+    def test_metrics_endpoint_exposes_per_endpoint_latency_and_status(self):
+        self.client.get('/')
+        self.client.get('/results/999')  # 404 from the results view
+
+        response = self.client.get('/metrics')
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.content_type.startswith('text/plain'))
+        body = response.get_data(as_text=True)
+        self.assertIn('everyvoter_request_duration_seconds_bucket{endpoint="election.index"', body)
+        self.assertIn('everyvoter_requests_total{endpoint="election.results",method="GET",status="404"}', body)
+
+    def test_in_flight_gauge_returns_to_zero(self):
+        self.client.get('/')
+        body = self.client.get('/metrics').get_data(as_text=True)
+        self.assertIn('everyvoter_requests_in_flight{endpoint="election.index"} 0.0', body)
+
 class TestAdminFeatures(unittest.TestCase):
 
     def setUp(self):
@@ -433,6 +732,46 @@ class TestAdminFeatures(unittest.TestCase):
             # Assert that the response includes a missing candidate error message
             self.assertIn(b"Please enter at least one candidate.", response.data)
 
+    @patch('flask_login.utils._get_user')
+    def test_setup_custom_election_unknown_ballot_type(self, mock_user):
+        # start_election's ValueError comes back as a flash on the form
+        mock_user.return_value.role = 'admin'
+        with self.app.test_request_context():
+            response = self.client.post(url_for('admin.setup_custom_election'), data={
+                'max_votes_custom': '5',
+                'election_name': 'Custom Election',
+                'candidate_names[]': ['Alice', 'Bob'],
+                'ballot_type': 'plurality-ish'
+            }, follow_redirects=True)
+
+            self.assertEqual(response.status_code, 200)
+            self.assertIn(b"Unknown ballot type: plurality-ish", response.data)
+            self.assertIsNone(Election.query.filter_by(election_name='Custom Election').first())
+
+    @patch('flask_login.utils._get_user')
+    def test_setup_custom_election_rejects_bad_counter_shards(self, mock_user):
+        mock_user.return_value.role = 'admin'
+        with self.app.test_request_context():
+            for counter_shards in ('-1', '65', 'many'):
+                response = self.client.post(url_for('admin.setup_custom_election'), data={
+                    'max_votes_custom': '5',
+                    'election_name': 'Sharded Election',
+                    'candidate_names[]': ['Alice', 'Bob'],
+                    'counter_shards': counter_shards
+                }, follow_redirects=True)
+                self.assertEqual(response.status_code, 200)
+                self.assertIn(b"Counter shards must be a whole number from 0 to 64.", response.data)
+        self.assertEqual(Election.query.count(), 0)
+
+        with self.assertRaises(ValueError):
+            self.app.election_service.start_election(['Alice'], 5, 'custom', 'Negative', counter_shards=-1)
+
+        # The database refuses a negative count too
+        db.session.add(Election(election_name='Negative', election_type='custom', max_votes=5, counter_shards=-1))
+        with self.assertRaises(IntegrityError):
+            db.session.commit()
+        db.session.rollback()
+
     @patch('flask_login.utils._get_user')
     def test_election_not_found(self, mock_user):
         # Test response when attempting to access a non-existent election
@@ -496,6 +835,9 @@ class TestElectionController(unittest.TestCase):
         self.election = Election(election_name='Test Election', election_type='test', max_votes=100, status='ongoing')
         db.session.add(self.election)
         db.session.commit()
+        # The audio endpoints are for signed-in voters
+        self.client.post('/register', data={'username': 'voter', 'password': 'secret'})
+        self.client.post('/login', data={'username': 'voter', 'password': 'secret'})
 
     def tearDown(self):
         # Clean up database and context after each test
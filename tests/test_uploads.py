@@ -0,0 +1,109 @@
+import io
+import unittest
+import wave
+import numpy as np
+from unittest.mock import patch
+from types import SimpleNamespace
+from flask import request
+from application import create_app
+from extensions import db
+from uploads import wav_duration
+
+def make_wav(seconds, rate=8000):
+    data = io.BytesIO()
+    with wave.open(data, 'wb') as wav:
+        wav.setnchannels(1)
+        wav.setsampwidth(1)
+        wav.setframerate(rate)
+        tone = 128 + 60 * np.sin(2 * np.pi * 440 * np.arange(int(seconds * rate)) / rate)
+        wav.writeframes(tone.astype(np.uint8).tobytes())
+    data.seek(0)
+    return data
+
+class TestUploads(unittest.TestCase):
+    def setUp(self):
+        self.app = create_app('testing')
+        self.app.config['RATE_LIMITS'] = {'ai': {'user': '', 'ip': '', 'global': ''}}
+        self.app.config['AUDIO_MAX_BYTES'] = 512 * 1024
+        self.app.config['AUDIO_MAX_SECONDS'] = 10
+        self.app.config['UPLOAD_SPOOL_BYTES'] = 64 * 1024
+        self.app_context = self.app.app_context()
+        self.app_context.push()
+        db.create_all()
+        self.client = self.app.test_client()
+        self.client.post('/register', data={'username': 'voter', 'password': 'secret'})
+        self.client.post('/login', data={'username': 'voter', 'password': 'secret'})
+
+    def tearDown(self):
+        db.session.remove()
+        db.drop_all()
+        self.app_context.pop()
+
+    def upload_stream(self, payload):
+        with self.app.test_request_context('/process_audio', method='POST',
+                                           data={'audio': (io.BytesIO(payload), 'clip.wav')}):
+            stream = request.files['audio'].stream
+            return stream._rolled, stream.read()
+
+    def test_small_uploads_stay_in_memory_and_large_ones_spill_to_disk(self):
+        self.assertEqual(self.upload_stream(b'x' * 1000), (False, b'x' * 1000))
+        rolled, data = self.upload_stream(b'y' * (200 * 1024))
+        self.assertTrue(rolled)
+        self.assertEqual(len(data), 200 * 1024)
+
+    def test_wav_duration(self):
+        self.assertAlmostEqual(wav_duration(make_wav(2.5)), 2.5)
+        self.assertIsNone(wav_duration(io.BytesIO(b'\x1aE\xdf\xa3 webm bytes')))
+
+        # A streamed WAV can claim more frames than were uploaded
+        truncated = io.BytesIO(make_wav(4).getvalue()[:44 + 8000])
+        self.assertAlmostEqual(wav_duration(truncated), 1.0)
+
+    @patch('flask.current_app.openai_client.audio.transcriptions.create')
+    def test_oversized_upload_is_rejected_before_transcription(self, mock_create):
+        response = self.client.post('/process_audio', data={'audio': (io.BytesIO(b'\0' * (600 * 1024)), 'clip.wav')})
+        self.assertEqual(response.status_code, 413)
+        self.assertIn('limited to 524288 bytes', response.get_json()['error'])
+        mock_create.assert_not_called()
+
+    @patch('flask.current_app.openai_client.audio.transcriptions.create')
+    def test_chunked_upload_is_cut_off_at_the_limit(self, mock_create):
+        # No Content-Length, as with Transfer-Encoding: chunked
+        body = (b'--b\r\nContent-Disposition: form-data; name="audio"; filename="clip.wav"\r\n\r\n'
+                + b'\0' * (600 * 1024) + b'\r\n--b--\r\n')
+        response = self.client.post('/process_audio', input_stream=io.BytesIO(body),
+                                    content_type='multipart/form-data; boundary=b',
+                                    environ_overrides={'wsgi.input_terminated': True, 'CONTENT_LENGTH': ''})
+        self.assertEqual(response.status_code, 413)
+        mock_create.assert_not_called()
+
+    @patch('flask.current_app.openai_client.audio.transcriptions.create')
+    def test_long_recording_is_rejected_before_transcription(self, mock_create):
+        response = self.client.post('/process_audio', data={'audio': (make_wav(20), 'clip.wav')})
+        self.assertEqual(response.status_code, 413)
+        self.assertIn('10 seconds', response.get_json()['error'])
+        mock_create.assert_not_called()
+
+    @patch('flask.current_app.openai_client.audio.transcriptions.create')
+    def test_long_decoded_recording_is_rejected_before_transcription(self, mock_create):
+        # Compressed uploads only show their length once ffmpeg has decoded them
+        with patch('audio_preprocess.decode_with_ffmpeg', return_value=make_wav(20)) as decode:
+            response = self.client.post('/process_audio',
+                                        data={'audio': (io.BytesIO(b'\x1aE\xdf\xa3' + b'\0' * 100), 'clip.webm')})
+        self.assertEqual(response.status_code, 413)
+        self.assertEqual(decode.call_args.args[2], 10)
+        mock_create.assert_not_called()
+
+    @patch('flask.current_app.openai_client.audio.transcriptions.create', return_value=SimpleNamespace(text='alice'))
+    def test_prepared_file_is_passed_to_the_client(self, mock_create):
+        response = self.client.post('/process_audio', data={'audio': (make_wav(2), 'clip.wav', 'audio/wav')})
+        self.assertEqual(response.get_json(), {'transcript': 'alice'})
+
+        name, stream, content_type = mock_create.call_args.kwargs['file']
+        self.assertEqual((name, content_type), ('voice_vote.wav', 'audio/wav'))
+        self.assertTrue(hasattr(stream, '_rolled'))  # spooled, not copied into a BytesIO
+        with wave.open(stream, 'rb') as wav:
+            self.assertEqual((wav.getframerate(), wav.getnchannels()), (16000, 1))
+
+if __name__ == '__main__':
+    unittest.main()
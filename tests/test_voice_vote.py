@@ -63,6 +63,7 @@ class TestVoiceVote(unittest.TestCase):
         self.assertEqual(response.status_code, 200)
         
         # Create a small valid WAV file
+        import math
         import wave
         import struct
 
@@ -71,8 +72,8 @@ class TestVoiceVote(unittest.TestCase):
             wav_file.setnchannels(1)
             wav_file.setsampwidth(2)
             wav_file.setframerate(44100)
-            for _ in range(44100):  # 1 second of silence
-                value = struct.pack('<h', 0)
+            for i in range(44100):  # 1 second of a 440 Hz tone
+                value = struct.pack('<h', int(8000 * math.sin(2 * math.pi * 440 * i / 44100)))
                 wav_file.writeframesraw(value)
         dummy_audio.seek(0)
 
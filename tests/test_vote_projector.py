@@ -0,0 +1,92 @@
+import unittest
+from datetime import datetime, timedelta, timezone
+from application import create_app
+from extensions import db
+from models import Election, User, VoteEvent, VoteTally
+from vote_projector import VoteTallyProjector
+
+class TestVoteTallyProjector(unittest.TestCase):
+    def setUp(self):
+        self.app = create_app('testing')
+        self.app_context = self.app.app_context()
+        self.app_context.push()
+        db.create_all()
+        self.service = self.app.election_service
+        self.projector = VoteTallyProjector(db, batch_size=2)
+
+        self.election_id = self.service.start_election(['Candidate A', 'Candidate B'], 10, 'custom', 'Event Election')
+        self.election = db.session.get(Election, self.election_id)
+        self.candidate_a, self.candidate_b = [c.id for c in self.election.candidates]
+        for i, candidate_id in enumerate([self.candidate_a, self.candidate_a, self.candidate_b]):
+            self.service.record_vote(i + 1, self.election, candidate_id)
+
+    def tearDown(self):
+        db.session.remove()
+        db.drop_all()
+        self.app_context.pop()
+
+    def test_record_vote_appends_event(self):
+        events = db.session.scalars(db.select(VoteEvent).order_by(VoteEvent.seq)).all()
+        self.assertEqual([e.seq for e in events], [1, 2, 3])
+        self.assertEqual([e.candidate_id for e in events], [self.candidate_a, self.candidate_a, self.candidate_b])
+
+    def test_ballots_are_logged_but_not_projected(self):
+        election_id = self.service.start_election(['X', 'Y'], 10, 'custom', 'Ranked Election', ballot_type='ranked')
+        ranked = db.session.get(Election, election_id)
+        x, y = sorted(c.id for c in ranked.candidates)
+        self.service.record_ballot(1, ranked, [y, x])
+
+        event = db.session.scalars(db.select(VoteEvent).where(VoteEvent.election_id == election_id)).one()
+        self.assertEqual((event.event_type, event.choices), ('ballot_cast', bytes([1, 0])))
+        self.assertEqual(self.projector.catch_up(), 4)
+        self.assertEqual(self.projector.tallies(election_id), {})
+        self.assertEqual(self.projector.last_seq(), 4)
+
+    def test_catch_up_is_incremental(self):
+        self.assertEqual(self.projector.catch_up(), 3)
+        self.assertEqual(self.projector.tallies(self.election_id), {self.candidate_a: 2, self.candidate_b: 1})
+        self.assertEqual(self.projector.last_seq(), 3)
+
+        self.service.record_vote(4, self.election, self.candidate_b)
+        self.assertEqual(self.projector.catch_up(), 1)
+        self.assertEqual(self.projector.catch_up(), 0)
+        self.assertEqual(self.projector.tallies(self.election_id), {self.candidate_a: 2, self.candidate_b: 2})
+
+    def test_rebuild_replays_from_zero(self):
+        self.projector.catch_up()
+        db.session.execute(db.update(VoteTally).values(votes=99))
+        db.session.commit()
+
+        self.assertEqual(self.projector.rebuild(), 3)
+        self.assertEqual(self.projector.tallies(self.election_id), {self.candidate_a: 2, self.candidate_b: 1})
+
+    def test_recent_gap_is_waited_on(self):
+        # seq 4 was handed to a transaction that has not committed yet
+        db.session.add(VoteEvent(seq=5, election_id=self.election_id, candidate_id=self.candidate_b))
+        db.session.commit()
+        self.assertEqual(self.projector.catch_up(), 3)
+        self.assertEqual(self.projector.last_seq(), 3)
+
+        # Once the gap is old, the missing event is treated as rolled back
+        event = db.session.get(VoteEvent, 5)
+        event.created_at = datetime.now(timezone.utc) - timedelta(minutes=1)
+        db.session.commit()
+        self.assertEqual(self.projector.catch_up(), 1)
+        self.assertEqual(self.projector.tallies(self.election_id)[self.candidate_b], 2)
+
+    def test_deleted_election_drops_tallies(self):
+        self.projector.catch_up()
+        db.session.add(VoteEvent(event_type='election_deleted', election_id=self.election_id))
+        db.session.commit()
+
+        self.projector.catch_up()
+        self.assertEqual(self.projector.tallies(self.election_id), {})
+        self.projector.rebuild()
+        self.assertEqual(self.projector.tallies(self.election_id), {})
+
+    def test_cli_rebuild(self):
+        result = self.app.test_cli_runner().invoke(args=['tallies', 'rebuild'])
+        self.assertIn('Replayed 3 events', result.output)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,98 @@
+import threading
+from datetime import datetime, timedelta, timezone
+import sqlalchemy as sa
+from sqlalchemy import func, select
+from models import UserVote
+
+GRANULARITIES = {
+    'minute': timedelta(minutes=1),
+    'hour': timedelta(hours=1),
+    'day': timedelta(days=1),
+}
+SQLITE_FORMATS = {
+    'minute': '%Y-%m-%d %H:%M:00',
+    'hour': '%Y-%m-%d %H:00:00',
+    'day': '%Y-%m-%d 00:00:00',
+}
+# created_at is set before commit, so a bucket only counts as closed once no
+# transaction that started inside it can still be in flight
+CLOSE_GRACE_SECONDS = 30
+
+
+def bucket_expression(column, granularity, dialect_name):
+    """SQL expression truncating a timestamp column to the start of its bucket.
+
+    Arguments are inlined rather than bound so SELECT and GROUP BY render the
+    same expression; granularity is always a key of GRANULARITIES.
+    """
+    if dialect_name == 'postgresql':
+        return func.date_trunc(sa.literal_column(f"'{granularity}'"), column)
+    if dialect_name == 'sqlite':
+        return func.strftime(sa.literal_column(f"'{SQLITE_FORMATS[granularity]}'"), column)
+    if dialect_name == 'mssql':
+        # DATEADD(unit, DATEDIFF(unit, 0, ts), 0) floors to whole units since 1900-01-01
+        unit, zero = sa.literal_column(granularity), sa.literal_column('0')
+        return func.dateadd(unit, func.datediff(unit, zero, column), zero)
+    raise ValueError(f"Turnout bucketing is not supported on {dialect_name}")
+
+
+def floor_to_bucket(dt, granularity):
+    width = GRANULARITIES[granularity]
+    return datetime.min + ((dt - datetime.min) // width) * width
+
+
+def as_datetime(value):
+    # SQLite's strftime returns text; the other dialects return timestamps
+    if isinstance(value, str):
+        return datetime.strptime(value, '%Y-%m-%d %H:%M:%S')
+    return value.replace(tzinfo=None)
+
+
+class TurnoutSeries:
+    """Ballots cast per time bucket for an election, from user_votes.created_at.
+
+    Closed buckets are cached per (election, granularity) and never queried again;
+    each call only aggregates the rows since the last closed bucket.
+    """
+
+    def __init__(self, db, close_grace_seconds=CLOSE_GRACE_SECONDS):
+        self.db = db
+        self.close_grace = timedelta(seconds=close_grace_seconds)
+        self._closed = {}
+        self._lock = threading.Lock()
+
+    def series(self, election_id, granularity):
+        """[(bucket start as naive UTC datetime, count), ...] in time order; empty buckets are omitted."""
+        if granularity not in GRANULARITIES:
+            raise ValueError(f"granularity must be one of {', '.join(GRANULARITIES)}")
+
+        key = (election_id, granularity)
+        now = datetime.now(timezone.utc).replace(tzinfo=None)
+        open_from = floor_to_bucket(now - self.close_grace, granularity)
+
+        with self._lock:
+            closed_until, closed = self._closed.get(key, (None, []))
+        if closed_until is None or closed_until < open_from:
+            closed = closed + self._count(election_id, granularity, closed_until, open_from)
+            closed_until = open_from
+            with self._lock:
+                self._closed[key] = (closed_until, closed)
+
+        return closed + self._count(election_id, granularity, open_from, None)
+
+    def forget(self, election_id):
+        with self._lock:
+            for key in [key for key in self._closed if key[0] == election_id]:
+                del self._closed[key]
+
+    def _count(self, election_id, granularity, start, end):
+        # Always the primary: a lagging replica would get stale buckets cached for good
+        dialect_name = self.db.session.get_bind().dialect.name
+        bucket = bucket_expression(UserVote.created_at, granularity, dialect_name).label('bucket')
+        query = select(bucket, func.count()).where(UserVote.election_id == election_id)
+        if start is not None:
+            query = query.where(UserVote.created_at >= start)
+        if end is not None:
+            query = query.where(UserVote.created_at < end)
+        rows = self.db.session.execute(query.group_by(bucket).order_by(bucket)).all()
+        return [(as_datetime(value), count) for value, count in rows]
@@ -0,0 +1,60 @@
+import tempfile
+import wave
+from flask import Request, current_app
+
+# Upload parts up to this size stay in memory; bigger ones spill to a temp file
+UPLOAD_SPOOL_BYTES = 256 * 1024
+
+
+class SpooledRequest(Request):
+    """Spools multipart file parts through a SpooledTemporaryFile.
+
+    Werkzeug's default buffers small bodies in memory and sends everything else,
+    including chunked uploads with no Content-Length, straight to disk. This keeps
+    memory per upload capped at UPLOAD_SPOOL_BYTES whatever the client sends.
+    """
+
+    _max_content_length = None
+
+    # Flask 3.0's max_content_length is read-only (always MAX_CONTENT_LENGTH);
+    # this lets a view set a tighter cap before it touches the body
+    @property
+    def max_content_length(self):
+        if self._max_content_length is not None:
+            return self._max_content_length
+        return current_app.config['MAX_CONTENT_LENGTH'] if current_app else None
+
+    @max_content_length.setter
+    def max_content_length(self, value):
+        self._max_content_length = value
+
+    def _get_file_stream(self, total_content_length, content_type, filename=None, content_length=None):
+        max_size = current_app.config.get('UPLOAD_SPOOL_BYTES', UPLOAD_SPOOL_BYTES)
+        return tempfile.SpooledTemporaryFile(max_size=max_size, mode='w+b')
+
+
+def stream_size(stream):
+    position = stream.tell()
+    size = stream.seek(0, 2)
+    stream.seek(position)
+    return size
+
+
+def wav_duration(stream):
+    """Seconds of audio in a WAV stream, read from its header; None if it isn't a WAV.
+
+    Browsers that stream WAV often leave the frame count unset, so the count is
+    capped by the bytes actually uploaded.
+    """
+    position = stream.tell()
+    try:
+        stream.seek(0)
+        with wave.open(stream, 'rb') as wav:
+            frame_size = wav.getsampwidth() * wav.getnchannels()
+            data_bytes = stream_size(stream) - stream.tell()
+            frames = min(wav.getnframes(), data_bytes // frame_size if frame_size else 0)
+            return frames / wav.getframerate()
+    except (wave.Error, EOFError, ZeroDivisionError):
+        return None
+    finally:
+        stream.seek(position)
@@ -0,0 +1,160 @@
+import time
+from collections import Counter
+from datetime import datetime, timedelta, timezone
+import click
+from flask.cli import AppGroup
+from sqlalchemy import delete, select, update
+from sqlalchemy.exc import IntegrityError
+from extensions import db
+from models import VoteEvent, VoteTally, ProjectionCheckpoint
+
+# Sequence numbers are assigned before commit, so a lower seq can become visible
+# after a higher one. Gaps younger than this are waited on instead of skipped.
+GAP_GRACE_SECONDS = 5
+
+projector_cli = AppGroup('tallies', help='Vote event log projections.')
+
+
+class VoteTallyProjector:
+    """Maintain vote_tallies from vote_events, resuming after the last applied seq."""
+
+    name = 'vote_tallies'
+
+    def __init__(self, db, batch_size=5000, gap_grace_seconds=GAP_GRACE_SECONDS):
+        self.db = db
+        self.batch_size = batch_size
+        self.gap_grace_seconds = gap_grace_seconds
+
+    def last_seq(self):
+        last_seq = self.db.session.scalar(
+            select(ProjectionCheckpoint.last_seq).where(ProjectionCheckpoint.name == self.name)
+        )
+        if last_seq is not None:
+            return last_seq
+        self.db.session.add(ProjectionCheckpoint(name=self.name, last_seq=0))
+        try:
+            self.db.session.commit()
+        except IntegrityError:
+            # Another projector created it first
+            self.db.session.rollback()
+        return 0
+
+    def catch_up(self):
+        """Apply every committed event past the checkpoint; returns how many were applied."""
+        applied = 0
+        while True:
+            count = self._apply_batch()
+            applied += count
+            if count < self.batch_size:
+                return applied
+
+    def rebuild(self):
+        """Drop the projection and replay the whole log from seq 0."""
+        self.last_seq()
+        self.db.session.execute(delete(VoteTally))
+        self.db.session.execute(
+            update(ProjectionCheckpoint)
+            .where(ProjectionCheckpoint.name == self.name)
+            .values(last_seq=0, updated_at=datetime.now(timezone.utc))
+        )
+        self.db.session.commit()
+        return self.catch_up()
+
+    def tallies(self, election_id):
+        return dict(self.db.session.execute(
+            select(VoteTally.candidate_id, VoteTally.votes).where(VoteTally.election_id == election_id)
+        ).all())
+
+    def _ready_events(self, events, last_seq):
+        """Events up to the first gap that an in-flight transaction might still fill."""
+        cutoff = datetime.now(timezone.utc).replace(tzinfo=None) - timedelta(seconds=self.gap_grace_seconds)
+        expected = last_seq + 1
+        ready = []
+        for event in events:
+            created_at = event.created_at.replace(tzinfo=None) if event.created_at else None
+            if event.seq != expected and created_at and created_at > cutoff:
+                break
+            ready.append(event)
+            expected = event.seq + 1
+        return ready
+
+    def _apply_batch(self):
+        last_seq = self.last_seq()
+        events = self.db.session.execute(
+            select(VoteEvent.seq, VoteEvent.event_type, VoteEvent.election_id, VoteEvent.candidate_id,
+                   VoteEvent.created_at)
+            .where(VoteEvent.seq > last_seq)
+            .order_by(VoteEvent.seq)
+            .limit(self.batch_size)
+        ).all()
+        events = self._ready_events(events, last_seq)
+        if not events:
+            self.db.session.rollback()
+            return 0
+
+        # Claim the range before touching tallies: on Postgres the row lock makes a
+        # concurrent projector wait, then find last_seq moved and back off
+        claimed = self.db.session.execute(
+            update(ProjectionCheckpoint)
+            .where(ProjectionCheckpoint.name == self.name, ProjectionCheckpoint.last_seq == last_seq)
+            .values(last_seq=events[-1].seq, updated_at=datetime.now(timezone.utc))
+            .execution_options(synchronize_session=False)
+        ).rowcount
+        if not claimed:
+            self.db.session.rollback()
+            return 0
+
+        deltas = Counter()
+        # ballot_cast events (approval and ranked ballots) have no per-candidate
+        # vote to add; those elections are tallied from ballots by tally_engine
+        for event in events:
+            if event.event_type == 'vote_cast':
+                deltas[(event.election_id, event.candidate_id)] += 1
+            elif event.event_type == 'election_deleted':
+                for key in [key for key in deltas if key[0] == event.election_id]:
+                    del deltas[key]
+                self.db.session.execute(
+                    delete(VoteTally).where(VoteTally.election_id == event.election_id)
+                    .execution_options(synchronize_session=False)
+                )
+
+        for (election_id, candidate_id), count in deltas.items():
+            updated = self.db.session.execute(
+                update(VoteTally).where(VoteTally.candidate_id == candidate_id)
+                .values(votes=VoteTally.votes + count)
+                .execution_options(synchronize_session=False)
+            ).rowcount
+            if not updated:
+                self.db.session.add(VoteTally(candidate_id=candidate_id, election_id=election_id, votes=count))
+
+        self.db.session.commit()
+        return len(events)
+
+
+@projector_cli.command('catch-up')
+@click.option('--follow', is_flag=True, help='Keep polling for new events.')
+@click.option('--interval', default=1.0, show_default=True, help='Seconds between polls with --follow.')
+def catch_up_command(follow, interval):
+    """Apply vote events recorded since the last run."""
+    projector = VoteTallyProjector(db)
+    while True:
+        applied = projector.catch_up()
+        if applied or not follow:
+            click.echo(f"Applied {applied} events; checkpoint at seq {projector.last_seq()}")
+        if not follow:
+            return
+        time.sleep(interval)
+
+
+@projector_cli.command('rebuild')
+def rebuild_command():
+    """Rebuild vote_tallies by replaying the event log from the start."""
+    projector = VoteTallyProjector(db)
+    started = time.perf_counter()
+    applied = projector.rebuild()
+    elapsed = time.perf_counter() - started
+    click.echo(f"Replayed {applied} events in {elapsed:.2f}s ({applied / elapsed if elapsed else 0:.0f} events/s)")
+
+
+def init_app(app):
+    app.cli.add_command(projector_cli)